@@ -0,0 +1,2 @@
+from .client import ApiClient, token_from_storage
+from .course_management import ApiCourseManagement
@@ -0,0 +1,134 @@
+import http.client
+import json
+import queue
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from err import BizError, LoginExpired, RetryableError
+
+
+def _head(raw: bytes) -> str:
+    """响应体开头一段，用于错误信息"""
+    return raw[:200].decode('utf-8', errors='replace')
+
+
+class ApiClient:
+    """
+    JeecgBoot 接口客户端
+    内部维护一组 keep-alive 连接，请求结束后连接归还复用
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        pool_size: int = 4,
+        timeout: float = 15,
+    ) -> None:
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+
+    def _new_conn(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_conn()
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        body: dict | None = None,
+    ):
+        """发送请求并返回 JeecgBoot 响应中的 result"""
+        url = self.prefix + path
+        if params:
+            url += '?' + urlencode(params)
+        headers = {
+            'X-Access-Token': self.token,
+            'Content-Type': 'application/json;charset=UTF-8',
+        }
+        payload = json.dumps(body, ensure_ascii=False).encode() if body else None
+
+        # 复用的连接可能已被服务端关闭，换新连接重试一次
+        for attempt in range(2):
+            conn = self._acquire() if attempt == 0 else self._new_conn()
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                conn.close()
+                if attempt == 1:
+                    raise RetryableError(f'{method} {path} 请求失败: {e}') from e
+                continue
+            except OSError as e:
+                conn.close()
+                raise RetryableError(f'{method} {path} 请求失败: {e}') from e
+            self._release(conn)
+            break
+
+        if resp.status == 401:
+            raise LoginExpired('接口 token 已失效')
+        if resp.status >= 500:
+            raise RetryableError(
+                f'{method} {path} 服务端错误 {resp.status}: {_head(raw)}'
+            )
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            # 网关、代理返回的错误页不是 JSON
+            raise BizError(
+                f'{method} {path} 返回 {resp.status}，不是 JSON: {_head(raw)}'
+            ) from e
+        if not data.get('success'):
+            raise BizError(f'{method} {path} 失败: {data.get("message")}')
+        return data.get('result')
+
+    def get(self, path: str, params: dict | None = None):
+        return self.request('GET', path, params=params)
+
+    def post(self, path: str, body: dict):
+        return self.request('POST', path, body=body)
+
+    def put(self, path: str, body: dict):
+        return self.request('PUT', path, body=body)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def token_from_storage(storage_file: str | Path) -> str:
+    """从浏览器保存的 storage_state 中取出 JeecgBoot 的登录 token"""
+    state = json.loads(Path(storage_file).read_text(encoding='utf-8'))
+    for origin in state.get('origins', []):
+        for item in origin.get('localStorage', []):
+            if item['name'].endswith('Access-Token'):
+                value = item['value']
+                # Vue.ls 存储格式: {"value": "...", "expire": ...}
+                try:
+                    return json.loads(value)['value']
+                except (ValueError, TypeError, KeyError):
+                    return value
+    raise LoginExpired(f'{storage_file} 中没有找到登录 token')
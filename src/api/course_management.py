@@ -0,0 +1,426 @@
+from datetime import datetime
+from typing import Callable
+
+from pydantic import validate_call
+
+from err import BizError
+from model import ProgressState
+from pages.course_management import CourseManagement
+from resolver import ProgressResolver, progress_ids
+from utils import format_course_time, logging, traced
+
+from .client import ApiClient
+
+logger = logging.getLogger('api_bot')
+
+# JeecgBoot 各模块接口，可在 config.toml 的 [api.endpoints] 中覆盖
+DEFAULT_ENDPOINTS: dict[str, str] = {
+    'course_list': '/course/course/list',
+    'progress_list': '/course/courseProgress/list',
+    'progress_add': '/course/courseProgress/add',
+    'member_list': '/course/courseProgressUser/list',
+    'member_batch_add': '/course/courseProgressUser/addBatch',
+    'member_edit': '/course/courseProgressUser/edit',
+    'discuss_list': '/course/courseFeedback/list',
+    'discuss_batch_add': '/course/courseFeedback/addBatch',
+    'discuss_edit': '/course/courseFeedback/edit',
+}
+
+# 按 id 批量查询时每次请求带的 id 数
+BATCH_FILTER_SIZE = 100
+
+# 页面上的状态文字对应的数据字典值，可在 config.toml 的 [api.dict] 中覆盖
+DEFAULT_DICT: dict[str, dict[str, str]] = {
+    'course_state': {'无效': '0', '未开始': '1', '进行中': '2', '已结束': '3'},
+    'user_state': {'无效': '0', '完成课程': '1', '请假': '2', '请假已补课': '3'},
+    'discuss_state': {'无效': '0', '审核中（未发送）': '1'},
+}
+
+
+class ApiCourseManagement:
+    """
+    直接调用后台接口的 CourseManagement
+    方法与页面版保持一致，可以互相替换
+    """
+
+    ALLOWED_COURSE_STATE = CourseManagement.ALLOWED_COURSE_STATE
+    ALLOWED_USER_STATE = CourseManagement.ALLOWED_USER_STATE
+    ALLOWED_DISCUSS_STATE = CourseManagement.ALLOWED_DISCUSS_STATE
+
+    def __init__(
+        self,
+        client: ApiClient,
+        endpoints: dict[str, str] | None = None,
+        dicts: dict[str, dict[str, str]] | None = None,
+        resolver: ProgressResolver | None = None,
+    ) -> None:
+        self.client = client
+        self.resolver = resolver or progress_ids
+        self.endpoints = {**DEFAULT_ENDPOINTS, **(endpoints or {})}
+        self.dicts = {
+            name: {**codes, **(dicts or {}).get(name, {})}
+            for name, codes in DEFAULT_DICT.items()
+        }
+
+    def reset(self) -> None:
+        """接口模式没有页面状态，重试前无需复位"""
+
+    def _first(self, endpoint: str, params: dict) -> dict | None:
+        """查询列表接口，返回第一条记录"""
+        result = self.client.get(
+            self.endpoints[endpoint], {**params, 'pageNo': 1, 'pageSize': 1}
+        )
+        records = result.get('records', [])
+        return records[0] if records else None
+
+    def _records(self, endpoint: str, params: dict) -> list[dict]:
+        """分页取完列表接口的全部记录"""
+        records: list[dict] = []
+        page_no = 1
+        while True:
+            result = self.client.get(
+                self.endpoints[endpoint],
+                {**params, 'pageNo': page_no, 'pageSize': 100},
+            )
+            records.extend(result.get('records', []))
+            if len(records) >= result.get('total', 0) or not result.get('records'):
+                return records
+            page_no += 1
+
+    def _course_id(self, course_code: str) -> str:
+        course = self._first('course_list', {'courseCode': course_code})
+        if course is None:
+            raise BizError(f'{course_code} 课程不存在')
+        return course['id']
+
+    def _find_progress_id(
+        self, course_code: str, the_progress_of_the_curriculum: str
+    ) -> str | None:
+        progress_id = self.resolver.get(course_code, the_progress_of_the_curriculum)
+        if progress_id is not None:
+            return progress_id
+        progress = self._first(
+            'progress_list',
+            {'courseCode': course_code, 'progress': the_progress_of_the_curriculum},
+        )
+        if progress is None:
+            return None
+        self.resolver.put(course_code, the_progress_of_the_curriculum, progress['id'])
+        return progress['id']
+
+    def _progress_id(
+        self, course_code: str, the_progress_of_the_curriculum: str
+    ) -> str:
+        progress_id = self._find_progress_id(
+            course_code, the_progress_of_the_curriculum
+        )
+        if progress_id is None:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum} 课程进度不存在'
+            )
+        return progress_id
+
+    def _dict_code(self, name: str, label: str) -> str:
+        try:
+            return self.dicts[name][label]
+        except KeyError:
+            raise BizError(f'{label} 不是有效的{name}')
+
+    def _dict_label(self, name: str, code: str | None) -> str:
+        """数据字典值转回页面上的文字，未知的原样返回"""
+        labels = {v: k for k, v in self.dicts[name].items()}
+        return labels.get(str(code), str(code or ''))
+
+    def _records_in(self, endpoint: str, field: str, values: list[str]) -> list[dict]:
+        """按 field 属于 values 查询，JeecgBoot 的 _MultiString 为 IN；分段避免 URL 过长"""
+        records: list[dict] = []
+        for i in range(0, len(values), BATCH_FILTER_SIZE):
+            chunk = ','.join(values[i : i + BATCH_FILTER_SIZE])
+            records += self._records(endpoint, {f'{field}_MultiString': chunk})
+        return records
+
+    @traced()
+    def read_progresses(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], ProgressState | None]:
+        """
+        读取多节课当前的学生状态和课评，每个模块只按本批课程查一次列表
+        返回 {(课程编号, 课程进度): 现状}，课程进度不存在时为 None
+        """
+        wanted = set(keys)
+        ids: dict[str, tuple[str, str]] = {}
+        for p in self._records_in(
+            'progress_list', 'courseCode', sorted({code for code, _ in wanted})
+        ):
+            key = (p.get('courseCode'), p.get('progress'))
+            if key in wanted:
+                ids[p['id']] = key
+                self.resolver.put(*key, p['id'])
+        states = {key: ProgressState() for key in ids.values()}
+        for m in self._records_in('member_list', 'progressId', list(ids)):
+            if m['progressId'] in ids:
+                states[ids[m['progressId']]].members[m['userName']] = self._dict_label(
+                    'user_state', m.get('state')
+                )
+        for d in self._records_in('discuss_list', 'progressId', list(ids)):
+            if d['progressId'] in ids:
+                states[ids[d['progressId']]].discusses[d['userName']] = {
+                    'content': d.get('content') or '',
+                    'state': self._dict_label('discuss_state', d.get('state')),
+                    'title': d.get('title') or '',
+                }
+        return {key: states.get(key) for key in keys}
+
+    @traced()
+    @validate_call
+    def add_progress(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        begin_time: int | datetime,
+        end_time: int | datetime,
+        course_state: ALLOWED_COURSE_STATE,
+        course_content: str,
+    ) -> None:
+        """添加班级进度"""
+        self.client.post(
+            self.endpoints['progress_add'],
+            {
+                'courseId': self._course_id(course_code),
+                'progress': the_progress_of_the_curriculum,
+                'beginTime': format_course_time(begin_time),
+                'endTime': format_course_time(end_time),
+                'state': self._dict_code('course_state', course_state),
+                'content': course_content,
+            },
+        )
+        logger.info(f'{course_code}-{the_progress_of_the_curriculum} 课程进度添加成功')
+
+    @traced()
+    def add_members(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+    ) -> None:
+        """批量增加班级人员"""
+        progress_id = self._progress_id(course_code, the_progress_of_the_curriculum)
+        self.client.post(
+            self.endpoints['member_batch_add'], {'progressId': progress_id}
+        )
+        logger.info(f'{course_code}-{the_progress_of_the_curriculum} 班级人员添加成功')
+
+    @validate_call
+    def add_schedule(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        begin_time: int | datetime,
+        end_time: int | datetime,
+        course_state: ALLOWED_COURSE_STATE,
+        course_content: str,
+    ) -> None:
+        """一键添加班级"""
+        self.add_progress(
+            course_code,
+            the_progress_of_the_curriculum,
+            begin_time,
+            end_time,
+            course_state,
+            course_content,
+        )
+        self.add_members(
+            course_code,
+            the_progress_of_the_curriculum,
+        )
+
+    @traced()
+    @validate_call
+    def set_user_state(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        user_name: str,
+        state: ALLOWED_USER_STATE,
+    ) -> None:
+        """设置用户状态"""
+        progress_id = self._progress_id(course_code, the_progress_of_the_curriculum)
+        member = self._first(
+            'member_list', {'progressId': progress_id, 'userName': user_name}
+        )
+        if member is None:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 不在班级中'
+            )
+        self.client.put(
+            self.endpoints['member_edit'],
+            {'id': member['id'], 'state': self._dict_code('user_state', state)},
+        )
+        logger.info(
+            f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 班级状态设置为{state}'
+        )
+
+    @traced()
+    @validate_call
+    def set_users_state(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        user_names: list[str],
+        state: ALLOWED_USER_STATE,
+        on_done: Callable[[str], None] | None = None,
+    ) -> None:
+        """
+        按课程进度查询一次，批量设置学生状态
+        每设置完一个学生调用一次 on_done(学生)
+        """
+        if not user_names:
+            return
+        progress_id = self._progress_id(course_code, the_progress_of_the_curriculum)
+        members = {
+            m['userName']: m
+            for m in self._records('member_list', {'progressId': progress_id})
+        }
+        missing = [name for name in user_names if name not in members]
+        if missing:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum} 班级中没有找到: {", ".join(missing)}'
+            )
+        code = self._dict_code('user_state', state)
+        for user_name in user_names:
+            self.client.put(
+                self.endpoints['member_edit'],
+                {'id': members[user_name]['id'], 'state': code},
+            )
+            logger.info(
+                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 班级状态设置为{state}'
+            )
+            if on_done is not None:
+                on_done(user_name)
+
+    # 增加已经完成的学生
+    def set_users_over(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        user_names: list[str],
+        on_done: Callable[[str], None] | None = None,
+    ) -> None:
+        self.set_users_state(
+            course_code,
+            the_progress_of_the_curriculum,
+            user_names,
+            '完成课程',
+            on_done,
+        )
+
+    # 增加请假的学生
+    def set_users_leave(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        user_names: list[str],
+        on_done: Callable[[str], None] | None = None,
+    ) -> None:
+        self.set_users_state(
+            course_code,
+            the_progress_of_the_curriculum,
+            user_names,
+            '请假',
+            on_done,
+        )
+
+    @traced()
+    def add_discuss(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+    ) -> None:
+        """批量增加班级人员课评"""
+        progress_id = self._progress_id(course_code, the_progress_of_the_curriculum)
+        self.client.post(
+            self.endpoints['discuss_batch_add'], {'progressId': progress_id}
+        )
+        logger.info(
+            f'{course_code}-{the_progress_of_the_curriculum} 班级人员课评添加成功'
+        )
+
+    @traced()
+    @validate_call
+    def set_user_state_discuss(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        course_content: str,
+        discuss_content: str,
+        user_name: str,
+        state: ALLOWED_DISCUSS_STATE,
+    ) -> None:
+        """设置人员课评状态"""
+        progress_id = self._progress_id(course_code, the_progress_of_the_curriculum)
+        discuss = self._first(
+            'discuss_list', {'progressId': progress_id, 'userName': user_name}
+        )
+        if discuss is None:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 没有课评记录'
+            )
+        self.client.put(
+            self.endpoints['discuss_edit'],
+            {
+                'id': discuss['id'],
+                'content': discuss_content,
+                'state': self._dict_code('discuss_state', state),
+                'title': course_content,
+            },
+        )
+        logger.info(
+            f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 课评状态设置{state}'
+        )
+
+    @traced()
+    @validate_call
+    def set_user_state_discusses(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        course_content: str,
+        discuss_contents: list[str],
+        user_names: list[str],
+        state: ALLOWED_DISCUSS_STATE,
+        on_done: Callable[[str], None] | None = None,
+    ) -> None:
+        """
+        按课程进度查询一次，批量填写课评
+        每填写完一个学生调用一次 on_done(学生)
+        """
+        if len(user_names) != len(discuss_contents):
+            raise ValueError('用户和课评对不上')
+        if not user_names:
+            return
+
+        progress_id = self._progress_id(course_code, the_progress_of_the_curriculum)
+        discusses = {
+            d['userName']: d
+            for d in self._records('discuss_list', {'progressId': progress_id})
+        }
+        missing = [name for name in user_names if name not in discusses]
+        if missing:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum} 课评中没有找到: {", ".join(missing)}'
+            )
+        code = self._dict_code('discuss_state', state)
+        for user_name, discuss_content in zip(user_names, discuss_contents):
+            self.client.put(
+                self.endpoints['discuss_edit'],
+                {
+                    'id': discusses[user_name]['id'],
+                    'content': discuss_content,
+                    'state': code,
+                    'title': course_content,
+                },
+            )
+            logger.info(
+                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 课评状态设置{state}'
+            )
+            if on_done is not None:
+                on_done(user_name)
@@ -0,0 +1,182 @@
+import fnmatch
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from playwright.sync_api import BrowserContext, Route
+
+from config import (
+    API_PREFIX,
+    ASSET_CACHE_DIR,
+    ASSET_CACHE_MAX_MB,
+    BLOCK_ENABLED,
+    BLOCK_PATTERNS,
+    BLOCK_RESOURCE_TYPES,
+)
+
+# 只缓存打包后的静态资源
+CACHED_TYPES = {'script', 'stylesheet'}
+# 不能原样回放的响应头
+_DROP_HEADERS = {
+    'content-length',
+    'content-encoding',
+    'transfer-encoding',
+    'connection',
+}
+
+
+class AssetCache:
+    """
+    按 URL 缓存 JS/CSS 的磁盘 LRU
+    每个资源存为 <hash>.body 和记录 ETag、响应头的 <hash>.json，
+    命中时更新文件修改时间，超出容量时删除最久未用的
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # 本次运行中已经用 ETag 确认过的 URL，之后直接回放
+        self.validated: set[str] = set()
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        name = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / f'{name}.body', self.directory / f'{name}.json'
+
+    def get(self, url: str) -> tuple[dict, bytes] | None:
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        os.utime(body_path)
+        return meta, body
+
+    def put(self, url: str, etag: str, headers: dict, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        body_path, meta_path = self._paths(url)
+        body_path.write_bytes(body)
+        headers = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        meta_path.write_text(
+            json.dumps({'url': url, 'etag': etag, 'headers': headers}),
+            encoding='utf-8',
+        )
+        self.validated.add(url)
+        self.evict()
+
+    def evict(self) -> None:
+        bodies = sorted(self.directory.glob('*.body'), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in bodies)
+        for path in bodies:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
+
+
+class AssetRouter:
+    """
+    context 级别的请求拦截
+    丢弃指定类型和地址的请求，JS/CSS 从磁盘缓存回放，每次运行用 ETag 确认一次
+    """
+
+    # 所有 context 共享的统计
+    blocked: int = 0
+    hits: int = 0
+    saved_bytes: int = 0
+
+    def __init__(
+        self,
+        resource_types: list[str],
+        patterns: list[str],
+        cache: AssetCache | None = None,
+    ) -> None:
+        self.resource_types = set(resource_types)
+        self.patterns = patterns
+        self.cache = cache
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if API_PREFIX in url:
+            return False
+        return resource_type in self.resource_types or any(
+            fnmatch.fnmatch(url, pattern) for pattern in self.patterns
+        )
+
+    def _cacheable(self, resource_type: str) -> bool:
+        return self.cache is not None and resource_type in CACHED_TYPES
+
+    def _hit(self, url: str, body: bytes) -> None:
+        AssetRouter.hits += 1
+        AssetRouter.saved_bytes += len(body)
+        self.cache.validated.add(url)
+
+    def _store(self, url: str, status: int, headers: dict, body: bytes) -> None:
+        if status == 200 and headers.get('etag'):
+            self.cache.put(url, headers['etag'], headers, body)
+
+    def handle(self, route: Route) -> None:
+        request = route.request
+        url, resource_type = request.url, request.resource_type
+        if self.should_block(url, resource_type):
+            AssetRouter.blocked += 1
+            route.abort()
+            return
+
+        if not self._cacheable(resource_type):
+            route.fallback()
+            return
+        cached = self.cache.get(url)
+        if cached and url in self.cache.validated:
+            meta, body = cached
+            self._hit(url, body)
+            route.fulfill(status=200, headers=meta['headers'], body=body)
+            return
+
+        headers = dict(request.headers)
+        if cached:
+            headers['if-none-match'] = cached[0]['etag']
+        response = route.fetch(headers=headers)
+        if cached and response.status == 304:
+            meta, body = cached
+            self._hit(url, body)
+            route.fulfill(status=200, headers=meta['headers'], body=body)
+            return
+        self._store(url, response.status, response.headers, response.body())
+        route.fulfill(response=response)
+
+    @classmethod
+    def summary(cls) -> str:
+        return (
+            f'拦截请求 {cls.blocked} 个，静态资源缓存命中 {cls.hits} 次，'
+            f'节省 {cls.saved_bytes / 2**20:.1f}MB'
+        )
+
+
+_router: AssetRouter | None = None
+
+
+def asset_router() -> AssetRouter | None:
+    """按配置创建共享的 AssetRouter，未启用时返回 None"""
+    global _router
+    if not BLOCK_ENABLED:
+        return None
+    if _router is None:
+        cache = (
+            AssetCache(ASSET_CACHE_DIR, ASSET_CACHE_MAX_MB * 2**20)
+            if ASSET_CACHE_DIR
+            else None
+        )
+        _router = AssetRouter(BLOCK_RESOURCE_TYPES, BLOCK_PATTERNS, cache)
+    return _router
+
+
+def install_routing(context: BrowserContext) -> None:
+    router = asset_router()
+    if router is not None:
+        context.route('**/*', router.handle)
@@ -1,7 +1,9 @@
+import os
 import tomllib
 from pathlib import Path
 
-_cfg = tomllib.loads(Path('config.toml').read_text(encoding='utf-8'))
+CONFIG_FILE: str = os.environ.get('EVALUATION_CONFIG', 'config.toml')
+_cfg = tomllib.loads(Path(CONFIG_FILE).read_text(encoding='utf-8'))
 
 BASE_URL: str = _cfg['site']['base_url']
 USER_NAME: str = _cfg['credentials']['username']
@@ -9,6 +11,99 @@ USER_PASSWORD: str = _cfg['credentials']['password']
 HEADLESS: bool = _cfg['browser']['headless']
 VIEWPORT: dict = _cfg['browser']['viewport']
 LOCALE: str = _cfg['browser']['locale']
+CONCURRENCY: int = _cfg.get('run', {}).get('concurrency', 1)
+JOURNAL_FILE: str = _cfg.get('run', {}).get('journal', 'journal.db')
+PROGRESS_CACHE: str = _cfg.get('run', {}).get('progress_cache', '')
+BACKEND: str = _cfg.get('backend', {}).get('kind', 'ui')
+PROFILE: str = _cfg.get('run', {}).get('profile', 'debug')
+# 按名称覆盖内置运行配置的字段
+PROFILES: dict[str, dict] = _cfg.get('profiles', {})
+
+_pacing = _cfg.get('pacing', {})
+# 保存接口耗时超过基线的倍数后开始放慢
+PACING_SLOW_FACTOR: float = _pacing.get('slow_factor', 2)
+PACING_MAX_DELAY: float = _pacing.get('max_delay', 3)
+# 保存失败（校验错误等）后的最小间隔
+PACING_ERROR_DELAY: float = _pacing.get('error_delay', 1)
+
+_shard = _cfg.get('shard', {})
+WORKERS: int = _shard.get('workers', 1)
+QUEUE_FILE: str = _shard.get('queue', 'queue.db')
+LEASE_SECONDS: float = _shard.get('lease_seconds', 600)
+# 多进程时每个 worker 轮流使用的账号，未配置时都用 [credentials]
+ACCOUNTS: list[dict[str, str]] = _cfg.get('accounts', [])
+
+_daemon = _cfg.get('daemon', {})
+DAEMON_HOST: str = _daemon.get('host', '127.0.0.1')
+DAEMON_PORT: int = _daemon.get('port', 8765)
+# context 处理完这么多个任务后在空闲时关闭重建，控制内存
+DAEMON_RECYCLE_JOBS: int = _daemon.get('recycle_jobs', 20)
+
+_pool = _cfg.get('pool', {})
+# context 里处理过这么多节课后换新的，按操作检查，0 表示不按课程数回收
+POOL_MAX_COURSES: int = _pool.get('max_courses', 50)
+# 页面 JS 堆超过该值（MB）后换新的 context，0 表示不检查
+POOL_MAX_HEAP_MB: float = _pool.get('max_heap_mb', 512)
+
+_mirror = _cfg.get('mirror', {})
+MIRROR_FILE: str = _mirror.get('file', 'mirror.db')
+MIRROR_PAGE_SIZE: int = _mirror.get('page_size', 200)
+# 同步时并行请求的页数
+MIRROR_WORKERS: int = _mirror.get('workers', 4)
+
+_retry = _cfg.get('retry', {})
+RETRY_MAX_TIMES: int = _retry.get('max_times', 3)
+RETRY_BACKOFF: float = _retry.get('backoff', 2)
+RETRY_MAX_BACKOFF: float = _retry.get('max_backoff', 30)
+# 按步骤覆盖上面的参数；新增类步骤超时时可能已经保存，重试会重复新增，默认不重试
+RETRY_STEPS: dict[str, dict] = _retry.get(
+    'steps',
+    {
+        'add_progress': {'max_times': 1},
+        'add_members': {'max_times': 1},
+        'add_discuss': {'max_times': 1},
+    },
+)
+
+_breaker = _cfg.get('breaker', {})
+BREAKER_THRESHOLD: int = _breaker.get('threshold', 5)
+BREAKER_SLOW_SECONDS: float = _breaker.get('slow_seconds', 10)
+BREAKER_COOLDOWN: float = _breaker.get('cooldown', 60)
+
+_log = _cfg.get('log', {})
+LOG_DIR: str = _log.get('dir', 'logs')
+# 写成每行一条 JSON 的 .jsonl，带课程编号、课程进度、学生、步骤字段
+LOG_JSON: bool = _log.get('json', False)
+# 日志文件超过该大小（MB）后轮转，保留 backups 份
+LOG_MAX_MB: float = _log.get('max_mb', 10)
+LOG_BACKUPS: int = _log.get('backups', 3)
+
+_trace = _cfg.get('trace', {})
+TRACE_ENABLED: bool = _trace.get('enabled', False)
+TRACE_DIR: str = _trace.get('dir', 'traces')
+
+_captcha = _cfg.get('captcha', {})
+CAPTCHA_MODE: str = _captcha.get('mode', 'thread')
+CAPTCHA_MIN_CONFIDENCE: float = _captcha.get('min_confidence', 0.6)
+CAPTCHA_REFRESH_TIMES: int = _captcha.get('refresh_times', 3)
+
+_api = _cfg.get('api', {})
+API_PREFIX: str = _api.get('prefix', '/jeecg-boot')
+API_POOL_SIZE: int = _api.get('pool_size', 4)
+API_ENDPOINTS: dict[str, str] = _api.get('endpoints', {})
+API_DICT: dict[str, dict[str, str]] = _api.get('dict', {})
+
+# 导入文件表头，按 progress/member/discuss 覆盖
+IMPORT_COLUMNS: dict[str, list[str]] = _cfg.get('import', {}).get('columns', {})
+
+_block = _cfg.get('block', {})
+BLOCK_ENABLED: bool = _block.get('enabled', False)
+BLOCK_RESOURCE_TYPES: list[str] = _block.get(
+    'resource_types', ['image', 'media', 'font']
+)
+BLOCK_PATTERNS: list[str] = _block.get('patterns', [])
+ASSET_CACHE_DIR: str = _block.get('cache_dir', '.asset-cache')
+ASSET_CACHE_MAX_MB: int = _block.get('cache_max_mb', 200)
 
 STORAGE_FILE: str = 'storage.json'
 MANAGER_URL: str = f'{BASE_URL}/dashboard/analysis'
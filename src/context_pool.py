@@ -0,0 +1,144 @@
+from playwright.sync_api import Browser, BrowserContext, CDPSession, Page
+
+from config import MANAGER_URL, POOL_MAX_COURSES, POOL_MAX_HEAP_MB
+from pages import CourseManagement, Router
+from planner import Operation
+from resilience import breaker
+from session import new_context
+from utils import logging
+
+logger = logging.getLogger('context_pool_bot')
+
+# 接近回收条件（课程数差一节、JS 堆到阈值的该比例）时提前准备下一个页面
+PREFETCH_RATIO = 0.8
+
+
+class ContextPool:
+    """
+    已登录的 context 与页面，可直接当作 CourseManagement 传给 run_plan
+    每个操作完成后检查处理过的课程数与 JS 堆，到达阈值时在下一个操作开始前换成新的 context；
+    接近阈值时提前用当前登录态建好下一个页面并开始加载，切换时无需等待
+    """
+
+    # 更换 context 的次数、切换时直接用上提前准备好的页面的次数
+    recycled = 0
+    prefetched = 0
+
+    def __init__(
+        self,
+        browser: Browser,
+        context_options: dict,
+        context: BrowserContext,
+        max_courses: int = POOL_MAX_COURSES,
+        max_heap_mb: float = POOL_MAX_HEAP_MB,
+    ) -> None:
+        self.browser = browser
+        self.context_options = context_options
+        self.max_courses = max_courses
+        self.max_heap_mb = max_heap_mb
+        # (context, 页面, 页面正在加载的模块, 地址)
+        self._spare: tuple[BrowserContext, Page, str | None, str] | None = None
+        self._due: str | None = None
+        self.context = context
+        self._use(context.new_page())
+
+    def _use(self, page: Page) -> None:
+        breaker.watch(page)
+        self.page = page
+        self.manager = CourseManagement(page)
+        self._keys: set[str] = set()
+        self.courses = 0
+        self._cdp: CDPSession | None = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.current(), name)
+
+    def heap_mb(self) -> float:
+        """通过 CDP 读取当前页面已用的 JS 堆（MB）"""
+        if self._cdp is None:
+            self._cdp = self.context.new_cdp_session(self.page)
+            self._cdp.send('Performance.enable')
+        metrics = self._cdp.send('Performance.getMetrics')['metrics']
+        used = next(m['value'] for m in metrics if m['name'] == 'JSHeapUsedSize')
+        return used / 2**20
+
+    def op_done(self, op: Operation, error: Exception | None = None) -> None:
+        """
+        每个操作完成或失败后检查，签名与 run_plan 的 on_op 一致
+        按模块合并的计划里课程要到最后才全部完成，所以按操作检查，
+        课程数为在当前 context 里处理过的课程
+        """
+        self._keys.add(op.key)
+        self.courses = len(self._keys)
+        try:
+            heap = self.heap_mb() if self.max_heap_mb else 0.0
+        except Exception as e:
+            # 页面崩溃等情况读不到 JS 堆，直接换新的 context
+            logger.warning(f'读取 JS 堆失败: {e}')
+            self._cdp = None
+            self._due = '读取 JS 堆失败'
+            return
+        if self.max_courses and self.courses >= self.max_courses:
+            self._due = f'已处理 {self.courses} 节课'
+        elif self.max_heap_mb and heap >= self.max_heap_mb:
+            self._due = f'JS 堆 {heap:.0f}MB'
+        elif self._spare is None and (
+            (self.max_courses and self.courses >= self.max_courses - 1)
+            or (self.max_heap_mb and heap >= self.max_heap_mb * PREFETCH_RATIO)
+        ):
+            self._prefetch()
+
+    def _module_url(self) -> tuple[str | None, str]:
+        """当前所在模块及其直达地址，没有时返回首页"""
+        router = self.manager.router
+        if router.location and router.location in Router.routes:
+            return router.location, Router.routes[router.location]
+        return None, MANAGER_URL
+
+    def _prefetch(self) -> None:
+        """用当前登录态新建 context 和页面，在后台开始加载当前模块"""
+        context = new_context(
+            self.browser, self.context_options, self.context.storage_state()
+        )
+        page = context.new_page()
+        module, url = self._module_url()
+        # 只触发跳转不等待加载，页面在浏览器里与当前课程并行加载
+        page.evaluate('url => { location.href = url }', url)
+        self._spare = (context, page, module, url)
+
+    def current(self) -> CourseManagement:
+        """当前页面的 CourseManagement，到了回收条件时先切换"""
+        if self._due is not None:
+            self.recycle(self._due)
+        return self.manager
+
+    def recycle(self, reason: str = '') -> None:
+        """换成新的 context，旧的关闭释放内存"""
+        if self._spare is None:
+            self._prefetch()
+        else:
+            ContextPool.prefetched += 1
+        context, page, module, url = self._spare
+        self._spare = None
+        self._due = None
+        old = self.context
+        self.context = context
+        self._use(page)
+        # 网站可能重定向（如登录态失效跳到登录页），只等离开空白页后加载完成，不要求地址一致
+        page.wait_for_url(lambda u: u != 'about:blank', wait_until='commit')
+        page.wait_for_load_state('domcontentloaded')
+        if module is not None and page.url == url:
+            self.manager.router.arrive(module, url)
+        old.close()
+        ContextPool.recycled += 1
+        logger.info(f'{reason}，已换用新的 context')
+
+    def close(self) -> None:
+        if self._spare is not None:
+            self._spare[0].close()
+            self._spare = None
+        self.context.close()
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'更换 context {cls.recycled} 次，其中 {cls.prefetched} 次页面已提前准备'
@@ -0,0 +1,317 @@
+import itertools
+import json
+import queue
+import threading
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+from playwright.sync_api import Browser, sync_playwright
+
+from config import (
+    CAPTCHA_MODE,
+    DAEMON_HOST,
+    DAEMON_PORT,
+    DAEMON_RECYCLE_JOBS,
+    USER_NAME,
+    USER_PASSWORD,
+)
+from context_pool import ContextPool
+from err import LoginExpired
+from journal import Journal
+from model import CourseModel
+from preflight import PreflightError, courses_adapter, parse_courses
+from planner import build_plan
+from profiles import RunProfile
+from session import open_logged_in_context
+from utils import logging, prewarm_captcha
+from workflow import run_plan
+
+logger = logging.getLogger('daemon_bot')
+
+# 保留最近完成的任务数，供查询状态
+KEEP_JOBS = 100
+
+
+class Job:
+    """一次提交的课程及其处理进度，事件按顺序追加，供客户端流式读取"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, courses: list[CourseModel], force: bool = False) -> None:
+        self.id = str(next(self._ids))
+        self.courses = courses
+        # 忽略这些课程已有的步骤记录，修正数据后重新提交时使用
+        self.force = force
+        self.status: dict[str, dict] = {}
+        self.events: list[dict] = []
+        self.finished = False
+        self._cond = threading.Condition()
+        for course in courses:
+            self.update(f'{course.code}-{course.progress}', 'queued')
+
+    def _emit(self, event: dict) -> None:
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def update(self, key: str, status: str, error: str | None = None) -> None:
+        event = {'job': self.id, 'key': key, 'status': status}
+        if error:
+            event['error'] = error
+        self.status[key] = event
+        self._emit(event)
+
+    def start(self) -> None:
+        self._emit({'job': self.id, 'status': 'started'})
+
+    def finish(self) -> None:
+        counts = {'done': 0, 'failed': 0}
+        for event in self.status.values():
+            if event['status'] in counts:
+                counts[event['status']] += 1
+        with self._cond:
+            self.finished = True
+            self.events.append({'job': self.id, 'status': 'finished', **counts})
+            self._cond.notify_all()
+
+    def stream(self) -> Iterator[dict]:
+        """从头依次返回事件，任务结束后停止"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.events) and not self.finished:
+                    self._cond.wait()
+                events = self.events[index:]
+                index = len(self.events)
+                done = self.finished
+            yield from events
+            if done and index == len(self.events):
+                return
+
+    def snapshot(self) -> dict:
+        return {
+            'id': self.id,
+            'finished': self.finished,
+            'courses': list(self.status.values()),
+        }
+
+
+class JobServer(ThreadingHTTPServer):
+    """
+    本机任务接口，请求在各自线程中处理，任务交给主线程的浏览器依次执行
+    POST /jobs            提交 CourseModel 列表，返回任务 id；?force=1 时全部重做
+    GET  /jobs/<id>       任务当前状态
+    GET  /jobs/<id>/events 按行返回 JSON 事件，直到任务结束
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = DAEMON_HOST, port: int = DAEMON_PORT) -> None:
+        super().__init__((host, port), JobHandler)
+        self.queue: queue.Queue[Job] = queue.Queue()
+        # 请求线程同时提交和查询，jobs 的读写都要持锁
+        self._lock = threading.Lock()
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def submit(self, courses: list[CourseModel], force: bool = False) -> Job:
+        job = Job(courses, force)
+        with self._lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > KEEP_JOBS:
+                oldest = next(iter(self.jobs.values()))
+                if not oldest.finished:
+                    break
+                self.jobs.popitem(last=False)
+        self.queue.put(job)
+        logger.info(f'收到任务 {job.id}，{len(courses)} 节课')
+        return job
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    server: JobServer
+
+    def _json(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job(self, job_id: str) -> Job | None:
+        job = self.server.get(job_id)
+        if job is None:
+            self._json(404, {'message': f'任务 {job_id} 不存在'})
+        return job
+
+    def do_POST(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != '/jobs':
+            self._json(404, {'message': '未知接口'})
+            return
+        force = urllib.parse.parse_qs(url.query).get('force') == ['1']
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            courses = parse_courses(body)
+        except PreflightError as e:
+            self._json(400, {'message': '课程数据校验不通过', 'errors': e.errors})
+            return
+        job = self.server.submit(courses, force)
+        self._json(202, {'id': job.id, 'courses': len(courses)})
+
+    def do_GET(self) -> None:
+        parts = self.path.strip('/').split('/')
+        if parts == ['health']:
+            self._json(200, {'queued': self.server.queue.qsize()})
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            if job := self._job(parts[1]):
+                self._json(200, job.snapshot())
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+            if job := self._job(parts[1]):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.end_headers()
+                for event in job.stream():
+                    self.wfile.write(json.dumps(event, ensure_ascii=False).encode())
+                    self.wfile.write(b'\n')
+                    self.wfile.flush()
+        else:
+            self._json(404, {'message': '未知接口'})
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format % args)
+
+
+class Daemon:
+    """在主线程保持浏览器和已登录的 context，依次执行 JobServer 收到的任务"""
+
+    def __init__(self, profile: RunProfile, use_journal: bool = True) -> None:
+        self.profile = profile
+        self.use_journal = use_journal
+        self.pool: ContextPool | None = None
+        self.jobs_in_context = 0
+
+    def _open(self, browser: Browser) -> None:
+        """登录并新建 context 池，替换掉旧的"""
+        self._close()
+        options = self.profile.context_options()
+        context = open_logged_in_context(browser, options, USER_NAME, USER_PASSWORD)
+        self.pool = ContextPool(browser, options, context)
+        self.jobs_in_context = 0
+
+    def _close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+        self.pool = None
+
+    @staticmethod
+    def _fail_queued(job: Job, error: str) -> None:
+        for key, event in job.status.items():
+            if event['status'] == 'queued':
+                job.update(key, 'failed', error)
+
+    def run_job(self, browser: Browser, job: Job, journal: Journal | None) -> None:
+        job.start()
+        if job.force and journal is not None:
+            for course in job.courses:
+                journal.reset(course.code, course.progress)
+
+        def on_result(key: str, error: Exception | None) -> None:
+            job.update(
+                key, 'failed' if error else 'done', str(error) if error else None
+            )
+
+        for attempt in (1, 2):
+            try:
+                if self.pool is None:
+                    self._open(browser)
+                elif self.jobs_in_context >= DAEMON_RECYCLE_JOBS:
+                    # 空闲时换新的 context，沿用当前登录态，不必重新登录
+                    self.pool.recycle(f'已处理 {self.jobs_in_context} 个任务')
+                    self.jobs_in_context = 0
+                run_plan(
+                    self.pool,
+                    build_plan(job.courses),
+                    journal,
+                    on_result,
+                    self.pool.op_done,
+                )
+                break
+            except LoginExpired:
+                # 登录态失效：丢掉 context 重新登录后再跑一次，已完成的步骤由 journal 跳过
+                self._close()
+                if attempt == 2 or journal is None:
+                    self._fail_queued(job, '登录已失效')
+                    break
+                logger.warning(f'任务 {job.id} 登录已失效，重新登录后重试')
+            except Exception as e:
+                # 登录、换 context 等出错时这个任务失败，常驻进程继续接收后面的任务
+                logger.exception(f'任务 {job.id} 执行出错')
+                self._close()
+                self._fail_queued(job, f'{type(e).__name__}: {e}')
+                break
+        # 没有需要执行的步骤的课程
+        for key, event in job.status.items():
+            if event['status'] == 'queued':
+                job.update(key, 'done')
+        self.jobs_in_context += 1
+        job.finish()
+        logger.info(f'任务 {job.id} 完成')
+
+    def serve(self, server: JobServer) -> None:
+        prewarm_captcha(CAPTCHA_MODE)
+        journal = Journal() if self.use_journal else None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        logger.info(f'常驻模式已启动，监听 http://{host}:{port}')
+        try:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(**self.profile.launch_options())
+                # 先登录，第一个任务不再等待；失败时留到第一个任务再登录
+                try:
+                    self._open(browser)
+                except Exception:
+                    logger.exception('预先登录失败')
+                    self._close()
+                while True:
+                    try:
+                        job = server.queue.get(timeout=1)
+                    except queue.Empty:
+                        continue
+                    self.run_job(browser, job, journal)
+        finally:
+            server.shutdown()
+            if journal is not None:
+                journal.close()
+
+
+def submit(
+    courses: list[CourseModel],
+    host: str = DAEMON_HOST,
+    port: int = DAEMON_PORT,
+    force: bool = False,
+) -> Iterator[dict]:
+    """
+    把课程提交给常驻进程，逐条返回处理事件直到任务结束
+    force 为 True 时先清除这些课程的步骤记录，全部重做
+    """
+    base = f'http://{host}:{port}'
+    request = urllib.request.Request(
+        f'{base}/jobs?force=1' if force else f'{base}/jobs',
+        data=courses_adapter.dump_json(courses),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    with urllib.request.urlopen(request) as response:
+        job_id = json.loads(response.read())['id']
+    with urllib.request.urlopen(f'{base}/jobs/{job_id}/events') as response:
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
@@ -14,3 +14,9 @@ class RetryableError(Exception):
     """网络抖动、验证码识别失败等可重试错误"""
 
     pass
+
+
+class StepTimeout(BizError, RetryableError):
+    """页面操作超时，可以从安全点重试"""
+
+    pass
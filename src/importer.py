@@ -0,0 +1,246 @@
+import io
+import re
+import zipfile
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+from playwright.sync_api import Response, TimeoutError as PWTimeout
+
+from config import API_PREFIX, BASE_URL, IMPORT_COLUMNS
+from err import BizError
+from model import CourseModel
+from pages import CourseManagement
+from planner import STEP_MODULES
+from utils import format_course_time, logging, traced
+
+logger = logging.getLogger('import_bot')
+
+# 各模块导入文件的表头，需与实体上 @Excel 的名称一致，可在 config.toml 的 [import.columns] 中覆盖
+DEFAULT_COLUMNS: dict[str, list[str]] = {
+    'progress': ['课程编号', '课程进度', '开始时间', '结束时间', '状态', '课程内容'],
+    'member': ['课程编号', '课程进度', '用户名字', '上课状态'],
+    'discuss': ['课程编号', '课程进度', '人员名称', '课后评价', '状态', '标题'],
+}
+COLUMNS = {**DEFAULT_COLUMNS, **IMPORT_COLUMNS}
+
+IMPORT_API = re.compile(r'/importExcel$')
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# 导入错误日志中的行号，从第一行数据算起
+ERROR_LINE = re.compile(r'第\s*(\d+)\s*行')
+ERROR_COUNT = re.compile(r'错误行数[:：]\s*(\d+)')
+
+# (课程编号-课程进度, 导入失败时补做的步骤, 学生, 该行内容)
+Row = tuple[str, str, str | None, list[str]]
+
+
+def _column(index: int) -> str:
+    return chr(ord('A') + index)
+
+
+def xlsx(header: list[str], rows: list[list[str]]) -> bytes:
+    """生成只有一个工作表、全部为文本单元格的 xlsx"""
+    lines = []
+    for r, values in enumerate([header, *rows], 1):
+        cells = ''.join(
+            f'<c r="{_column(c)}{r}" t="inlineStr"><is><t>{escape(str(v))}</t></is></c>'
+            for c, v in enumerate(values)
+        )
+        lines.append(f'<row r="{r}">{cells}</row>')
+    sheet = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f'<sheetData>{"".join(lines)}</sheetData></worksheet>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr(
+            '[Content_Types].xml',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>',
+        )
+        z.writestr(
+            '_rels/.rels',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>',
+        )
+        z.writestr(
+            'xl/workbook.xml',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        z.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+            '</Relationships>',
+        )
+        z.writestr('xl/worksheets/sheet1.xml', sheet)
+    return buffer.getvalue()
+
+
+def progress_rows(courses: list[CourseModel]) -> list[Row]:
+    return [
+        (
+            f'{c.code}-{c.progress}',
+            'add_progress',
+            None,
+            [
+                c.code,
+                c.progress,
+                *map(format_course_time, c.span()),
+                c.state,
+                c.content,
+            ],
+        )
+        for c in courses
+    ]
+
+
+def member_rows(courses: list[CourseModel]) -> list[Row]:
+    """正常上课和请假的学生，直接带上上课状态"""
+    rows: list[Row] = []
+    for c in courses:
+        key = f'{c.code}-{c.progress}'
+        rows += [
+            (key, 'set_users_over', u, [c.code, c.progress, u, '完成课程'])
+            for u in c.users_over
+        ]
+        rows += [
+            (key, 'set_users_leave', u, [c.code, c.progress, u, '请假'])
+            for u in c.users_leave
+        ]
+    return rows
+
+
+def discuss_rows(courses: list[CourseModel]) -> list[Row]:
+    if any(len(c.users_over) != len(c.discuss_content) for c in courses):
+        raise ValueError('用户和课评对不上')
+    return [
+        (
+            f'{c.code}-{c.progress}',
+            'set_user_state_discusses',
+            u,
+            [c.code, c.progress, u, content, c.discuss_state, c.content],
+        )
+        for c in courses
+        for u, content in zip(c.users_over, c.discuss_content)
+    ]
+
+
+def is_import_response(response: Response) -> bool:
+    return response.request.method == 'POST' and bool(
+        IMPORT_API.search(urlsplit(response.url).path)
+    )
+
+
+class ImportAdapter:
+    """
+    用列表页的「导入」一次提交整批课程，代替逐行打开弹窗编辑
+    导入失败的行退回原来的逐行页面操作
+    """
+
+    def __init__(self, manager: CourseManagement) -> None:
+        self.manager = manager
+        self.page = manager.page
+        # 部分行重新导入后仍失败的课程及原因，不再逐行补做
+        self.failures: dict[str, BizError] = {}
+
+    def _error_lines(self, data: dict, total: int) -> set[int]:
+        """从导入结果中找出失败的行号（从 1 开始）"""
+        if not data.get('success'):
+            return set(range(1, total + 1))
+        result = data.get('result')
+        if not isinstance(result, dict) or not result.get('fileUrl'):
+            return set()
+        log = self.page.request.get(
+            f'{BASE_URL}{API_PREFIX}/sys/common/static/{result["fileUrl"]}'
+        ).text()
+        lines = {int(n) for n in ERROR_LINE.findall(log)}
+        count = ERROR_COUNT.search(data.get('message') or '')
+        if not lines and (count is None or int(count.group(1))):
+            raise BizError(f'导入有失败的行，但无法定位具体行: {data.get("message")}')
+        return lines
+
+    @traced('import')
+    def upload(self, module: str, kind: str, rows: list[Row]) -> list[Row]:
+        """在 module 的列表页导入 rows，返回失败的行"""
+        if not rows:
+            return []
+        data = xlsx(COLUMNS[kind], [row for *_, row in rows])
+        try:
+            self.manager.to_management(module)
+            with self.page.expect_response(is_import_response) as info:
+                with self.page.expect_file_chooser() as chooser:
+                    self.page.get_by_role('button', name='图标: import 导入').click()
+                chooser.value.set_files(
+                    files={
+                        'name': f'{kind}.xlsx',
+                        'mimeType': XLSX_MIME,
+                        'buffer': data,
+                    }
+                )
+            result = info.value.json()
+        except PWTimeout:
+            self.manager.router.leave()
+            raise BizError(f'{module} 导入失败')
+        except Exception:
+            self.manager.router.leave()
+            raise
+        failed = [
+            rows[n - 1] for n in self._error_lines(result, len(rows)) if n <= len(rows)
+        ]
+        logger.info(f'{module} 导入 {len(rows)} 行，失败 {len(failed)} 行')
+        return failed
+
+    def import_courses(
+        self, courses: list[CourseModel]
+    ) -> dict[str, dict[str, list[str] | None]]:
+        """
+        依次导入课程进度、班级人员和课评
+        返回导入失败、需要逐行补做的部分，格式同 build_graph 的 changes；
+        部分行失败的只重新导入这些行，仍失败的课程记在 failures 中
+        """
+        changes: dict[str, dict[str, list[str] | None]] = {}
+
+        # 课程进度导入失败的课程整节走原来的流程，不再导入它的人员和课评
+        for key, *_ in self.upload('课程进度', 'progress', progress_rows(courses)):
+            changes[key] = {step: None for step in STEP_MODULES}
+        rest = [c for c in courses if f'{c.code}-{c.progress}' not in changes]
+
+        for kind, rows, add in (
+            ('member', member_rows(rest), 'add_members'),
+            ('discuss', discuss_rows(rest), 'add_discuss'),
+        ):
+            module = STEP_MODULES[add]
+            failed = self.upload(module, kind, rows)
+            partial: list[Row] = []
+            for key in dict.fromkeys(key for key, *_ in failed):
+                mine = [row for row in failed if row[0] == key]
+                if len(mine) < sum(1 for row in rows if row[0] == key):
+                    # 只失败了部分行：批量新增会把已导入的学生再建一遍，只重新导入失败的行
+                    partial += mine
+                    continue
+                # 整节课都没导入：先批量新增，再逐个设置学生
+                course = changes.setdefault(key, {})
+                course[add] = None
+                for _, step, user, _ in mine:
+                    course.setdefault(step, []).append(user)
+            still: dict[str, list[str]] = {}
+            for key, _, user, _ in self.upload(module, kind, partial):
+                still.setdefault(key, []).append(user)
+            for key, users in still.items():
+                self.failures[key] = BizError(
+                    f'{key} {module}重新导入仍失败: {", ".join(users)}'
+                )
+                logger.error(str(self.failures[key]))
+        return changes
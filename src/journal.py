@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import JOURNAL_FILE
+
+
+class Journal:
+    """
+    已完成步骤的本地记录
+    以 (课程编号, 课程进度, 步骤, 学生) 为键，重跑时跳过已完成的部分
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE) -> None:
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS steps (
+                code TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                step TEXT NOT NULL,
+                user TEXT NOT NULL DEFAULT '',
+                done_at TEXT NOT NULL,
+                PRIMARY KEY (code, progress, step, user)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def done(self, code: str, progress: str, step: str, user: str = '') -> bool:
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM steps WHERE code=? AND progress=? AND step=? AND user=?',
+                (code, progress, step, user),
+            ).fetchone()
+        return row is not None
+
+    def pending(
+        self, code: str, progress: str, step: str, users: list[str]
+    ) -> list[str]:
+        """返回还没完成该步骤的学生，保持原顺序"""
+        with self._lock:
+            finished = {
+                user
+                for (user,) in self.conn.execute(
+                    'SELECT user FROM steps WHERE code=? AND progress=? AND step=?',
+                    (code, progress, step),
+                )
+            }
+        return [user for user in users if user not in finished]
+
+    def record(self, code: str, progress: str, step: str, user: str = '') -> None:
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO steps VALUES (?, ?, ?, ?, ?)',
+                (
+                    code,
+                    progress,
+                    step,
+                    user,
+                    datetime.now().isoformat(timespec='seconds'),
+                ),
+            )
+            self.conn.commit()
+
+    def entries(self, code: str | None = None) -> list[tuple[str, str, str, str, str]]:
+        sql = 'SELECT code, progress, step, user, done_at FROM steps'
+        params: tuple = ()
+        if code is not None:
+            sql += ' WHERE code=?'
+            params = (code,)
+        with self._lock:
+            return self.conn.execute(sql + ' ORDER BY done_at', params).fetchall()
+
+    def reset(self, code: str | None = None, progress: str | None = None) -> int:
+        """删除记录，返回删除条数；不带参数时清空"""
+        sql = 'DELETE FROM steps WHERE 1=1'
+        params: list[str] = []
+        if code is not None:
+            sql += ' AND code=?'
+            params.append(code)
+        if progress is not None:
+            sql += ' AND progress=?'
+            params.append(progress)
+        with self._lock:
+            count = self.conn.execute(sql, params).rowcount
+            self.conn.commit()
+        return count
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,77 +1,446 @@
+import argparse
 import json
+from datetime import date
 from pathlib import Path
+from typing import Iterable
 from playwright.sync_api import sync_playwright
-from utils import logger
-from config import USER_NAME, USER_PASSWORD
-from pages import CourseManagement, LoginPage
+from rich.console import Console
+from rich.table import Table
+from utils import logger, prewarm_captcha, setup_logging, tracer
+from assets import AssetRouter
+from api import ApiClient, ApiCourseManagement, token_from_storage
+from context_pool import ContextPool
+from daemon import Daemon, JobServer, submit
+from config import (
+    API_DICT,
+    API_ENDPOINTS,
+    API_POOL_SIZE,
+    API_PREFIX,
+    BACKEND,
+    BASE_URL,
+    CAPTCHA_MODE,
+    CONCURRENCY,
+    LOG_BACKUPS,
+    LOG_DIR,
+    LOG_JSON,
+    LOG_MAX_MB,
+    PROFILE,
+    PROFILES,
+    STORAGE_FILE,
+    TRACE_DIR,
+    TRACE_ENABLED,
+    USER_NAME,
+    USER_PASSWORD,
+    WORKERS,
+)
+from pages import CourseManagement, Router, Waiter
 from model import CourseModel
 from err import BizError, LoginExpired
+from journal import Journal
+from mirror import Mirror, MirrorSync
+from importer import ImportAdapter
+from planner import (
+    Operation,
+    backfill_courses,
+    build_graph,
+    build_plan,
+    count_navigations,
+    count_navigations_per_course,
+    schedule,
+)
+from pool import browser_manager, run_pool
+from reconcile import reconcile_plan
+from pacing import Pacer, pacer
+from preflight import PreflightError, iter_courses, load_courses, preflight
+from profiles import BUILTIN_PROFILES, RunProfile, load_profile
+from resilience import CircuitBreaker, RetryPolicy
+from resolver import ProgressResolver
+from session import open_logged_in_context
+from shard import WorkQueue, run_sharded
+from workflow import run_plan
 
 
-def run() -> None:
+def run(
+    courses: list[CourseModel],
+    profile: RunProfile,
+    journal: Journal | None = None,
+    sync: bool = False,
+    bulk: bool = False,
+) -> None:
+    prewarm_captcha(CAPTCHA_MODE)
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=300)
-        context = browser.new_context(
-            viewport={
-                'width': 1280,
-                'height': 720,
-            },
-            locale='zh-CN',
+        browser = p.chromium.launch(**profile.launch_options())
+        context = open_logged_in_context(
+            browser, profile.context_options(), USER_NAME, USER_PASSWORD
         )
-        context.set_default_timeout(15000)
-        with context.new_page() as cur_page:
-            login_page = LoginPage(cur_page)
-            login_page.login(USER_NAME, USER_PASSWORD)
-
-        courses_raw = json.loads(Path('courses.json').read_text(encoding='utf-8'))
-        courses = [CourseModel(**course_raw) for course_raw in courses_raw]
-
-        for course in courses:
-            with context.new_page() as cur_page:
-                manager_page = CourseManagement(cur_page)
-
-                cur_page.pause()
-
-                manager_page.add_schedule(
-                    course.code,
-                    course.progress,
-                    course.time[0],
-                    course.time[1],
-                    course.state,
-                    course.content,
-                )
-
-                manager_page.set_users_over(
-                    course.code,
-                    course.progress,
-                    course.users_over,
-                )
-                manager_page.set_users_leave(
-                    course.code,
-                    course.progress,
-                    course.users_leave,
-                )
-                manager_page.add_discuss(
-                    course.code,
-                    course.progress,
-                )
-                manager_page.set_user_state_discusses(
-                    course.code,
-                    course.progress,
-                    course.content,
-                    course.discuss_content,
-                    course.users_over,
-                    course.discuss_state,
-                )
+        plan = sync_plan(courses) if sync else build_plan(courses)
 
+        if bulk and (BACKEND == 'api' or CONCURRENCY > 1):
+            browser.close()
+            raise BizError('批量导入只支持单浏览器的页面模式')
+
+        if BACKEND == 'api':
+            # 接口模式：浏览器只负责登录拿 token
+            browser.close()
+            run_api(plan, journal)
+            return
+
+        if CONCURRENCY > 1:
+            # 并发模式：带着登录态交给多个线程，每个线程一个浏览器
+            storage_state = context.storage_state()
+            browser.close()
+            run_concurrent(plan, storage_state, profile, journal)
+            return
+
+        pool = ContextPool(browser, profile.context_options(), context)
+        if profile.pause:
+            pool.page.pause()
+
+        failures: dict[str, BizError] = {}
+        if bulk:
+            plan, failures = import_plan(pool.manager, courses)
+        results = run_plan(pool, plan, journal, on_op=pool.op_done)
+        results.update(failures)
+
+        pool.close()
         browser.close()
+        report(results)
+
+
+def import_plan(
+    manager: CourseManagement, courses: list[CourseModel]
+) -> tuple[list[Operation], dict[str, BizError]]:
+    """整批导入后，只为导入失败的行生成逐行计划，同时返回重新导入仍失败的课程"""
+    adapter = ImportAdapter(manager)
+    changes = adapter.import_courses(courses)
+    logger.info(f'导入完成，{len(changes)} 节课需要逐行补做')
+    return schedule(build_graph(courses, changes)), adapter.failures
+
+
+def api_client() -> ApiClient:
+    return ApiClient(
+        BASE_URL + API_PREFIX,
+        token_from_storage(STORAGE_FILE),
+        pool_size=API_POOL_SIZE,
+    )
+
+
+def sync_plan(courses: list[CourseModel]) -> list[Operation]:
+    """
+    通过接口读取这批课程的现状，只为有差异的部分生成计划
+    页面模式下也要调接口，用的是登录时保存的 token
+    """
+    client = api_client()
+    try:
+        manager = ApiCourseManagement(client, API_ENDPOINTS, API_DICT)
+        return reconcile_plan(courses, manager.read_progresses)
+    finally:
+        client.close()
+
+
+def run_api(plan: list[Operation], journal: Journal | None = None) -> None:
+    client = api_client()
+    manager = ApiCourseManagement(client, API_ENDPOINTS, API_DICT)
+    try:
+        results = run_plan(manager, plan, journal)
+    finally:
+        client.close()
+    report(results)
+
+
+def run_concurrent(
+    plan: list[Operation],
+    storage_state: dict,
+    profile: RunProfile,
+    journal: Journal | None = None,
+) -> None:
+    results = run_pool(
+        plan,
+        CONCURRENCY,
+        lambda: browser_manager(
+            storage_state, profile.launch_options(), profile.context_options()
+        ),
+        journal,
+    )
+    report(results)
+
+
+def run_workers(
+    courses: Iterable[CourseModel],
+    workers: int,
+    profile: RunProfile,
+    use_journal: bool = True,
+) -> None:
+    """多进程分片执行，每个进程一个浏览器"""
+    failures = run_sharded(
+        courses,
+        workers,
+        profile.launch_options(),
+        profile.context_options(),
+        use_journal,
+        profile.pacing,
+    )
+    queue = WorkQueue()
+    results: dict[str, Exception | None] = dict.fromkeys(queue.keys())
+    queue.close()
+    results.update((key, BizError(error)) for key, error in failures)
+    report(results)
+
+
+def report(results: dict[str, Exception | None]) -> None:
+    failed = {key: err for key, err in results.items() if err is not None}
+    logger.info(f'处理完成: 成功 {len(results) - len(failed)}，失败 {len(failed)}')
+    logger.info(Router.summary())
+    logger.info(Waiter.summary())
+    logger.info(AssetRouter.summary())
+    logger.info(ProgressResolver.summary())
+    logger.info(RetryPolicy.summary())
+    logger.info(CircuitBreaker.summary())
+    logger.info(Pacer.summary())
+    logger.info(ContextPool.summary())
+    for key, err in failed.items():
+        logger.error(f'{key} 失败: {err}')
+    if failed:
+        raise BizError(f'{len(failed)} 节课程处理失败')
+
+
+def show_plan(plan: list[Operation]) -> None:
+    table = Table('#', '模块', '步骤', '课程编号', '课程进度')
+    for index, op in enumerate(plan, 1):
+        table.add_row(
+            str(index), op.module, op.step, op.course.code, op.course.progress
+        )
+    console = Console()
+    console.print(table)
+    console.print(
+        f'共 {len(plan)} 个操作，预计进入模块 {count_navigations(plan)} 次'
+        f'（逐节课执行需 {count_navigations_per_course(plan)} 次）'
+    )
+
+
+def show_journal(journal: Journal, code: str | None) -> None:
+    table = Table('课程编号', '课程进度', '步骤', '学生', '完成时间')
+    for row in journal.entries(code):
+        table.add_row(*row)
+    Console().print(table)
+
+
+def date_range(value: str) -> tuple[date, date]:
+    """解析 2026-09-01:2026-09-30，只给一天时即当天"""
+    start, _, end = value.partition(':')
+    try:
+        first, last = date.fromisoformat(start), date.fromisoformat(end or start)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            '日期范围格式应为 开始:结束，如 2026-09-01:2026-09-30'
+        )
+    if first > last:
+        raise argparse.ArgumentTypeError(f'开始日期 {first} 晚于结束日期 {last}')
+    return first, last
+
+
+def refresh_mirror(full: bool = False) -> None:
+    """用上次登录保存的 token 通过列表接口同步本地镜像"""
+    client = api_client()
+    mirror = Mirror()
+    try:
+        manager = ApiCourseManagement(client, API_ENDPOINTS, API_DICT)
+        counts = MirrorSync(manager, mirror).refresh(full)
+    finally:
+        mirror.close()
+        client.close()
+    logger.info(f'镜像同步完成，共写入 {sum(counts.values())} 条')
+
+
+def show_stats(kind: str, name: str | None) -> None:
+    """只查本地镜像，不访问网站"""
+    mirror = Mirror()
+    if kind == 'attendance':
+        table = Table('课程编号', '课程进度', '应到', '已上课', '请假', '到课率%')
+        rows = mirror.attendance(name)
+    elif kind == 'pending':
+        table = Table('课程编号', '课程进度', '待审核课评')
+        rows = mirror.pending(name)
+    else:
+        if name is None:
+            raise BizError('stats student 需要指定学生姓名')
+        table = Table(
+            '课程编号', '课程进度', '上课时间', '上课状态', '课评状态', '课评'
+        )
+        rows = mirror.history(name)
+    mirror.close()
+    for row in rows:
+        table.add_row(*(str(value) for value in row))
+    Console().print(table)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='自动化课程评价')
+    parser.add_argument(
+        '--courses',
+        default='courses.json',
+        help='课程文件，JSON 数组或每行一节课的 .jsonl',
+    )
+    parser.add_argument(
+        '--check', action='store_true', help='只校验课程文件，列出全部错误'
+    )
+    parser.add_argument(
+        '--plan', action='store_true', help='只打印执行计划，不打开浏览器'
+    )
+    parser.add_argument('--trace', action='store_true', help='记录各步骤耗时并输出汇总')
+    parser.add_argument(
+        '--no-journal', action='store_true', help='不读写步骤记录，全部重跑'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=WORKERS,
+        help='启动的 worker 进程数，大于 1 时多进程分片执行',
+    )
+    parser.add_argument(
+        '--sync',
+        action='store_true',
+        help='先读取服务器上的现状，只处理与 courses.json 不一致的部分',
+    )
+    parser.add_argument(
+        '--import',
+        dest='bulk',
+        action='store_true',
+        help='用列表页的导入整批提交，导入失败的行再逐行处理',
+    )
+    parser.add_argument(
+        '--backfill',
+        type=date_range,
+        metavar='开始:结束',
+        help='补录该日期范围内的课程，多天在同一次登录里按模块合并执行',
+    )
+    parser.add_argument(
+        '--profile',
+        choices=sorted({*BUILTIN_PROFILES, *PROFILES}),
+        help=f'运行配置，默认 {PROFILE}：debug 有界面并放慢，fast 无界面全速并自适应节流',
+    )
+    sub = parser.add_subparsers(dest='command')
+    journal_parser = sub.add_parser('journal', help='查看或清除步骤记录')
+    journal_parser.add_argument('action', choices=['show', 'reset'])
+    journal_parser.add_argument('--code', help='只处理该课程编号')
+    journal_parser.add_argument('--progress', help='只处理该课程进度')
+    sub.add_parser('daemon', help='常驻运行，浏览器保持登录，通过本机接口接收任务')
+    submit_parser = sub.add_parser(
+        'submit', help='把 courses.json 提交给常驻进程并显示每节课的进度'
+    )
+    submit_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='先清除这些课程的步骤记录再全部重做，修正数据后重新提交时使用',
+    )
+    mirror_parser = sub.add_parser(
+        'mirror', help='把课程进度、上课学生和课评同步到本地镜像，默认增量'
+    )
+    mirror_parser.add_argument('--full', action='store_true', help='重新全量同步')
+    stats_parser = sub.add_parser('stats', help='从本地镜像查询统计，不打开网站')
+    stats_parser.add_argument(
+        'kind',
+        choices=['attendance', 'pending', 'student'],
+        help='attendance 到课率；pending 待审核课评数；student 学生上课记录',
+    )
+    stats_parser.add_argument(
+        'name', nargs='?', help='attendance/pending 为课程编号，student 为学生姓名'
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    setup_logging(LOG_DIR, 'app', LOG_JSON, int(LOG_MAX_MB * 2**20), LOG_BACKUPS)
+    if args.command == 'journal':
+        journal = Journal()
+        if args.action == 'show':
+            show_journal(journal, args.code)
+        else:
+            count = journal.reset(args.code, args.progress)
+            logger.info(f'已清除 {count} 条步骤记录')
+        return
+
+    if args.command == 'mirror':
+        refresh_mirror(args.full)
+        return
+    if args.command == 'stats':
+        show_stats(args.kind, args.name)
+        return
+
+    if args.command == 'daemon':
+        profile = load_profile(args.profile)
+        pacer.enabled = profile.pacing
+        Daemon(profile, not args.no_journal).serve(JobServer())
+        return
+
+    # 打开浏览器前校验整个课程文件，全部错误一次报出
+    path = Path(args.courses)
+    sharded = (
+        args.workers > 1
+        and args.command is None
+        and not args.plan
+        and args.backfill is None
+    )
+    if args.check or sharded:
+        errors = preflight(path)
+        if errors:
+            raise PreflightError(errors)
+    if args.check:
+        logger.info(f'{path} 校验通过')
+        return
+
+    if sharded:
+        # 多进程分片时课程逐条写入队列，大批量的 .jsonl 不必整个读入内存
+        if args.sync or args.bulk:
+            raise BizError('--sync、--import 暂不支持多进程分片')
+        profile = load_profile(args.profile)
+        pacer.enabled = profile.pacing
+        run_workers(iter_courses(path), args.workers, profile, not args.no_journal)
+        return
+
+    courses = load_courses(path)
+    if args.backfill is not None:
+        start, end = args.backfill
+        courses = backfill_courses(courses, start, end)
+        days = len({c.span()[0].date() for c in courses})
+        logger.info(f'补录 {start} 至 {end}：{days} 天共 {len(courses)} 节课')
+    if args.command == 'submit':
+        for event in submit(courses, force=args.force):
+            logger.info(json.dumps(event, ensure_ascii=False))
+        return
+
+    if args.plan:
+        show_plan(build_plan(courses))
+        return
+
+    profile = load_profile(args.profile)
+    pacer.enabled = profile.pacing
+    logger.info(f'运行配置 {profile.name}')
+
+    if args.sync and args.bulk:
+        raise BizError('--sync 与 --import 不能同时使用')
+
+    # 同步模式以服务器现状为准，导入不是逐步完成的，都不再按步骤记录跳过
+    journal = None if args.no_journal or args.sync or args.bulk else Journal()
+    if args.trace or TRACE_ENABLED:
+        tracer.enable()
+    try:
+        run(courses, profile, journal, args.sync, args.bulk)
+    finally:
+        if journal is not None:
+            journal.close()
+        if tracer.enabled:
+            tracer.report(TRACE_DIR)
 
 
 if __name__ == '__main__':
     try:
-        run()
+        main()
     except LoginExpired:
         logger.error('登录已失效，人工检查账号或验证码逻辑')
+    except PreflightError as e:
+        logger.error(str(e))
     except BizError as e:
         logger.error(f'业务异常: {e}')
     except Exception:
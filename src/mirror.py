@@ -0,0 +1,278 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator
+
+from api import ApiCourseManagement
+from config import MIRROR_FILE, MIRROR_PAGE_SIZE, MIRROR_WORKERS
+from utils import logging
+
+logger = logging.getLogger('mirror_bot')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    id TEXT PRIMARY KEY,
+    code TEXT,
+    progress TEXT NOT NULL,
+    begin_time TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT '',
+    stamp TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS progress_key ON progress (code, progress);
+CREATE TABLE IF NOT EXISTS members (
+    id TEXT PRIMARY KEY,
+    progress_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT '',
+    stamp TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS members_key ON members (progress_id, user);
+CREATE INDEX IF NOT EXISTS members_user ON members (user);
+CREATE TABLE IF NOT EXISTS feedback (
+    id TEXT PRIMARY KEY,
+    progress_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    content TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT '',
+    stamp TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS feedback_key ON feedback (progress_id, user);
+CREATE INDEX IF NOT EXISTS feedback_user ON feedback (user);
+CREATE TABLE IF NOT EXISTS watermarks (
+    name TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+# 表名 -> 列表接口、写入的列
+TABLES: dict[str, tuple[str, tuple[str, ...]]] = {
+    'progress': (
+        'progress_list',
+        ('id', 'code', 'progress', 'begin_time', 'state', 'stamp'),
+    ),
+    'members': ('member_list', ('id', 'progress_id', 'user', 'state', 'stamp')),
+    'feedback': (
+        'discuss_list',
+        ('id', 'progress_id', 'user', 'content', 'state', 'stamp'),
+    ),
+}
+
+# 到课统计时算作已上课的学生状态，'无效' 不计入应到人数
+ATTENDED_STATES = ('完成课程', '请假已补课')
+PENDING_DISCUSS_STATE = '审核中（未发送）'
+
+
+class Mirror:
+    """
+    课程进度、上课学生与课评的本地 SQLite 镜像
+    以 (课程编号, 课程进度, 学生) 建索引，统计查询不再打开网站
+    """
+
+    def __init__(self, path: str = MIRROR_FILE) -> None:
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def upsert(self, table: str, rows: list[tuple]) -> None:
+        columns = TABLES[table][1]
+        with self._lock:
+            self.conn.executemany(
+                f'INSERT OR REPLACE INTO {table} ({", ".join(columns)}) '
+                f'VALUES ({", ".join("?" * len(columns))})',
+                rows,
+            )
+            self.conn.commit()
+
+    def watermark(self, table: str) -> str | None:
+        """上次同步到的最新修改时间，没有同步过时返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT stamp FROM watermarks WHERE name=?', (table,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, table: str, stamp: str) -> None:
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)',
+                (table, stamp, datetime.now().isoformat(timespec='seconds')),
+            )
+            self.conn.commit()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def attendance(self, code: str | None = None) -> list[tuple]:
+        """每节课的 (课程编号, 课程进度, 应到, 已上课, 请假, 到课率)"""
+        attended = ', '.join('?' * len(ATTENDED_STATES))
+        return self._query(
+            f"""
+            SELECT p.code, p.progress,
+                   COUNT(*) AS total,
+                   SUM(m.state IN ({attended})) AS attended,
+                   SUM(m.state = '请假') AS leave,
+                   ROUND(100.0 * SUM(m.state IN ({attended})) / COUNT(*), 1)
+            FROM members m JOIN progress p ON p.id = m.progress_id
+            WHERE m.state != '无效' AND (? IS NULL OR p.code = ?)
+            GROUP BY p.id ORDER BY p.code, p.begin_time
+            """,
+            (*ATTENDED_STATES, *ATTENDED_STATES, code, code),
+        )
+
+    def pending(self, code: str | None = None) -> list[tuple]:
+        """每节课还在审核中（未发送）的 (课程编号, 课程进度, 课评条数)"""
+        return self._query(
+            """
+            SELECT p.code, p.progress, COUNT(*)
+            FROM feedback f JOIN progress p ON p.id = f.progress_id
+            WHERE f.state = ? AND (? IS NULL OR p.code = ?)
+            GROUP BY p.id ORDER BY p.code, p.begin_time
+            """,
+            (PENDING_DISCUSS_STATE, code, code),
+        )
+
+    def history(self, user: str) -> list[tuple]:
+        """学生每节课的 (课程编号, 课程进度, 上课时间, 上课状态, 课评状态, 课评)"""
+        return self._query(
+            """
+            SELECT p.code, p.progress, p.begin_time, m.state,
+                   COALESCE(f.state, ''), COALESCE(f.content, '')
+            FROM members m
+            JOIN progress p ON p.id = m.progress_id
+            LEFT JOIN feedback f ON f.progress_id = m.progress_id AND f.user = m.user
+            WHERE m.user = ?
+            ORDER BY p.begin_time
+            """,
+            (user,),
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _stamp(record: dict) -> str:
+    return record.get('updateTime') or record.get('createTime') or ''
+
+
+class MirrorSync:
+    """
+    通过列表接口把后台数据拉到 Mirror
+    第一页拿到总数后其余页并行请求，按页写入；增量同步只取上次之后新增或修改的记录
+    """
+
+    def __init__(
+        self,
+        manager: ApiCourseManagement,
+        mirror: Mirror,
+        page_size: int = MIRROR_PAGE_SIZE,
+        workers: int = MIRROR_WORKERS,
+    ) -> None:
+        self.manager = manager
+        self.mirror = mirror
+        self.page_size = page_size
+        self.workers = workers
+        self.labels = {
+            name: {v: k for k, v in codes.items()}
+            for name, codes in manager.dicts.items()
+        }
+        # 课程 id -> 课程编号，列表记录里没有课程编号时才查询
+        self.course_codes: dict[str, str] | None = None
+
+    def _label(self, name: str, code) -> str:
+        return self.labels[name].get(str(code), str(code or ''))
+
+    def _page(self, endpoint: str, params: dict, page_no: int) -> dict:
+        return self.manager.client.get(
+            self.manager.endpoints[endpoint],
+            {**params, 'pageNo': page_no, 'pageSize': self.page_size},
+        )
+
+    def pages(self, endpoint: str, params: dict) -> Iterator[list[dict]]:
+        """按页返回记录，第一页之后的页并行请求、按页码顺序返回"""
+        first = self._page(endpoint, params, 1)
+        yield first.get('records', [])
+        count = -(-first.get('total', 0) // self.page_size)
+        if count <= 1:
+            return
+        with ThreadPoolExecutor(self.workers) as executor:
+            rest = executor.map(
+                lambda no: self._page(endpoint, params, no), range(2, count + 1)
+            )
+            for result in rest:
+                yield result.get('records', [])
+
+    def _course_code(self, record: dict) -> str | None:
+        """课程进度所属的课程编号，查不到时为 None，不拿课程 id 代替"""
+        if record.get('courseCode'):
+            return record['courseCode']
+        if self.course_codes is None:
+            self.course_codes = {
+                course['id']: course.get('courseCode')
+                for records in self.pages('course_list', {})
+                for course in records
+            }
+        return self.course_codes.get(record.get('courseId'))
+
+    def _row(self, table: str, record: dict) -> tuple:
+        if table == 'progress':
+            return (
+                record['id'],
+                self._course_code(record),
+                record.get('progress') or '',
+                record.get('beginTime') or '',
+                self._label('course_state', record.get('state')),
+                _stamp(record),
+            )
+        if table == 'members':
+            return (
+                record['id'],
+                record['progressId'],
+                record['userName'],
+                self._label('user_state', record.get('state')),
+                _stamp(record),
+            )
+        return (
+            record['id'],
+            record['progressId'],
+            record['userName'],
+            record.get('content') or '',
+            self._label('discuss_state', record.get('state')),
+            _stamp(record),
+        )
+
+    def _queries(self, last: str | None) -> list[dict]:
+        """增量时新增和修改分别查询，JeecgBoot 的 _begin 为大于等于"""
+        order = {'column': 'createTime', 'order': 'asc'}
+        if last is None:
+            return [order]
+        return [
+            {**order, 'createTime_begin': last},
+            {**order, 'updateTime_begin': last},
+        ]
+
+    def sync_table(self, table: str, full: bool = False) -> int:
+        endpoint = TABLES[table][0]
+        last = None if full else self.mirror.watermark(table)
+        newest = last or ''
+        count = 0
+        for params in self._queries(last):
+            for records in self.pages(endpoint, params):
+                rows = [self._row(table, r) for r in records]
+                self.mirror.upsert(table, rows)
+                count += len(rows)
+                newest = max([newest, *(row[-1] for row in rows)])
+        if newest:
+            self.mirror.set_watermark(table, newest)
+        return count
+
+    def refresh(self, full: bool = False) -> dict[str, int]:
+        """同步全部表，返回每张表写入的记录数"""
+        counts: dict[str, int] = {}
+        for table in TABLES:
+            counts[table] = self.sync_table(table, full)
+            logger.info(f'{table} 同步 {counts[table]} 条')
+        return counts
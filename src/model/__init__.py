@@ -1 +1,2 @@
-from .class_model import CourseModel
+from .class_model import CourseModel, CourseState, DiscussState
+from .state_model import ProgressState
@@ -1,13 +1,36 @@
-from pydantic import BaseModel, Field
+from datetime import date, datetime, time as clock
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Discriminator, Field, Tag, model_validator
+
+Hour = Annotated[int, Field(ge=0, le=23)]
+CourseState = Literal['请选择', '无效', '未开始', '进行中', '已结束']
+DiscussState = Literal['请选择', '审核中（未发送）', '无效']
+
+
+def _time_kind(value) -> str:
+    """整数按小时校验，其它按完整时间校验，避免小时被当成时间戳"""
+    first = value[0] if isinstance(value, (list, tuple)) and value else None
+    return 'hours' if isinstance(first, int) else 'datetimes'
+
+
+CourseTime = Annotated[
+    Annotated[tuple[Hour, Hour], Tag('hours')]
+    | Annotated[tuple[datetime, datetime], Tag('datetimes')],
+    Discriminator(_time_kind),
+]
 
 
 class CourseModel(BaseModel):
     code: str = Field(..., description='课程编号')
     progress: str = Field(..., description='课程进度')
     content: str = Field(..., description='课程内容')
-    time: tuple[int, int] = Field(..., description='(开始小时, 结束小时)')
-    state: str = Field('已结束', description='课程状态')
-    discuss_state: str = Field('无效', description='课评状态')
+    time: CourseTime = Field(
+        ..., description='(开始小时, 结束小时) 或 (开始时间, 结束时间)'
+    )
+    day: date | None = Field(None, description='上课日期，只给小时时使用，默认当天')
+    state: CourseState = Field('已结束', description='课程状态')
+    discuss_state: DiscussState = Field('无效', description='课评状态')
     users_over: list[str] = Field(default_factory=list, description='正常上课的学生')
     users_leave: list[str] = Field(default_factory=list, description='请假的学生')
     discuss_content: list[str] = Field(default_factory=list, description='课评内容')
@@ -15,3 +38,28 @@ class CourseModel(BaseModel):
     class Config:
         # 支持 json.dumps(c.model_dump(), ensure_ascii=False)
         json_encoders = {tuple[int, int]: lambda t: list(t)}
+
+    def span(self) -> tuple[datetime, datetime]:
+        """开始、结束时间，只给小时时落在 day 这一天"""
+        begin, end = self.time
+        if isinstance(begin, datetime) and isinstance(end, datetime):
+            return begin, end
+        day = self.day or date.today()
+        return datetime.combine(day, clock(begin)), datetime.combine(day, clock(end))
+
+    @model_validator(mode='after')
+    def check_fields(self) -> 'CourseModel':
+        """字段之间的约束，页面上到后面的步骤才会暴露"""
+        begin, end = self.time
+        if isinstance(begin, datetime) and self.day is not None:
+            raise ValueError('time 已是完整时间时不能再指定 day')
+        if begin >= end:
+            raise ValueError(f'开始时间 {begin} 应早于结束时间 {end}')
+        if len(self.discuss_content) != len(self.users_over):
+            raise ValueError(
+                f'课评 {len(self.discuss_content)} 条与正常上课的学生 {len(self.users_over)} 人对不上'
+            )
+        both = set(self.users_over) & set(self.users_leave)
+        if both:
+            raise ValueError(f'既正常上课又请假: {", ".join(sorted(both))}')
+        return self
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class ProgressState(BaseModel):
+    members: dict[str, str] = Field(
+        default_factory=dict, description='学生 -> 上课状态'
+    )
+    discusses: dict[str, dict[str, str]] = Field(
+        default_factory=dict, description='学生 -> {content, state, title}'
+    )
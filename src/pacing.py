@@ -0,0 +1,65 @@
+import time
+
+from config import PACING_ERROR_DELAY, PACING_MAX_DELAY, PACING_SLOW_FACTOR
+from utils import logging
+
+logger = logging.getLogger('pacing_bot')
+
+
+class Pacer:
+    """
+    自适应节流：平时不等待，保存接口明显变慢或保存失败时才在下次保存前等待，
+    恢复正常后等待时间逐步减半
+    """
+
+    # 因节流累计等待的秒数
+    delayed = 0.0
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        slow_factor: float = PACING_SLOW_FACTOR,
+        max_delay: float = PACING_MAX_DELAY,
+        error_delay: float = PACING_ERROR_DELAY,
+    ) -> None:
+        self.enabled = enabled
+        self.slow_factor = slow_factor
+        self.max_delay = max_delay
+        self.error_delay = error_delay
+        # 响应耗时的滑动平均及其历史最低值
+        self.latency: float | None = None
+        self.baseline: float | None = None
+        self.delay = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """记录一次保存接口的耗时"""
+        self.latency = (
+            seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        )
+        self.baseline = min(self.baseline or self.latency, self.latency)
+        if self.latency > self.baseline * self.slow_factor:
+            self._set(min(self.max_delay, self.latency - self.baseline))
+        else:
+            self._set(self.delay / 2 if self.delay > 0.05 else 0.0)
+
+    def error(self) -> None:
+        """保存失败，加倍等待"""
+        self._set(min(self.max_delay, max(self.delay * 2, self.error_delay)))
+
+    def _set(self, delay: float) -> None:
+        if self.enabled and delay and not self.delay:
+            logger.info(f'服务器变慢或出错，每次保存前等待 {delay:.2f}s')
+        self.delay = delay
+
+    def wait(self) -> None:
+        if self.enabled and self.delay:
+            Pacer.delayed += self.delay
+            time.sleep(self.delay)
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'自适应节流累计等待 {cls.delayed:.1f}s'
+
+
+# 同一进程内的页面共享，由运行配置决定是否启用
+pacer = Pacer()
@@ -1,2 +1,4 @@
 from .login import LoginPage
 from .course_management import CourseManagement
+from .router import Router
+from .waits import Waiter
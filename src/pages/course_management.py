@@ -1,17 +1,49 @@
-from typing import Literal
-from playwright.sync_api import Page, TimeoutError as PWTimeout
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Literal
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from playwright.sync_api import Page, Route, TimeoutError as PWTimeout
+import json
 import re
 from config import MANAGER_URL
-from err import BizError
-from utils import format_time_with_today, logging
+from err import BizError, StepTimeout
+from model import CourseState, DiscussState
+from resolver import ProgressResolver, progress_ids
+from utils import format_course_time, log_context, logging, traced
 from pydantic import validate_call
 
+from .router import Router
+from .waits import (
+    Waiter,
+    is_list_url,
+    is_progress_list_response,
+    is_progress_list_url,
+)
+
 logger = logging.getLogger('manage_bot')
 
 
+def _with_query(url: str, **params: str) -> str:
+    parts = urlsplit(url)
+    query = urlencode(parse_qsl(parts.query) + list(params.items()))
+    return urlunsplit(parts._replace(query=query))
+
+
+def _is_batch_add_url(url: str) -> bool:
+    return urlsplit(url).path.endswith('/addBatch')
+
+
+def _is_roster_list_url(url: str) -> bool:
+    """学生、课评列表接口；课程进度选择框的列表不在此列"""
+    return is_list_url(url) and not is_progress_list_url(url)
+
+
 class CourseManagement:
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, resolver: ProgressResolver | None = None):
         self.page = page
+        self.router = Router()
+        self.wait = Waiter(page)
+        self.resolver = resolver or progress_ids
 
     ALLOWED_MANAGEMENT = Literal[
         '试听课登记表',
@@ -22,28 +54,42 @@ class CourseManagement:
         '课后反馈中心',
     ]
 
+    @traced('navigate')
     @validate_call
     def to_management(self, to_name: ALLOWED_MANAGEMENT) -> None:
-        """跳转指定目录"""
-        self.page.goto(MANAGER_URL)
-        self.page.locator('div').filter(has_text=re.compile(r'^课程管理$')).click()
-        self.page.get_by_role('link', name=to_name, exact=True).click()
-
-    ALLOWED_COURSE_STATE = Literal[
-        '请选择',
-        '无效',
-        '未开始',
-        '进行中',
-        '已结束',
-    ]
-
+        """跳转指定目录，已在目标模块时不再跳转"""
+        url = self.router.resolve(to_name, self.page.url)
+        if url == '':
+            return
+        if url:
+            self.page.goto(url)
+        else:
+            self.page.goto(MANAGER_URL)
+            self.page.locator('div').filter(has_text=re.compile(r'^课程管理$')).click()
+            self.page.get_by_role('link', name=to_name, exact=True).click()
+            self.page.wait_for_url(lambda u: u != MANAGER_URL, wait_until='commit')
+        self.router.arrive(to_name, self.page.url)
+
+    def reset(self) -> None:
+        """重试前回到安全点：关掉残留的弹窗，下次操作重新进入模块"""
+        self.router.leave()
+        modals = self.page.locator('.ant-modal-wrap:visible .ant-modal-close').all()
+        for close in reversed(modals):
+            try:
+                close.click(timeout=1000)
+            except PWTimeout:
+                pass
+
+    ALLOWED_COURSE_STATE = CourseState
+
+    @traced()
     @validate_call
     def add_progress(
         self,
         course_code: str,
         the_progress_of_the_curriculum: str,
-        begin_time: int,
-        end_time: int,
+        begin_time: int | datetime,
+        end_time: int | datetime,
         course_state: ALLOWED_COURSE_STATE,
         course_content: str,
     ) -> None:
@@ -70,13 +116,13 @@ class CourseManagement:
             )
 
             # 开始时间
-            begin_time = format_time_with_today(begin_time)
+            begin_time = format_course_time(begin_time)
             self.page.get_by_placeholder('请选择开始时间').click()
             self.page.get_by_placeholder('请选择开始时间').nth(1).fill(begin_time)
             self.page.get_by_placeholder('请选择开始时间').nth(1).press('Enter')
 
             # 结束时间
-            end_time = format_time_with_today(end_time)
+            end_time = format_course_time(end_time)
             self.page.get_by_placeholder('请选择结束时间').click()
             self.page.get_by_placeholder('请选择结束时间').nth(1).fill(end_time)
             self.page.get_by_placeholder('请选择结束时间').nth(1).press('Enter')
@@ -89,16 +135,55 @@ class CourseManagement:
             self.page.get_by_placeholder('请输入课程内容').fill(course_content)
 
             # 确定
-            self.page.get_by_role('button', name='确 定').click()
-            self.page.wait_for_load_state('networkidle')
+            self.wait.save(
+                self.page.get_by_role('button', name='确 定'),
+                f'{course_code}-{the_progress_of_the_curriculum} 保存课程进度',
+            )
             logger.info(
                 f'{course_code}-{the_progress_of_the_curriculum} 课程进度添加成功'
             )
         except PWTimeout:
-            raise BizError(
+            self.router.leave()
+            raise StepTimeout(
                 f'{course_code}-{the_progress_of_the_curriculum} 课程进度添加失败'
             )
+        except Exception:
+            # 保存报错等情况下弹窗还开着，下次操作重新进入模块
+            self.router.leave()
+            raise
+
+    def _add_batch(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        step: str,
+    ) -> None:
+        """
+        批量新增弹窗中选择课程进度后保存
+        已知课程进度 id 时不打开选择框，保存请求里直接带上 progressId
+        """
+        self.page.get_by_role('button', name='图标: plus 批量新增').click()
+        progress_id = self.resolver.get(course_code, the_progress_of_the_curriculum)
+        if progress_id is None:
+            self.page.get_by_placeholder('请选择').click()
+            self._search_progress(course_code, the_progress_of_the_curriculum)
+            self.page.get_by_label('课程进度').get_by_role(
+                'button', name='确 定'
+            ).click()
+            self.wait.save(self.page.get_by_role('button', name='确 定'), step)
+            return
+
+        def set_progress(route: Route) -> None:
+            body = route.request.post_data_json or {}
+            route.continue_(post_data=json.dumps({**body, 'progressId': progress_id}))
 
+        self.page.route(_is_batch_add_url, set_progress)
+        try:
+            self.wait.save(self.page.get_by_role('button', name='确 定'), step)
+        finally:
+            self.page.unroute(_is_batch_add_url, set_progress)
+
+    @traced()
     def add_members(
         self,
         course_code: str,
@@ -107,36 +192,30 @@ class CourseManagement:
         """批量增加班级人员"""
         try:
             self.to_management('课程进度人员')
-            self.page.get_by_role('button', name='图标: plus 批量新增').click()
-            self.page.get_by_placeholder('请选择').click()
-            self.page.get_by_placeholder('请输入课程编码').fill(course_code)
-            self.page.get_by_placeholder('请输入课程进度').fill(
-                the_progress_of_the_curriculum
+            self._add_batch(
+                course_code,
+                the_progress_of_the_curriculum,
+                f'{course_code}-{the_progress_of_the_curriculum} 保存班级人员',
             )
-            self.page.get_by_role('button', name='图标: search 查询').click()
-            self.page.get_by_label('课程进度').get_by_role(
-                'cell', name=course_code
-            ).click()
-            self.page.get_by_label('课程进度').get_by_role(
-                'button', name='确 定'
-            ).click()
-            self.page.get_by_role('button', name='确 定').click()
-            self.page.wait_for_load_state('networkidle')
             logger.info(
                 f'{course_code}-{the_progress_of_the_curriculum} 班级人员添加成功'
             )
         except PWTimeout:
-            raise BizError(
+            self.router.leave()
+            raise StepTimeout(
                 f'{course_code}-{the_progress_of_the_curriculum} 班级人员添加失败'
             )
+        except Exception:
+            self.router.leave()
+            raise
 
     @validate_call
     def add_schedule(
         self,
         course_code: str,
         the_progress_of_the_curriculum: str,
-        begin_time: int,
-        end_time: int,
+        begin_time: int | datetime,
+        end_time: int | datetime,
         course_state: ALLOWED_COURSE_STATE,
         course_content: str,
     ) -> None:
@@ -162,6 +241,153 @@ class CourseManagement:
         '请假已补课',
     ]
 
+    def _search_progress(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+    ) -> None:
+        """在课程进度选择框中查询并选中，顺便记下课程进度 id"""
+        self.page.get_by_placeholder('请输入课程编码').fill(course_code)
+        self.page.get_by_placeholder('请输入课程进度').fill(
+            the_progress_of_the_curriculum
+        )
+        with self.page.expect_response(is_progress_list_response) as info:
+            self.page.get_by_label('课程进度').get_by_role(
+                'button', name='图标: search 查询'
+            ).click()
+        self.resolver.capture(
+            course_code, the_progress_of_the_curriculum, info.value.json()
+        )
+        self.page.get_by_label('课程进度').get_by_role('cell', name=course_code).click()
+
+    @traced('progress_query')
+    def _open_progress_query(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+    ) -> None:
+        """打开高级查询，添加按课程进度筛选的条件"""
+        self.router.leave()
+        self.page.get_by_role('button', name='图标: filter 高级查询').click()
+
+        field = (
+            self.page.locator('div')
+            .filter(has_text=re.compile(r'^选择查询字段$'))
+            .locator('svg')
+        )
+        self.wait.visible(field, '打开高级查询', replaced=1.0)
+        field.click()
+
+        self.page.get_by_title('进度id').click()
+        self.page.get_by_placeholder('请选择').click()
+        self._search_progress(course_code, the_progress_of_the_curriculum)
+        self.page.get_by_role('button', name='确 定').click()
+
+    def _query_by_progress(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+    ) -> None:
+        """只按课程进度筛选列表"""
+        self._open_progress_query(course_code, the_progress_of_the_curriculum)
+        self.wait.reload(
+            self.page.get_by_role('button', name='查 询'),
+            f'{course_code}-{the_progress_of_the_curriculum} 查询',
+        )
+        self.page.get_by_role('button', name='Close').click()
+
+    @contextmanager
+    def _progress_filter(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+    ):
+        """
+        让列表只显示该课程进度的学生
+        已知课程进度 id 时给列表请求直接带上 progressId，点一次列表的查询按钮，
+        省去高级查询和选择框
+        """
+        progress_id = self.resolver.get(course_code, the_progress_of_the_curriculum)
+        if progress_id is None:
+            self._query_by_progress(course_code, the_progress_of_the_curriculum)
+            yield
+            return
+
+        def add_filter(route: Route) -> None:
+            route.continue_(url=_with_query(route.request.url, progressId=progress_id))
+
+        self.router.leave()
+        self.page.route(_is_roster_list_url, add_filter)
+        try:
+            self.wait.reload(
+                self.page.get_by_role('button', name='图标: search 查询'),
+                f'{course_code}-{the_progress_of_the_curriculum} 查询',
+            )
+            yield
+        finally:
+            self.page.unroute(_is_roster_list_url, add_filter)
+
+    def _edit_rows(
+        self,
+        user_names: list[str],
+        edit: Callable[[str], None],
+        on_done: Callable[[str], None] | None = None,
+    ) -> list[str]:
+        """
+        在当前列表中逐页查找学生，打开编辑弹窗后交给 edit 填写保存
+        返回没有找到的学生
+        """
+        pending = list(user_names)
+        while pending:
+            for user_name in list(pending):
+                row = self.page.locator('.ant-table-tbody tr[data-row-key]').filter(
+                    has=self.page.get_by_role('cell', name=user_name, exact=True)
+                )
+                if not row.count():
+                    continue
+                # 固定列会把同一行渲染两遍，操作列在最后一份里
+                key = row.first.get_attribute('data-row-key')
+                self.page.locator(f'tr[data-row-key="{key}"]').get_by_text(
+                    '编辑'
+                ).last.click()
+                with log_context(user=user_name):
+                    edit(user_name)
+                pending.remove(user_name)
+                if on_done is not None:
+                    on_done(user_name)
+
+            next_page = self.page.locator('li.ant-pagination-next')
+            if (
+                not pending
+                or not next_page.count()
+                or 'ant-pagination-disabled' in (next_page.get_attribute('class') or '')
+            ):
+                break
+            self.wait.reload(next_page, '翻页')
+        return pending
+
+    @traced('save_user_state')
+    def _save_user_state(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        user_name: str,
+        state: str,
+    ) -> None:
+        """在已打开的编辑弹窗中设置上课状态并保存"""
+        combobox = self.page.get_by_role('combobox').filter(has_text='请选择上课状态')
+        self.wait.visible(combobox, '打开编辑', replaced=1.0)
+        combobox.click()
+        self.page.get_by_role('option', name=state, exact=True).locator('span').click()
+        self.wait.save(
+            self.page.get_by_role('button', name='确 定'),
+            f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 保存上课状态',
+        )
+        logger.info(
+            f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 班级状态设置为{state}'
+        )
+
+    @traced()
     @validate_call
     def set_user_state(
         self,
@@ -171,29 +397,17 @@ class CourseManagement:
         state: ALLOWED_USER_STATE,
     ) -> None:
         """设置用户状态"""
+        if (course_code, the_progress_of_the_curriculum) in self.resolver:
+            # 已知课程进度 id 时按 id 筛选列表，不再打开高级查询
+            self.set_users_state(
+                course_code, the_progress_of_the_curriculum, [user_name], state
+            )
+            return
         try:
             self.to_management('课程进度人员')
 
             # 查找当前班的人
-            self.page.get_by_role('button', name='图标: filter 高级查询').click()
-
-            self.page.wait_for_timeout(1000)
-            self.page.locator('div').filter(
-                has_text=re.compile(r'^选择查询字段$')
-            ).locator('svg').click()
-
-            self.page.get_by_title('进度id').click()
-            self.page.get_by_placeholder('请选择').click()
-            self.page.get_by_placeholder('请输入课程编码').fill(course_code)
-            self.page.get_by_placeholder('请输入课程进度').fill(
-                the_progress_of_the_curriculum
-            )
-
-            self.page.get_by_role('button', name='图标: search 查询').click()
-            self.page.get_by_label('课程进度').get_by_role(
-                'cell', name=course_code
-            ).click()
-            self.page.get_by_role('button', name='确 定').click()
+            self._open_progress_query(course_code, the_progress_of_the_curriculum)
 
             self.page.get_by_role(
                 'button',
@@ -209,31 +423,72 @@ class CourseManagement:
                 has_text='用户id 用户id成员类型进度id上课状态创建时间匹配规则等于'
             ).get_by_placeholder('请选择').click()
             self.page.get_by_placeholder('请输入用户名字').fill(user_name)
-            self.page.get_by_role('button', name='图标: search 查询').click()
+            self.page.get_by_label('成员查询').get_by_role(
+                'button', name='图标: search 查询'
+            ).click()
             self.page.get_by_label('成员查询').get_by_role(
                 'cell', name=user_name
             ).click()
             self.page.get_by_role('button', name='确 定').click()
 
-            self.page.get_by_role('button', name='查 询').click()
+            self.wait.reload(
+                self.page.get_by_role('button', name='查 询'),
+                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 查询',
+            )
             self.page.get_by_role('button', name='Close').click()
 
             self.page.get_by_text('编辑').nth(1).click()
 
-            self.page.wait_for_timeout(1000)
-            self.page.get_by_role('combobox').filter(has_text='请选择上课状态').click()
-            self.page.get_by_role('option', name=state, exact=True).locator(
-                'span'
-            ).click()
-            self.page.get_by_role('button', name='确 定').click()
-            self.page.wait_for_load_state('networkidle')
-            logger.info(
-                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 班级状态设置为{state}'
+            self._save_user_state(
+                course_code, the_progress_of_the_curriculum, user_name, state
             )
         except PWTimeout:
-            raise BizError(
+            self.router.leave()
+            raise StepTimeout(
                 f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 班级状态设置失败'
             )
+        except Exception:
+            self.router.leave()
+            raise
+
+    @traced()
+    @validate_call
+    def set_users_state(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        user_names: list[str],
+        state: ALLOWED_USER_STATE,
+        on_done: Callable[[str], None] | None = None,
+    ) -> None:
+        """
+        按课程进度查询一次，批量设置学生状态
+        每设置完一个学生调用一次 on_done(学生)
+        """
+        if not user_names:
+            return
+        try:
+            self.to_management('课程进度人员')
+            with self._progress_filter(course_code, the_progress_of_the_curriculum):
+                missing = self._edit_rows(
+                    user_names,
+                    lambda user_name: self._save_user_state(
+                        course_code, the_progress_of_the_curriculum, user_name, state
+                    ),
+                    on_done,
+                )
+        except PWTimeout:
+            self.router.leave()
+            raise StepTimeout(
+                f'{course_code}-{the_progress_of_the_curriculum} 批量设置班级状态失败'
+            )
+        except Exception:
+            self.router.leave()
+            raise
+        if missing:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum} 班级中没有找到: {", ".join(missing)}'
+            )
 
     # 增加已经完成的学生
     def set_users_over(
@@ -241,14 +496,15 @@ class CourseManagement:
         course_code: str,
         the_progress_of_the_curriculum: str,
         user_names: list[str],
+        on_done: Callable[[str], None] | None = None,
     ) -> None:
-        for user_name in user_names:
-            self.set_user_state(
-                course_code,
-                the_progress_of_the_curriculum,
-                user_name,
-                '完成课程',
-            )
+        self.set_users_state(
+            course_code,
+            the_progress_of_the_curriculum,
+            user_names,
+            '完成课程',
+            on_done,
+        )
 
     # 增加请假的学生
     def set_users_leave(
@@ -256,15 +512,17 @@ class CourseManagement:
         course_code: str,
         the_progress_of_the_curriculum: str,
         user_names: list[str],
+        on_done: Callable[[str], None] | None = None,
     ) -> None:
-        for user_name in user_names:
-            self.set_user_state(
-                course_code,
-                the_progress_of_the_curriculum,
-                user_name,
-                '请假',
-            )
+        self.set_users_state(
+            course_code,
+            the_progress_of_the_curriculum,
+            user_names,
+            '请假',
+            on_done,
+        )
 
+    @traced()
     def add_discuss(
         self,
         course_code: str,
@@ -273,36 +531,53 @@ class CourseManagement:
         """批量增加班级人员课评"""
         try:
             self.to_management('课后反馈中心')
-            self.page.get_by_role('button', name='图标: plus 批量新增').click()
-            self.page.get_by_placeholder('请选择').click()
-            self.page.get_by_placeholder('请输入课程编码').fill(course_code)
-            self.page.get_by_placeholder('请输入课程进度').fill(
-                the_progress_of_the_curriculum
+            self._add_batch(
+                course_code,
+                the_progress_of_the_curriculum,
+                f'{course_code}-{the_progress_of_the_curriculum} 保存班级课评',
             )
-            self.page.get_by_role('button', name='图标: search 查询').click()
-
-            self.page.get_by_label('课程进度').get_by_role(
-                'cell', name=course_code
-            ).click()
-            self.page.get_by_label('课程进度').get_by_role(
-                'button', name='确 定'
-            ).click()
-            self.page.get_by_role('button', name='确 定').click()
-            self.page.wait_for_load_state('networkidle')
             logger.info(
                 f'{course_code}-{the_progress_of_the_curriculum} 班级人员课评添加成功'
             )
         except PWTimeout:
-            raise BizError(
+            self.router.leave()
+            raise StepTimeout(
                 f'{course_code}-{the_progress_of_the_curriculum} 班级人员课评添加失败'
             )
+        except Exception:
+            self.router.leave()
+            raise
 
-    ALLOWED_DISCUSS_STATE = Literal[
-        '请选择',
-        '审核中（未发送）',
-        '无效',
-    ]
+    ALLOWED_DISCUSS_STATE = DiscussState
+
+    @traced('save_discuss')
+    def _save_discuss(
+        self,
+        course_code: str,
+        the_progress_of_the_curriculum: str,
+        course_content: str,
+        discuss_content: str,
+        user_name: str,
+        state: str,
+    ) -> None:
+        """在已打开的编辑弹窗中填写课评并保存"""
+        self.page.get_by_role('textbox', name='请输入课后评价').fill(discuss_content)
+
+        self.page.get_by_role('combobox').filter(has_text='请选择状态').click()
+
+        self.page.get_by_role('option', name=state, exact=True).locator('span').click()
+
+        self.page.get_by_role('textbox', name='请输入标题').fill(course_content)
 
+        self.wait.save(
+            self.page.get_by_role('button', name='确 定'),
+            f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 保存课评',
+        )
+        logger.info(
+            f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 课评状态设置{state}'
+        )
+
+    @traced()
     @validate_call
     def set_user_state_discuss(
         self,
@@ -314,28 +589,21 @@ class CourseManagement:
         state: ALLOWED_DISCUSS_STATE,
     ) -> None:
         """设置人员课评状态"""
+        if (course_code, the_progress_of_the_curriculum) in self.resolver:
+            self.set_user_state_discusses(
+                course_code,
+                the_progress_of_the_curriculum,
+                course_content,
+                [discuss_content],
+                [user_name],
+                state,
+            )
+            return
         try:
             self.to_management('课后反馈中心')
 
             # 查找当前班的人
-            self.page.get_by_role('button', name='图标: filter 高级查询').click()
-
-            self.page.locator('div').filter(
-                has_text=re.compile(r'^选择查询字段$')
-            ).locator('svg').click()
-
-            self.page.get_by_title('进度id').click()
-            self.page.get_by_placeholder('请选择').click()
-            self.page.get_by_placeholder('请输入课程编码').fill(course_code)
-            self.page.get_by_placeholder('请输入课程进度').fill(
-                the_progress_of_the_curriculum
-            )
-
-            self.page.get_by_role('button', name='图标: search 查询').click()
-            self.page.get_by_label('课程进度').get_by_role(
-                'cell', name=course_code
-            ).click()
-            self.page.get_by_role('button', name='确 定').click()
+            self._open_progress_query(course_code, the_progress_of_the_curriculum)
 
             self.page.get_by_role(
                 'button',
@@ -351,39 +619,40 @@ class CourseManagement:
                 has_text='人员名称 课后评价进度id状态人员名称标题课堂表现等级创建时间匹配规则等于'
             ).get_by_placeholder('请选择').click()
             self.page.get_by_placeholder('请输入用户名字').fill(user_name)
-            self.page.get_by_role('button', name='图标: search 查询').click()
+            self.page.get_by_label('成员查询').get_by_role(
+                'button', name='图标: search 查询'
+            ).click()
             self.page.get_by_label('成员查询').get_by_role(
                 'cell', name=user_name
             ).click()
             self.page.get_by_role('button', name='确 定').click()
 
-            self.page.get_by_role('button', name='查 询').click()
+            self.wait.reload(
+                self.page.get_by_role('button', name='查 询'),
+                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 查询',
+            )
             self.page.get_by_role('button', name='Close').click()
 
             self.page.get_by_text('编辑').nth(1).click()
 
-            self.page.get_by_role('textbox', name='请输入课后评价').fill(
-                discuss_content
-            )
-
-            self.page.get_by_role('combobox').filter(has_text='请选择状态').click()
-
-            self.page.get_by_role('option', name=state, exact=True).locator(
-                'span'
-            ).click()
-
-            self.page.get_by_role('textbox', name='请输入标题').fill(course_content)
-
-            self.page.get_by_role('button', name='确 定').click()
-            self.page.wait_for_load_state('networkidle')
-            logger.info(
-                f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 课评状态设置{state}'
+            self._save_discuss(
+                course_code,
+                the_progress_of_the_curriculum,
+                course_content,
+                discuss_content,
+                user_name,
+                state,
             )
         except PWTimeout:
-            raise BizError(
+            self.router.leave()
+            raise StepTimeout(
                 f'{course_code}-{the_progress_of_the_curriculum}-{user_name} 课评状态设置失败'
             )
+        except Exception:
+            self.router.leave()
+            raise
 
+    @traced()
     @validate_call
     def set_user_state_discusses(
         self,
@@ -393,16 +662,42 @@ class CourseManagement:
         discuss_contents: list[str],
         user_names: list[str],
         state: ALLOWED_DISCUSS_STATE,
+        on_done: Callable[[str], None] | None = None,
     ) -> None:
+        """
+        按课程进度查询一次，批量填写课评
+        每填写完一个学生调用一次 on_done(学生)
+        """
         if len(user_names) != len(discuss_contents):
             raise ValueError('用户和课评对不上')
+        if not user_names:
+            return
 
-        for user_name, discuss_content in zip(user_names, discuss_contents):
-            self.set_user_state_discuss(
-                course_code,
-                the_progress_of_the_curriculum,
-                course_content,
-                discuss_content,
-                user_name,
-                state,
+        contents = dict(zip(user_names, discuss_contents))
+        try:
+            self.to_management('课后反馈中心')
+            with self._progress_filter(course_code, the_progress_of_the_curriculum):
+                missing = self._edit_rows(
+                    user_names,
+                    lambda user_name: self._save_discuss(
+                        course_code,
+                        the_progress_of_the_curriculum,
+                        course_content,
+                        contents[user_name],
+                        user_name,
+                        state,
+                    ),
+                    on_done,
+                )
+        except PWTimeout:
+            self.router.leave()
+            raise StepTimeout(
+                f'{course_code}-{the_progress_of_the_curriculum} 批量设置课评失败'
+            )
+        except Exception:
+            self.router.leave()
+            raise
+        if missing:
+            raise BizError(
+                f'{course_code}-{the_progress_of_the_curriculum} 课评中没有找到: {", ".join(missing)}'
             )
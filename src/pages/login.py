@@ -1,9 +1,16 @@
-from pathlib import Path
+import re
 from playwright.sync_api import Page, TimeoutError as PWTimeout
 
-from config import BASE_URL
+from config import (
+    BASE_URL,
+    CAPTCHA_MIN_CONFIDENCE,
+    CAPTCHA_REFRESH_TIMES,
+    MANAGER_URL,
+)
 from err import LoginExpired, RetryableError
-from utils import recognize_captcha, retry, logging
+from utils import recognize_captcha, retry, logging, span, traced
+
+from .waits import Waiter
 
 logger = logging.getLogger('login_bot')
 
@@ -11,8 +18,22 @@ logger = logging.getLogger('login_bot')
 class LoginPage:
     def __init__(self, page: Page) -> None:
         self.page = page
+        self.wait = Waiter(page)
+
+    @traced('check_session')
+    def is_session_valid(self) -> bool:
+        """访问首页判断当前登录态是否仍然有效"""
+        try:
+            self.page.goto(MANAGER_URL, timeout=30_000)
+            self.page.locator('div').filter(
+                has_text=re.compile(r'^课程管理$')
+            ).wait_for(timeout=5000)
+        except PWTimeout:
+            return False
+        return True
 
     # 登录主流程
+    @traced('login')
     @retry(max_times=3, on_errors=(RetryableError, PWTimeout))
     def login(self, username: str, password: str) -> None:
         try:
@@ -20,16 +41,25 @@ class LoginPage:
         except PWTimeout as e:
             raise RetryableError('访问登录页超时') from e
 
-        # 获取并识别验证码
-        captcha_path = Path('captcha.png')
-        try:
-            self.page.get_by_role('tabpanel').get_by_role('img').screenshot(
-                path=captcha_path
+        # 获取并识别验证码，置信度低时换一张，不拿没把握的结果去登录
+        captcha = self.page.get_by_role('tabpanel').get_by_role('img')
+        for _ in range(CAPTCHA_REFRESH_TIMES):
+            try:
+                with span('captcha'):
+                    result = recognize_captcha(captcha.screenshot())
+            except Exception as e:
+                logger.warning(f'验证码识别失败: {e}')
+                raise RetryableError('验证码识别失败') from e
+            if result.confidence >= CAPTCHA_MIN_CONFIDENCE:
+                break
+            logger.info(
+                f'验证码 {result.text} 置信度 {result.confidence:.2f} 过低，刷新'
             )
-            code = recognize_captcha(captcha_path)
-        except Exception as e:
-            logger.warning(f'验证码识别失败: {e}')
-            raise RetryableError('验证码识别失败') from e
+            with self.page.expect_response(lambda r: 'randomImage' in r.url):
+                captcha.click()
+        else:
+            raise RetryableError('验证码置信度持续过低')
+        code = result.text
 
         # 填表并登录
         self.page.get_by_placeholder('请输入帐户名').fill(username)
@@ -37,8 +67,10 @@ class LoginPage:
         self.page.get_by_placeholder('请输入验证码').fill(code)
         self.page.get_by_role('button', name='确 定').click()
 
-        # 判断是否登录成功
-        self.page.wait_for_timeout(3000)
+        # 判断是否登录成功：进入首页出现菜单，或弹出登录失败提示
+        menu = self.page.locator('div').filter(has_text=re.compile(r'^课程管理$'))
+        failed = self.page.locator('.ant-notification-notice, .ant-message-error')
+        self.wait.visible(menu.or_(failed).first, '登录', replaced=3.0)
         if self.page.get_by_role('link', name='logoJeecg Boot').count():
             raise LoginExpired('登录失效，需重新登录')
 
@@ -0,0 +1,44 @@
+class Router:
+    """
+    记录页面当前所在的管理模块
+    第一次通过菜单进入某模块后记下它的直达地址，之后直接 goto
+    """
+
+    # 模块名 -> 直达地址，所有页面共享
+    routes: dict[str, str] = {}
+    # 已在目标模块、整次导航被省掉的次数
+    saved: int = 0
+    # 用直达地址代替菜单点击的次数
+    shortcuts: int = 0
+
+    def __init__(self) -> None:
+        self.location: str | None = None
+        self.url: str | None = None
+
+    def resolve(self, to_name: str, current_url: str) -> str | None:
+        """
+        返回到达目标模块需要的操作
+        '' 表示已在目标模块，None 表示需要走菜单，其余为直达地址
+        """
+        if self.location == to_name and current_url == self.url:
+            Router.saved += 1
+            return ''
+        url = self.routes.get(to_name)
+        if url:
+            Router.shortcuts += 1
+        return url
+
+    def arrive(self, to_name: str, url: str) -> None:
+        """到达某模块且页面处于干净状态"""
+        self.routes.setdefault(to_name, url)
+        self.location = to_name
+        self.url = url
+
+    def leave(self) -> None:
+        """页面上有筛选、弹窗等残留状态，下次必须重新进入"""
+        self.location = None
+        self.url = None
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'省去导航 {cls.saved} 次，直达地址代替菜单 {cls.shortcuts} 次'
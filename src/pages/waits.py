@@ -0,0 +1,117 @@
+import json
+import re
+import time
+from urllib.parse import urlsplit
+
+from playwright.sync_api import Locator, Page, Response
+from playwright.sync_api import TimeoutError as PWTimeout
+
+from err import BizError
+from pacing import pacer
+from utils import logging, span
+
+logger = logging.getLogger('wait_bot')
+
+# JeecgBoot 保存类接口：add、edit、addBatch、saveXxx 等
+SAVE_API = re.compile(r'/(add|edit|save|batch)\w*$', re.I)
+LIST_API = re.compile(r'/list$')
+# 课程进度选择框查询用的列表接口
+PROGRESS_LIST_API = re.compile(r'/courseProgress/list$')
+# 页面上可见的弹窗
+OPEN_MODAL = '.ant-modal-wrap:visible'
+
+
+def is_save_response(response: Response) -> bool:
+    return response.request.method in ('POST', 'PUT') and bool(
+        SAVE_API.search(urlsplit(response.url).path)
+    )
+
+
+def is_list_response(response: Response) -> bool:
+    return response.request.method == 'GET' and bool(
+        LIST_API.search(urlsplit(response.url).path)
+    )
+
+
+def is_progress_list_response(response: Response) -> bool:
+    return response.request.method == 'GET' and is_progress_list_url(response.url)
+
+
+def is_list_url(url: str) -> bool:
+    return bool(LIST_API.search(urlsplit(url).path))
+
+
+def is_progress_list_url(url: str) -> bool:
+    return bool(PROGRESS_LIST_API.search(urlsplit(url).path))
+
+
+def check_result(body: bytes, step: str) -> None:
+    """JeecgBoot 接口返回 success=false 时直接报业务错误"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return
+    if isinstance(data, dict) and data.get('success') is False:
+        raise BizError(f'{step} 保存失败: {data.get("message")}')
+
+
+class Waiter:
+    """
+    按真实信号等待页面就绪：保存接口返回、弹窗关闭、列表刷新、元素出现
+    每一步记录耗时，替换固定等待时记录节省的时间
+    """
+
+    # 相比固定等待累计节省的秒数
+    saved: float = 0.0
+
+    def __init__(self, page: Page) -> None:
+        self.page = page
+
+    @classmethod
+    def _log(cls, step: str, start: float, replaced: float | None = None) -> None:
+        elapsed = time.perf_counter() - start
+        if replaced is None:
+            logger.info(f'{step} 就绪 {elapsed:.2f}s')
+            return
+        cls.saved += max(replaced - elapsed, 0)
+        logger.info(
+            f'{step} 就绪 {elapsed:.2f}s，较固定等待节省 {replaced - elapsed:.2f}s'
+        )
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'较固定等待共节省 {cls.saved:.1f}s'
+
+    def visible(
+        self, locator: Locator, step: str, replaced: float | None = None
+    ) -> None:
+        """等待元素出现"""
+        start = time.perf_counter()
+        with span('wait_visible', step=step):
+            locator.wait_for(state='visible')
+        self._log(step, start, replaced)
+
+    def save(self, button: Locator, step: str) -> None:
+        """点击保存，等待保存接口返回且弹窗全部关闭"""
+        pacer.wait()
+        start = time.perf_counter()
+        with span('wait_save', step=step):
+            try:
+                with self.page.expect_response(is_save_response) as info:
+                    button.click()
+                pacer.observe(time.perf_counter() - start)
+                check_result(info.value.body(), step)
+            except (BizError, PWTimeout):
+                pacer.error()
+                raise
+            # 超时抛 PWTimeout，页面方法据此转成可重试的 StepTimeout
+            self.page.locator(OPEN_MODAL).first.wait_for(state='hidden')
+        self._log(step, start)
+
+    def reload(self, trigger: Locator, step: str) -> None:
+        """点击查询、翻页等按钮，等待列表接口返回"""
+        start = time.perf_counter()
+        with span('wait_list', step=step):
+            with self.page.expect_response(is_list_response):
+                trigger.click()
+        self._log(step, start)
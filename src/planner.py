@@ -0,0 +1,170 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+from model import CourseModel
+
+# 每个步骤所在的管理模块，按原来单节课的执行顺序排列
+STEP_MODULES: dict[str, str] = {
+    'add_progress': '课程进度',
+    'add_members': '课程进度人员',
+    'set_users_over': '课程进度人员',
+    'set_users_leave': '课程进度人员',
+    'add_discuss': '课后反馈中心',
+    'set_user_state_discusses': '课后反馈中心',
+}
+
+# 同一节课内步骤之间的依赖
+STEP_DEPS: dict[str, tuple[str, ...]] = {
+    'add_progress': (),
+    'add_members': ('add_progress',),
+    'set_users_over': ('add_members',),
+    'set_users_leave': ('add_members',),
+    'add_discuss': ('add_members',),
+    'set_user_state_discusses': ('add_discuss',),
+}
+
+# 会在页面上留下筛选条件的步骤，之后即使同模块也要重新进入
+DIRTY_STEPS = {'set_users_over', 'set_users_leave', 'set_user_state_discusses'}
+
+
+@dataclass(eq=False)
+class Operation:
+    id: int
+    step: str
+    course: CourseModel
+    deps: list['Operation'] = field(default_factory=list)
+    # 只处理其中这些学生，None 表示全部
+    users: list[str] | None = None
+
+    @property
+    def module(self) -> str:
+        return STEP_MODULES[self.step]
+
+    @property
+    def key(self) -> str:
+        return f'{self.course.code}-{self.course.progress}'
+
+    def __repr__(self) -> str:
+        return f'Operation({self.id}, {self.step}, {self.key})'
+
+
+def _has_work(step: str, course: CourseModel) -> bool:
+    if step == 'set_users_over':
+        return bool(course.users_over)
+    if step == 'set_users_leave':
+        return bool(course.users_leave)
+    if step == 'set_user_state_discusses':
+        return bool(course.users_over or course.discuss_content)
+    return True
+
+
+def build_graph(
+    courses: list[CourseModel],
+    changes: dict[str, dict[str, list[str] | None]] | None = None,
+) -> list[Operation]:
+    """
+    把全部课程编译成操作依赖图，按课程顺序返回
+    changes 为 {课程编号-课程进度: {步骤: 学生或 None}} 时只生成其中的步骤，
+    缺少的课程视为无需处理
+    """
+    ops: list[Operation] = []
+    for course in courses:
+        by_step: dict[str, Operation] = {}
+        steps = None
+        if changes is not None:
+            steps = changes.get(f'{course.code}-{course.progress}', {})
+        for step in STEP_MODULES:
+            if not _has_work(step, course) or (steps is not None and step not in steps):
+                continue
+            op = Operation(len(ops), step, course, users=steps[step] if steps else None)
+            for dep in STEP_DEPS[step]:
+                # 被省略的依赖步骤向上追溯
+                while dep not in by_step and STEP_DEPS[dep]:
+                    dep = STEP_DEPS[dep][0]
+                if dep in by_step:
+                    op.deps.append(by_step[dep])
+            by_step[step] = op
+            ops.append(op)
+    return ops
+
+
+def schedule(ops: list[Operation]) -> list[Operation]:
+    """
+    拓扑排序，尽量把同一模块的操作排在一起
+    当前模块没有可执行的操作时，切换到可执行操作最多的模块
+    """
+    order = list(STEP_MODULES)
+    remaining = {op.id: len(op.deps) for op in ops}
+    dependents: dict[int, list[Operation]] = {op.id: [] for op in ops}
+    for op in ops:
+        for dep in op.deps:
+            dependents[dep.id].append(op)
+
+    ready = [op for op in ops if not op.deps]
+    plan: list[Operation] = []
+    module: str | None = None
+    while ready:
+        same = [op for op in ready if op.module == module]
+        if not same:
+            counts: dict[str, int] = {}
+            for op in ready:
+                counts[op.module] = counts.get(op.module, 0) + 1
+            module = max(
+                counts,
+                key=lambda m: (
+                    counts[m],
+                    -min(order.index(op.step) for op in ready if op.module == m),
+                ),
+            )
+            same = [op for op in ready if op.module == module]
+        # 同模块内按步骤顺序、再按课程顺序执行
+        op = min(same, key=lambda o: (order.index(o.step), o.id))
+        ready.remove(op)
+        plan.append(op)
+        for child in dependents[op.id]:
+            remaining[child.id] -= 1
+            if not remaining[child.id]:
+                ready.append(child)
+
+    if len(plan) != len(ops):
+        raise ValueError('操作依赖存在环')
+    return plan
+
+
+def build_plan(courses: list[CourseModel]) -> list[Operation]:
+    return schedule(build_graph(courses))
+
+
+def backfill_courses(
+    courses: list[CourseModel], start: date, end: date
+) -> list[CourseModel]:
+    """
+    补录 start 到 end（含）之间的课程，按上课时间排序
+    多天的课程合成一份计划，同一模块的操作跨天排在一起
+    """
+    selected = [c for c in courses if start <= c.span()[0].date() <= end]
+    return sorted(selected, key=lambda c: c.span())
+
+
+def count_navigations(ops: list[Operation]) -> int:
+    """估算按该顺序执行需要进入模块的次数"""
+    count = 0
+    module: str | None = None
+    dirty = False
+    for op in ops:
+        if op.module != module or dirty:
+            count += 1
+        module = op.module
+        dirty = op.step in DIRTY_STEPS
+    return count
+
+
+def count_navigations_per_course(ops: list[Operation]) -> int:
+    """原来逐节课执行、每节课新开页面时进入模块的次数"""
+    by_course: dict[str, list[Operation]] = {}
+    for op in ops:
+        by_course.setdefault(op.key, []).append(op)
+    return sum(
+        count_navigations(sorted(group, key=lambda o: o.id))
+        for group in by_course.values()
+    )
@@ -0,0 +1,108 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Iterator
+
+from playwright.sync_api import sync_playwright
+
+from context_pool import ContextPool
+from err import BizError, LoginExpired
+from journal import Journal
+from planner import Operation
+from session import new_context
+from utils import logging
+from workflow import run_op
+
+logger = logging.getLogger('pool_bot')
+
+
+@contextmanager
+def browser_manager(
+    storage_state: dict, launch_options: dict, context_options: dict
+) -> Iterator[ContextPool]:
+    """
+    一个 worker 线程用的 ContextPool，按课程数和 JS 堆回收 context
+    Playwright 同步 API 的对象只能在创建它的线程里使用，每个线程启动自己的浏览器，
+    用同一份登录态新建 context
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(**launch_options)
+        try:
+            context = new_context(browser, context_options, storage_state)
+            pool = ContextPool(browser, context_options, context)
+            try:
+                yield pool
+            finally:
+                pool.close()
+        finally:
+            browser.close()
+
+
+def run_pool(
+    plan: list[Operation],
+    concurrency: int,
+    open_manager: Callable[[], ContextManager[ContextPool]],
+    journal: Journal | None = None,
+) -> dict[str, Exception | None]:
+    """
+    用 concurrency 个线程并发执行计划，每个线程通过 open_manager 拿到自己的 ContextPool，
+    每个操作后由它检查是否回收 context
+    各线程按计划顺序领取操作，依赖的操作完成后才开始；单节课失败只跳过它自己的后续操作，
+    登录失效时所有线程停止领取，等手上的操作结束后抛出
+    返回 {课程编号-课程进度: 异常或 None}
+    """
+    results: dict[str, Exception | None] = {}
+    finished = {op.id: threading.Event() for op in plan}
+    ops: queue.SimpleQueue[Operation] = queue.SimpleQueue()
+    for op in plan:
+        ops.put(op)
+    expired: list[LoginExpired] = []
+
+    def work(manager: ContextPool) -> None:
+        while not expired:
+            try:
+                op = ops.get_nowait()
+            except queue.Empty:
+                return
+            # 计划是拓扑序，依赖一定已被其它线程领取
+            for dep in op.deps:
+                finished[dep.id].wait()
+            if results.get(op.key) is not None:
+                finished[op.id].set()
+                continue
+            error: Exception | None = None
+            try:
+                run_op(manager, op, journal)
+                results.setdefault(op.key, None)
+            except LoginExpired as e:
+                expired.append(e)
+            except Exception as e:
+                logger.error(f'{op.key} {op.step} 失败: {e}')
+                results[op.key] = error = e
+            finally:
+                finished[op.id].set()
+            manager.op_done(op, error)
+
+    def worker() -> None:
+        try:
+            with open_manager() as manager:
+                work(manager)
+        except Exception:
+            logger.exception('worker 线程启动或退出时出错')
+
+    threads = [
+        threading.Thread(target=worker, name=f'pool-{i}')
+        for i in range(min(concurrency, len(plan)) or 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if expired:
+        raise expired[0]
+    # 所有线程都没能启动时，没领取的操作所属课程记为失败
+    for op in plan:
+        if not finished[op.id].is_set() and results.get(op.key) is None:
+            results[op.key] = BizError('没有可用的 worker 线程')
+    return results
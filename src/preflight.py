@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+
+from err import BizError
+from model import CourseModel
+
+courses_adapter = TypeAdapter(list[CourseModel])
+course_adapter = TypeAdapter(CourseModel)
+
+
+class PreflightError(BizError):
+    """课程数据校验不通过，errors 为全部错误"""
+
+    def __init__(self, errors: list[str]) -> None:
+        self.errors = errors
+        super().__init__(f'课程数据有 {len(errors)} 处错误:\n' + '\n'.join(errors))
+
+
+def _messages(error: ValidationError, where: str | None = None) -> list[str]:
+    """把校验错误转成「位置 字段: 原因」，where 为 None 时位置取自列表下标"""
+    messages = []
+    for e in error.errors():
+        loc = list(e['loc'])
+        prefix = where
+        if prefix is None and loc and isinstance(loc[0], int):
+            prefix = f'第 {loc.pop(0) + 1} 条'
+        field = '.'.join(str(part) for part in loc)
+        messages.append(
+            f'{prefix} {field}: {e["msg"]}' if field else f'{prefix}: {e["msg"]}'
+        )
+    return messages
+
+
+def _validate(path: Path) -> Iterator[tuple[str, CourseModel | None, list[str]]]:
+    """
+    逐条校验课程，返回 (位置, 课程或 None, 错误)
+    .jsonl 每行一节课，边读边校验；其它按 JSON 数组整体校验
+    """
+    if path.suffix == '.jsonl':
+        with path.open(encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                where = f'第 {number} 行'
+                try:
+                    yield where, course_adapter.validate_json(line), []
+                except ValidationError as e:
+                    yield where, None, _messages(e, where)
+        return
+    try:
+        courses = courses_adapter.validate_json(path.read_bytes())
+    except ValidationError as e:
+        yield path.name, None, _messages(e)
+        return
+    for index, course in enumerate(courses, 1):
+        yield f'第 {index} 条', course, []
+
+
+def _check(
+    records: Iterable[tuple[str, CourseModel | None, list[str]]],
+    keep: bool = True,
+) -> tuple[list[CourseModel], list[str]]:
+    """汇总全部错误并检查课程编号 + 课程进度不重复，keep 为 False 时不保留课程"""
+    courses: list[CourseModel] = []
+    errors: list[str] = []
+    seen: dict[tuple[str, str], str] = {}
+    for where, course, messages in records:
+        errors += messages
+        if course is None:
+            continue
+        key = (course.code, course.progress)
+        if key in seen:
+            errors.append(f'{where}: {course.code}-{course.progress} 与{seen[key]}重复')
+        else:
+            seen[key] = where
+        if keep:
+            courses.append(course)
+    return courses, errors
+
+
+def preflight(path: str | Path) -> list[str]:
+    """校验整个文件，返回全部错误；只保留课程编号和进度，不把课程读入内存"""
+    return _check(_validate(Path(path)), keep=False)[1]
+
+
+def load_courses(path: str | Path) -> list[CourseModel]:
+    """读入全部课程，有任何错误时一次性全部报出"""
+    courses, errors = _check(_validate(Path(path)))
+    if errors:
+        raise PreflightError(errors)
+    return courses
+
+
+def iter_courses(path: str | Path) -> Iterator[CourseModel]:
+    """逐条读出课程，.jsonl 不会整个读入内存；应先通过 preflight"""
+    for _, course, errors in _validate(Path(path)):
+        if errors:
+            raise PreflightError(errors)
+        yield course
+
+
+def parse_courses(data: bytes) -> list[CourseModel]:
+    """校验一段 JSON 数组格式的课程，供接口提交使用"""
+    try:
+        courses = courses_adapter.validate_json(data)
+    except ValidationError as e:
+        raise PreflightError(_messages(e))
+    _, errors = _check((f'第 {i} 条', c, []) for i, c in enumerate(courses, 1))
+    if errors:
+        raise PreflightError(errors)
+    return courses
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, fields
+
+from config import HEADLESS, LOCALE, PROFILE, PROFILES, VIEWPORT
+from err import BizError
+
+
+@dataclass(frozen=True)
+class RunProfile:
+    """一次运行的浏览器与节奏设置"""
+
+    name: str
+    headless: bool
+    # 每个浏览器动作之间的固定间隔（毫秒）
+    slow_mo: int
+    # 开始处理前打开 Playwright Inspector 等待人工确认
+    pause: bool
+    # 按服务器响应自适应节流
+    pacing: bool
+
+    def launch_options(self) -> dict:
+        return {'headless': self.headless, 'slow_mo': self.slow_mo}
+
+    def context_options(self) -> dict:
+        return {'viewport': VIEWPORT, 'locale': LOCALE}
+
+
+BUILTIN_PROFILES: dict[str, dict] = {
+    # 人工盯着跑：有界面（除非 [browser] 配置为无界面）、放慢、开始前暂停
+    'debug': {'headless': HEADLESS, 'slow_mo': 300, 'pause': True, 'pacing': False},
+    'fast': {'headless': True, 'slow_mo': 0, 'pause': False, 'pacing': True},
+}
+
+
+def load_profile(name: str | None = None) -> RunProfile:
+    """按名称取运行配置，未指定时用 [run].profile，config.toml 中的 [profiles.x] 覆盖内置值"""
+    name = name or PROFILE
+    if name not in BUILTIN_PROFILES and name not in PROFILES:
+        raise BizError(f'未知的运行配置 {name}')
+    base = BUILTIN_PROFILES.get(name, BUILTIN_PROFILES['debug'])
+    values = {**base, **PROFILES.get(name, {})}
+    unknown = set(values) - {f.name for f in fields(RunProfile)}
+    if unknown:
+        raise BizError(f'运行配置 {name} 中有未知字段: {", ".join(sorted(unknown))}')
+    return RunProfile(name=name, **values)
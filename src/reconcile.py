@@ -0,0 +1,66 @@
+from typing import Callable
+
+from model import CourseModel, ProgressState
+from planner import STEP_MODULES, Operation, build_graph, schedule
+from utils import logging
+
+logger = logging.getLogger('reconcile_bot')
+
+STATE_OVER = '完成课程'
+STATE_LEAVE = '请假'
+
+
+def diff_course(
+    course: CourseModel, state: ProgressState | None
+) -> dict[str, list[str] | None]:
+    """
+    对比一节课的期望与服务器上的现状
+    返回 {步骤: 需要处理的学生或 None(整步执行)}，没有差异时为空
+    """
+    if state is None:
+        return {step: None for step in STEP_MODULES}
+
+    changes: dict[str, list[str] | None] = {}
+    if not state.members:
+        changes['add_members'] = None
+    over = [u for u in course.users_over if state.members.get(u) != STATE_OVER]
+    if over:
+        changes['set_users_over'] = over
+    leave = [u for u in course.users_leave if state.members.get(u) != STATE_LEAVE]
+    if leave:
+        changes['set_users_leave'] = leave
+
+    if not state.discusses:
+        changes['add_discuss'] = None
+    contents = dict(zip(course.users_over, course.discuss_content))
+
+    def expected(user: str) -> dict[str, str]:
+        return {
+            'content': contents.get(user, ''),
+            'state': course.discuss_state,
+            'title': course.content,
+        }
+
+    discuss = [u for u in course.users_over if state.discusses.get(u) != expected(u)]
+    if discuss:
+        changes['set_user_state_discusses'] = discuss
+    return changes
+
+
+def reconcile_plan(
+    courses: list[CourseModel],
+    read: Callable[
+        [list[tuple[str, str]]], dict[tuple[str, str], ProgressState | None]
+    ],
+) -> list[Operation]:
+    """一次读取这批课程的现状，只为有差异的部分生成执行计划"""
+    states = read([(course.code, course.progress) for course in courses])
+    changes: dict[str, dict[str, list[str] | None]] = {}
+    for course in courses:
+        key = f'{course.code}-{course.progress}'
+        diff = diff_course(course, states[(course.code, course.progress)])
+        if diff:
+            changes[key] = diff
+            logger.info(f'{key} 需要处理: {", ".join(diff)}')
+    logger.info(f'{len(courses) - len(changes)} 节课与服务器一致，跳过')
+    return schedule(build_graph(courses, changes))
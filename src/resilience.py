@@ -0,0 +1,116 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from config import (
+    API_PREFIX,
+    BREAKER_COOLDOWN,
+    BREAKER_SLOW_SECONDS,
+    BREAKER_THRESHOLD,
+    RETRY_BACKOFF,
+    RETRY_MAX_BACKOFF,
+    RETRY_MAX_TIMES,
+    RETRY_STEPS,
+)
+from utils import logging
+
+logger = logging.getLogger('resilience_bot')
+
+
+@dataclass
+class RetryPolicy:
+    """单个步骤的重试参数"""
+
+    max_times: int = RETRY_MAX_TIMES
+    backoff: float = RETRY_BACKOFF
+    max_backoff: float = RETRY_MAX_BACKOFF
+
+    # 重试的次数、重试用尽后放弃的次数，所有步骤共享
+    retries = 0
+    gave_up = 0
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待秒数：指数退避，在后一半区间内随机抖动"""
+        base = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return base / 2 + random.uniform(0, base / 2)
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'步骤重试 {cls.retries} 次，重试用尽 {cls.gave_up} 次'
+
+
+def policy_for(step: str) -> RetryPolicy:
+    return RetryPolicy(**RETRY_STEPS.get(step, {}))
+
+
+class CircuitBreaker:
+    """
+    连续 threshold 次出错或响应过慢后断开 cooldown 秒，期间所有 worker 在步骤开始前等待，
+    避免网站已经出问题时继续堆积超时
+    """
+
+    # 断开的次数、因断开累计等待的秒数
+    opened = 0
+    paused = 0.0
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_THRESHOLD,
+        slow_seconds: float = BREAKER_SLOW_SECONDS,
+        cooldown: float = BREAKER_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record(self, ok: bool, seconds: float = 0) -> None:
+        """记录一次请求或步骤的结果，慢于 slow_seconds 也算失败"""
+        if ok and seconds <= self.slow_seconds:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.failures >= self.threshold and not self.remaining():
+            self.failures = 0
+            self.open_until = self.clock() + self.cooldown
+            CircuitBreaker.opened += 1
+            logger.warning(
+                f'连续 {self.threshold} 次出错或响应过慢，暂停 {self.cooldown:.0f}s'
+            )
+
+    def remaining(self) -> float:
+        return max(0.0, self.open_until - self.clock())
+
+    def wait(self) -> None:
+        """断开期间阻塞到恢复"""
+        while (seconds := self.remaining()) > 0:
+            CircuitBreaker.paused += seconds
+            time.sleep(seconds)
+
+    def _on_response(self, response) -> None:
+        if API_PREFIX not in response.url:
+            return
+        # responseStart 为发出请求到收到首字节的毫秒数
+        first_byte = response.request.timing.get('responseStart', 0)
+        self.record(response.status < 500, max(first_byte, 0) / 1000)
+
+    def _on_request_failed(self, request) -> None:
+        if API_PREFIX in request.url:
+            self.record(False)
+
+    def watch(self, page) -> None:
+        """用页面上的接口响应驱动断路器，同步、异步页面都适用"""
+        page.on('response', self._on_response)
+        page.on('requestfailed', self._on_request_failed)
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'断路器断开 {cls.opened} 次，累计暂停 {cls.paused:.0f}s'
+
+
+# 同一进程内的页面共享，一处断开所有 worker 一起暂停
+breaker = CircuitBreaker()
@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+from config import PROGRESS_CACHE
+
+
+class ProgressResolver:
+    """
+    课程编号 + 课程进度 -> 课程进度记录 id
+    第一次在选择框或接口中查到后记下，之后的步骤直接用 id 筛选，
+    设置了 path 时写入磁盘，下次运行继续使用；课程进度被删除重建后需删掉该文件
+    """
+
+    # 直接用缓存 id、省掉查询的次数
+    hits: int = 0
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else None
+        self.ids: dict[tuple[str, str], str] = {}
+        if self.path is not None and self.path.exists():
+            for code, progress, progress_id in json.loads(
+                self.path.read_text(encoding='utf-8')
+            ):
+                self.ids[(code, progress)] = progress_id
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        """只判断是否已知，不计入命中次数"""
+        return key in self.ids
+
+    def get(self, course_code: str, the_progress_of_the_curriculum: str) -> str | None:
+        progress_id = self.ids.get((course_code, the_progress_of_the_curriculum))
+        if progress_id is not None:
+            ProgressResolver.hits += 1
+        return progress_id
+
+    def put(
+        self, course_code: str, the_progress_of_the_curriculum: str, progress_id: str
+    ) -> None:
+        key = (course_code, the_progress_of_the_curriculum)
+        if self.ids.get(key) == progress_id:
+            return
+        self.ids[key] = progress_id
+        if self.path is not None:
+            self.path.write_text(
+                json.dumps(
+                    [[*key, value] for key, value in self.ids.items()],
+                    ensure_ascii=False,
+                ),
+                encoding='utf-8',
+            )
+
+    def capture(
+        self, course_code: str, the_progress_of_the_curriculum: str, data: dict
+    ) -> None:
+        """从课程进度列表接口的返回中记下 id，结果不唯一时不记"""
+        records = (data.get('result') or {}).get('records') or []
+        if len(records) == 1 and records[0].get('id'):
+            self.put(course_code, the_progress_of_the_curriculum, records[0]['id'])
+
+    @classmethod
+    def summary(cls) -> str:
+        return f'课程进度 id 缓存命中 {cls.hits} 次'
+
+
+progress_ids = ProgressResolver(PROGRESS_CACHE)
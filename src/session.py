@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from playwright.sync_api import Browser, BrowserContext
+
+from assets import install_routing
+from config import STORAGE_FILE
+from pages import LoginPage
+from utils import logging
+
+logger = logging.getLogger('session_bot')
+
+
+def new_context(
+    browser: Browser, context_options: dict, storage_state: Path | dict | None = None
+) -> BrowserContext:
+    """按统一的超时与请求拦截设置新建 context"""
+    context = browser.new_context(storage_state=storage_state, **context_options)
+    context.set_default_timeout(15000)
+    install_routing(context)
+    return context
+
+
+def open_logged_in_context(
+    browser: Browser,
+    context_options: dict,
+    username: str,
+    password: str,
+    storage_file: str = STORAGE_FILE,
+) -> BrowserContext:
+    """
+    返回已登录的 context
+    优先复用 storage_file 中保存的登录态，失效时才走完整登录并重新保存
+    """
+    storage = Path(storage_file)
+    if storage.exists():
+        context = new_context(browser, context_options, storage)
+        page = context.new_page()
+        valid = LoginPage(page).is_session_valid()
+        page.close()
+        if valid:
+            logger.info('复用已保存的登录态')
+            return context
+        logger.info('登录态已失效，重新登录')
+        context.close()
+
+    context = new_context(browser, context_options)
+    page = context.new_page()
+    LoginPage(page).login(username, password)
+    page.close()
+    context.storage_state(path=storage)
+    return context
@@ -0,0 +1,334 @@
+import multiprocessing
+import sqlite3
+import threading
+import time
+from typing import Iterable
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+from config import (
+    ACCOUNTS,
+    LEASE_SECONDS,
+    LOG_BACKUPS,
+    LOG_DIR,
+    LOG_JSON,
+    LOG_MAX_MB,
+    QUEUE_FILE,
+    STORAGE_FILE,
+    USER_NAME,
+    USER_PASSWORD,
+)
+from err import LoginExpired
+from model import CourseModel
+from utils import logging, setup_logging
+
+logger = logging.getLogger('shard_bot')
+
+
+class WorkQueue:
+    """
+    多进程共享的课程队列，存在 SQLite 中
+    worker 以租约方式领取课程，租约过期（worker 崩溃）后课程回到队列被其它 worker 领取
+    """
+
+    def __init__(self, path: str = QUEUE_FILE) -> None:
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS queue (
+                key TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                course TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )
+            """
+        )
+
+    def fill(self, courses: Iterable[CourseModel]) -> int:
+        """清空队列后逐条放入本次运行的全部课程，返回课程数"""
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.execute('DELETE FROM queue')
+            self.conn.executemany(
+                'INSERT INTO queue (key, position, course) VALUES (?, ?, ?)',
+                (
+                    (f'{c.code}-{c.progress}', i, c.model_dump_json())
+                    for i, c in enumerate(courses)
+                ),
+            )
+        return self.conn.execute('SELECT COUNT(*) FROM queue').fetchone()[0]
+
+    def lease(self, worker: str, seconds: float = LEASE_SECONDS) -> CourseModel | None:
+        """领取下一节待处理或租约已过期的课程，没有时返回 None"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute(
+                """
+                SELECT key, course FROM queue
+                WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                ORDER BY position LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                """
+                UPDATE queue SET status = 'leased', worker = ?, lease_until = ?,
+                    attempts = attempts + 1
+                WHERE key = ?
+                """,
+                (worker, now + seconds, row[0]),
+            )
+        return CourseModel.model_validate_json(row[1])
+
+    def renew(self, key: str, worker: str, seconds: float = LEASE_SECONDS) -> None:
+        self.conn.execute(
+            "UPDATE queue SET lease_until = ? WHERE key = ? AND worker = ? AND status = 'leased'",
+            (time.time() + seconds, key, worker),
+        )
+
+    def finish(self, key: str, worker: str, error: str | None = None) -> None:
+        self.conn.execute(
+            'UPDATE queue SET status = ?, error = ? WHERE key = ? AND worker = ?',
+            ('failed' if error else 'done', error, key, worker),
+        )
+
+    def release(self, key: str, worker: str) -> None:
+        """放弃租约，课程立即回到队列"""
+        self.conn.execute(
+            "UPDATE queue SET status = 'pending', worker = NULL WHERE key = ? AND worker = ?",
+            (key, worker),
+        )
+
+    def remaining(self) -> int:
+        """待处理和处理中的课程数"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM queue WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        return dict(
+            self.conn.execute('SELECT status, COUNT(*) FROM queue GROUP BY status')
+        )
+
+    def by_worker(self) -> list[tuple[str, str, int]]:
+        return self.conn.execute(
+            """
+            SELECT worker, status, COUNT(*) FROM queue
+            WHERE worker IS NOT NULL GROUP BY worker, status ORDER BY worker
+            """
+        ).fetchall()
+
+    def keys(self) -> list[str]:
+        return [
+            row[0]
+            for row in self.conn.execute('SELECT key FROM queue ORDER BY position')
+        ]
+
+    def failures(self) -> list[tuple[str, str]]:
+        """失败和没处理完的课程及原因"""
+        return self.conn.execute(
+            """
+            SELECT key, COALESCE(error, '未处理') FROM queue
+            WHERE status != 'done' ORDER BY position
+            """
+        ).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def account_of(index: int) -> tuple[str, str, str]:
+    """第 index 个 worker 使用的账号、密码和登录态文件"""
+    if not ACCOUNTS:
+        return USER_NAME, USER_PASSWORD, STORAGE_FILE
+    account = ACCOUNTS[index % len(ACCOUNTS)]
+    return (
+        account['username'],
+        account['password'],
+        f'storage-{account["username"]}.json',
+    )
+
+
+def login_accounts(workers: int, launch_options: dict, context_options: dict) -> None:
+    """
+    在主进程里给 worker 要用的每个账号登录一次并保存登录态
+    多个 worker 共用一个账号时，不会同时登录、同时写同一个登录态文件
+    """
+    from playwright.sync_api import sync_playwright
+
+    from session import open_logged_in_context
+
+    accounts = {account_of(i) for i in range(workers)}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(**launch_options)
+        for username, password, storage_file in accounts:
+            open_logged_in_context(
+                browser, context_options, username, password, storage_file
+            ).close()
+        browser.close()
+
+
+def _heartbeat(key: str, worker: str, stop: threading.Event) -> None:
+    """课程处理期间定期续租"""
+    queue = WorkQueue()
+    try:
+        while not stop.wait(LEASE_SECONDS / 3):
+            queue.renew(key, worker)
+    finally:
+        queue.close()
+
+
+def _next(queue: WorkQueue, worker: str) -> CourseModel | None:
+    """
+    领取下一节课；其它 worker 手上还有课时等待，
+    它们崩溃后租约过期的课程可以被接手
+    """
+    while True:
+        course = queue.lease(worker)
+        if course is not None or not queue.remaining():
+            return course
+        time.sleep(5)
+
+
+def worker_main(
+    index: int,
+    launch_options: dict,
+    context_options: dict,
+    use_journal: bool,
+    pacing: bool = False,
+) -> None:
+    """
+    worker 进程入口：独立浏览器，循环领取课程直到队列处理完
+    只读取主进程保存的登录态，不自己登录；登录失效时退出，重跑即可继续
+    """
+    from pathlib import Path
+
+    from playwright.sync_api import sync_playwright
+
+    from context_pool import ContextPool
+    from journal import Journal
+    from pacing import Pacer, pacer
+    from planner import build_plan
+    from resilience import CircuitBreaker, RetryPolicy
+    from session import new_context
+    from workflow import run_plan
+
+    pacer.enabled = pacing
+    name = f'worker-{index}'
+    # 子进程里没有主进程的写日志线程，各写各的文件，轮转时互不影响
+    setup_logging(
+        LOG_DIR, f'app-{name}', LOG_JSON, int(LOG_MAX_MB * 2**20), LOG_BACKUPS
+    )
+    storage_file = account_of(index)[2]
+    queue = WorkQueue()
+    journal = Journal() if use_journal else None
+    with sync_playwright() as p:
+        browser = p.chromium.launch(**launch_options)
+        context = new_context(browser, context_options, Path(storage_file))
+        pool = ContextPool(browser, context_options, context)
+        while (course := _next(queue, name)) is not None:
+            key = f'{course.code}-{course.progress}'
+            stop = threading.Event()
+            threading.Thread(
+                target=_heartbeat, args=(key, name, stop), daemon=True
+            ).start()
+            try:
+                results = run_plan(
+                    pool, build_plan([course]), journal, on_op=pool.op_done
+                )
+            except LoginExpired:
+                queue.release(key, name)
+                raise
+            finally:
+                stop.set()
+            error = results.get(key)
+            queue.finish(key, name, str(error) if error else None)
+        pool.close()
+        browser.close()
+    if journal is not None:
+        journal.close()
+    queue.close()
+    logger.info(
+        f'{name} {RetryPolicy.summary()}，{CircuitBreaker.summary()}，'
+        f'{Pacer.summary()}，{ContextPool.summary()}'
+    )
+
+
+def _progress_table(queue: WorkQueue, total: int, started: float) -> Table:
+    counts = queue.counts()
+    finished = counts.get('done', 0) + counts.get('failed', 0)
+    elapsed = time.time() - started
+    table = Table(
+        'worker',
+        '完成',
+        '失败',
+        '处理中',
+        title=(
+            f'{finished}/{total} 节课，失败 {counts.get("failed", 0)}，'
+            f'{finished / elapsed * 60 if elapsed else 0:.1f} 节/分钟'
+        ),
+    )
+    rows: dict[str, dict[str, int]] = {}
+    for worker, status, count in queue.by_worker():
+        rows.setdefault(worker, {})[status] = count
+    for worker, row in rows.items():
+        table.add_row(
+            worker,
+            str(row.get('done', 0)),
+            str(row.get('failed', 0)),
+            str(row.get('leased', 0)),
+        )
+    return table
+
+
+def run_sharded(
+    courses: Iterable[CourseModel],
+    workers: int,
+    launch_options: dict,
+    context_options: dict,
+    use_journal: bool = True,
+    pacing: bool = False,
+) -> list[tuple[str, str]]:
+    """
+    启动 workers 个进程分片处理全部课程，实时汇总进度
+    返回失败或未处理的 (课程编号-课程进度, 原因)
+    """
+    queue = WorkQueue()
+    total = queue.fill(courses)
+    login_accounts(workers, launch_options, context_options)
+    processes = [
+        multiprocessing.Process(
+            target=worker_main,
+            args=(i, launch_options, context_options, use_journal, pacing),
+            name=f'worker-{i}',
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    started = time.time()
+    with Live(_progress_table(queue, total, started), console=Console()) as live:
+        while any(process.is_alive() for process in processes):
+            time.sleep(1)
+            live.update(_progress_table(queue, total, started))
+        live.update(_progress_table(queue, total, started))
+
+    for process in processes:
+        if process.exitcode:
+            logger.error(f'{process.name} 异常退出，退出码 {process.exitcode}')
+    unfinished = queue.remaining()
+    if unfinished:
+        logger.error(f'所有 worker 已退出，仍有 {unfinished} 节课未处理，重跑即可继续')
+    failures = queue.failures()
+    queue.close()
+    return failures
@@ -1,42 +1,13 @@
 import functools
 from datetime import datetime
-import ddddocr
 import logging
-import sys
-from pathlib import Path
 from err import RetryableError
+from .captcha import CaptchaResult, prewarm_captcha, recognize_captcha
+from .logs import log_context, setup_logging, stop_logging
+from .trace import span, traced, tracer
 import time
 
-_ocr = ddddocr.DdddOcr(show_ad=False)
-
-
-LOG_DIR = Path('logs')
-LOG_DIR.mkdir(exist_ok=True)
-
-ARCHIVE_LIMIT = 3
-ARCHIVE_FMT = 'app-%Y%m%d-%H%M%S.log'
-
-current_log = LOG_DIR / 'app.log'
-if current_log.exists():
-    archive_name = datetime.now().strftime(ARCHIVE_FMT)
-    current_log.rename(LOG_DIR / archive_name)
-
-archives = sorted(
-    LOG_DIR.glob('app-*.log'), key=lambda p: p.stat().st_mtime, reverse=True
-)
-for old in archives[ARCHIVE_LIMIT:]:
-    old.unlink()
-
-current_log.touch()
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(name)s | %(message)s',
-    handlers=[
-        logging.FileHandler(current_log, encoding='utf-8'),
-        logging.StreamHandler(sys.stdout),
-    ],
-)
+TIME_FMT = '%Y-%m-%d %H:%M:%S'
 
 logger = logging.getLogger('jeecg_bot')
 
@@ -86,13 +57,14 @@ def format_time_with_today(hour: int) -> str:
 
     today_with_hour = datetime(now.year, now.month, now.day, hour)
 
-    return today_with_hour.strftime('%Y-%m-%d %H:%M:%S')
+    return today_with_hour.strftime(TIME_FMT)
 
 
-def recognize_captcha(path: str) -> str:
-    with open(path, 'rb') as f:
-        img_bytes = f.read()
-    text = _ocr.classification(img_bytes)
-    if not text:  # 识别为空
-        return input(f'识别为空，请人工输入 {path} 中的验证码：')
-    return text
+def format_course_time(value: int | datetime) -> str:
+    """
+    课程时间转成页面和接口使用的格式
+    只给小时时落在当天
+    """
+    if isinstance(value, datetime):
+        return value.strftime(TIME_FMT)
+    return format_time_with_today(value)
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+
+@dataclass
+class CaptchaResult:
+    text: str
+    confidence: float
+
+
+_ocr = None
+_lock = threading.Lock()
+_executor: ProcessPoolExecutor | None = None
+
+
+def _engine():
+    """首次使用时才加载 OCR 模型"""
+    global _ocr
+    with _lock:
+        if _ocr is None:
+            import ddddocr
+
+            _ocr = ddddocr.DdddOcr(show_ad=False)
+    return _ocr
+
+
+def _classify(img_bytes: bytes) -> CaptchaResult:
+    result = _engine().classification(img_bytes, probability=True)
+    if 'confidence' in result:
+        return CaptchaResult(result['text'], float(result['confidence']))
+
+    # ddddocr 1.5.x 只给出每一步的概率分布，按 CTC 规则自行解码
+    charsets = result['charsets']
+    text = ''
+    confidences = []
+    last = None
+    for row in result['probability']:
+        index = max(range(len(row)), key=row.__getitem__)
+        confidences.append(row[index])
+        if index != last and charsets[index]:
+            text += charsets[index]
+        last = index
+    confidence = sum(confidences) / len(confidences) if confidences else 0.0
+    return CaptchaResult(text, confidence)
+
+
+def prewarm_captcha(mode: str = 'thread') -> None:
+    """
+    提前加载 OCR 模型
+    thread：后台线程加载到当前进程
+    process：启动独立的识别进程，之后的识别都交给它
+    """
+    global _executor
+    if mode == 'process':
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=1, initializer=_engine)
+            _executor.submit(int)
+    elif mode == 'thread':
+        threading.Thread(target=_engine, daemon=True).start()
+
+
+def recognize_captcha(img_bytes: bytes) -> CaptchaResult:
+    """识别验证码图片字节，返回文字和置信度"""
+    if _executor is not None:
+        return _executor.submit(_classify, img_bytes).result()
+    return _classify(img_bytes)
@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(name)s | %(message)s'
+# 日志里可以按这些字段筛选
+FIELDS = ('code', 'progress', 'user', 'step')
+
+_fields: ContextVar[dict[str, str]] = ContextVar('log_fields', default={})
+_listener: QueueListener | None = None
+_handler: QueueHandler | None = None
+
+
+@contextmanager
+def log_context(**fields: str):
+    """这段代码里打的日志都带上课程编号、课程进度、学生、步骤等字段，可嵌套"""
+    token = _fields.set({**_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _fields.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """在打日志的线程里取出 log_context 的字段，写线程里已拿不到"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = _fields.get()
+        for name in FIELDS:
+            setattr(record, name, fields.get(name, ''))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志一行 JSON，空字段不写；异常堆栈已在入队时并入 message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(
+                timespec='milliseconds'
+            ),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(
+            (name, getattr(record, name))
+            for name in FIELDS
+            if getattr(record, name, '')
+        )
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_logging(
+    log_dir: str | Path = 'logs',
+    name: str = 'app',
+    json_lines: bool = False,
+    max_bytes: int = 10 * 2**20,
+    backups: int = 3,
+    level: int = logging.INFO,
+) -> Path:
+    """
+    由入口调用：业务线程只把日志放进队列，由后台线程写文件和控制台
+    文件超过 max_bytes 后轮转，保留 backups 份；json_lines 为 True 时写 .jsonl
+    多进程时每个进程用不同的 name，避免同时轮转同一个文件
+    重复调用时先停掉上一次的配置，返回日志文件路径
+    """
+    global _listener, _handler
+    stop_logging()
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    path = log_dir / f'{name}.jsonl' if json_lines else log_dir / f'{name}.log'
+
+    file_handler = RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+    )
+    file_handler.setFormatter(
+        JsonFormatter() if json_lines else logging.Formatter(TEXT_FORMAT)
+    )
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _handler = QueueHandler(records)
+    _handler.addFilter(ContextFilter())
+    _listener = QueueListener(records, file_handler, console)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_handler)
+    _listener.start()
+    return path
+
+
+def stop_logging() -> None:
+    """写完队列里剩下的日志并关闭文件"""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
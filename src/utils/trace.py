@@ -0,0 +1,172 @@
+import functools
+import inspect
+import json
+import statistics
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+_NOOP = nullcontext()
+# 当前所在的 span，用于记录父子关系并继承课程
+_current: ContextVar[dict | None] = ContextVar('current_span', default=None)
+
+
+class Tracer:
+    """
+    轻量的分段计时
+    未启用时 span() 直接返回空上下文，几乎没有开销
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: list[dict] = []
+        self.origin = time.perf_counter()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.spans.clear()
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def _span(self, name: str, course: str | None, attrs: dict):
+        parent = _current.get()
+        record = {
+            'id': len(self.spans),
+            'parent': parent['id'] if parent else None,
+            'name': name,
+            'course': course or (parent['course'] if parent else None),
+            'start': time.perf_counter() - self.origin,
+            'duration': None,
+            'error': None,
+            **attrs,
+        }
+        self.spans.append(record)
+        token = _current.set(record)
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            record['duration'] = time.perf_counter() - self.origin - record['start']
+
+    def span(self, name: str, course: str | None = None, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return self._span(name, course, attrs)
+
+    def write(self, directory: str | Path = 'traces') -> Path:
+        """把本次运行的全部 span 写成 JSON"""
+        directory = Path(directory)
+        directory.mkdir(exist_ok=True)
+        path = directory / datetime.now().strftime('run-%Y%m%d-%H%M%S.json')
+        path.write_text(
+            json.dumps(self.spans, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+        return path
+
+    def stats(self) -> tuple[dict[str, dict[str, float]], dict[str, float]]:
+        """按步骤类型统计次数、p50、p95、合计，按课程统计合计耗时"""
+        by_name: dict[str, list[float]] = {}
+        by_course: dict[str, float] = {}
+        spans = [s for s in self.spans if s['duration'] is not None]
+        for s in spans:
+            by_name.setdefault(s['name'], []).append(s['duration'])
+            parent = self.spans[s['parent']] if s['parent'] is not None else None
+            # 只累计课程的最外层 span，避免父子重复计算
+            if s['course'] and (parent is None or parent['course'] != s['course']):
+                by_course[s['course']] = by_course.get(s['course'], 0) + s['duration']
+        steps = {
+            name: {
+                'count': len(durations),
+                'p50': _percentile(durations, 50),
+                'p95': _percentile(durations, 95),
+                'total': sum(durations),
+            }
+            for name, durations in by_name.items()
+        }
+        return steps, by_course
+
+    def summary(self) -> tuple[Table, Table]:
+        """按步骤类型、按课程汇总耗时"""
+        by_name, by_course = self.stats()
+        steps = Table('步骤', '次数', 'p50', 'p95', '合计', title='按步骤')
+        for name, stat in sorted(by_name.items(), key=lambda i: -i[1]['total']):
+            steps.add_row(
+                name,
+                str(stat['count']),
+                f'{stat["p50"]:.2f}s',
+                f'{stat["p95"]:.2f}s',
+                f'{stat["total"]:.2f}s',
+            )
+        courses = Table('课程', '合计', title='按课程')
+        for course, total in sorted(by_course.items(), key=lambda i: -i[1]):
+            courses.add_row(course, f'{total:.2f}s')
+        return steps, courses
+
+    def report(self, directory: str | Path = 'traces') -> Path:
+        path = self.write(directory)
+        console = Console()
+        for table in self.summary():
+            console.print(table)
+        console.print(f'trace 已写入 {path}')
+        return path
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+tracer = Tracer()
+
+
+def span(name: str, course: str | None = None, **attrs):
+    """记录一段耗时，未启用时为空操作"""
+    return tracer.span(name, course, **attrs)
+
+
+def traced(name: str | None = None):
+    """
+    给方法计时的装饰器，同步、异步方法都可以用
+    参数里有 course_code、the_progress_of_the_curriculum 时记录所属课程
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+        params = list(inspect.signature(func).parameters)
+
+        def course_of(args, kwargs) -> str | None:
+            values = dict(zip(params, args)) | kwargs
+            if 'course_code' not in values:
+                return None
+            return f'{values["course_code"]}-{values.get("the_progress_of_the_curriculum", "")}'
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name, course_of(args, kwargs)):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, course_of(args, kwargs)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
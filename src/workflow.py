@@ -0,0 +1,189 @@
+import time
+from typing import Callable
+
+from err import LoginExpired, RetryableError
+from journal import Journal
+from model import CourseModel
+from pages import CourseManagement
+from planner import STEP_MODULES, Operation
+from resilience import RetryPolicy, breaker, policy_for
+from utils import log_context, logging
+
+logger = logging.getLogger('workflow_bot')
+
+
+def _done(journal: Journal | None, course: CourseModel, step: str) -> bool:
+    return journal is not None and journal.done(course.code, course.progress, step)
+
+
+def _pending(
+    journal: Journal | None, course: CourseModel, step: str, users: list[str]
+) -> list[str]:
+    if journal is None:
+        return users
+    return journal.pending(course.code, course.progress, step, users)
+
+
+def _recorder(
+    journal: Journal | None, course: CourseModel, step: str
+) -> Callable[[str], None] | None:
+    if journal is None:
+        return None
+    return lambda user: journal.record(course.code, course.progress, step, user)
+
+
+def _record(journal: Journal | None, course: CourseModel, step: str) -> None:
+    if journal is not None:
+        journal.record(course.code, course.progress, step)
+
+
+def _only(users: list[str], subset: list[str] | None) -> list[str]:
+    if subset is None:
+        return users
+    return [user for user in users if user in subset]
+
+
+def _pending_discusses(
+    journal: Journal | None, course: CourseModel, subset: list[str] | None = None
+) -> tuple[list[str], list[str]]:
+    """还没填写课评的学生及对应课评"""
+    if len(course.users_over) != len(course.discuss_content):
+        raise ValueError('用户和课评对不上')
+    users = _pending(
+        journal, course, 'set_user_state_discusses', _only(course.users_over, subset)
+    )
+    contents = dict(zip(course.users_over, course.discuss_content))
+    return users, [contents[user] for user in users]
+
+
+def run_step(
+    manager: CourseManagement,
+    course: CourseModel,
+    step: str,
+    journal: Journal | None = None,
+    users: list[str] | None = None,
+) -> None:
+    """
+    执行一节课的某个步骤，journal 中已完成的部分跳过
+    users 不为 None 时只处理其中的学生
+    """
+    if step in ('add_progress', 'add_members', 'add_discuss'):
+        if _done(journal, course, step):
+            return
+        if step == 'add_progress':
+            manager.add_progress(
+                course.code,
+                course.progress,
+                *course.span(),
+                course.state,
+                course.content,
+            )
+        else:
+            getattr(manager, step)(course.code, course.progress)
+        _record(journal, course, step)
+    elif step in ('set_users_over', 'set_users_leave'):
+        users = _only(getattr(course, step.removeprefix('set_')), users)
+        getattr(manager, step)(
+            course.code,
+            course.progress,
+            _pending(journal, course, step, users),
+            _recorder(journal, course, step),
+        )
+    elif step == 'set_user_state_discusses':
+        users, contents = _pending_discusses(journal, course, users)
+        manager.set_user_state_discusses(
+            course.code,
+            course.progress,
+            course.content,
+            contents,
+            users,
+            course.discuss_state,
+            _recorder(journal, course, step),
+        )
+    else:
+        raise ValueError(f'未知步骤 {step}')
+
+
+def _fields(op: Operation) -> dict[str, str]:
+    return {'code': op.course.code, 'progress': op.course.progress, 'step': op.step}
+
+
+def run_op(
+    manager: CourseManagement,
+    op: Operation,
+    journal: Journal | None = None,
+) -> None:
+    """
+    执行一个操作，可重试的错误按步骤的重试参数退避后从安全点重试：
+    关掉弹窗、重新进入模块，journal 中已完成的学生不再重做
+    """
+    policy = policy_for(op.step)
+    for attempt in range(1, policy.max_times + 1):
+        breaker.wait()
+        try:
+            with log_context(**_fields(op)):
+                run_step(manager, op.course, op.step, journal, op.users)
+            # 成功后清零，只有连续出错才断开
+            breaker.record(True)
+            return
+        except RetryableError as e:
+            breaker.record(False)
+            if attempt == policy.max_times:
+                RetryPolicy.gave_up += 1
+                raise
+            RetryPolicy.retries += 1
+            delay = policy.delay(attempt)
+            logger.warning(
+                f'{op.key} {op.step} 第 {attempt} 次失败: {e}，{delay:.1f}s 后重试'
+            )
+            manager.reset()
+            time.sleep(delay)
+
+
+def run_course(
+    manager: CourseManagement,
+    course: CourseModel,
+    journal: Journal | None = None,
+) -> None:
+    """按顺序完成一节课的全部操作"""
+    for step in STEP_MODULES:
+        with log_context(code=course.code, progress=course.progress, step=step):
+            run_step(manager, course, step, journal)
+
+
+def run_plan(
+    manager: CourseManagement,
+    plan: list[Operation],
+    journal: Journal | None = None,
+    on_result: Callable[[str, Exception | None], None] | None = None,
+    on_op: Callable[[Operation, Exception | None], None] | None = None,
+) -> dict[str, Exception | None]:
+    """
+    按计划顺序执行全部操作
+    某节课的操作失败后跳过它的后续操作，其它课程继续
+    on_result 在每节课全部完成或失败时回调，on_op 在每个执行过的操作后回调
+    返回 {课程编号-课程进度: 异常或 None}
+    """
+    results: dict[str, Exception | None] = {}
+    last = {op.key: op for op in plan}
+    for op in plan:
+        if results.get(op.key) is not None:
+            continue
+        try:
+            run_op(manager, op, journal)
+            results.setdefault(op.key, None)
+        except LoginExpired:
+            raise
+        except Exception as e:
+            logger.error(f'{op.key} {op.step} 失败: {e}')
+            results[op.key] = e
+            if on_op is not None:
+                on_op(op, e)
+            if on_result is not None:
+                on_result(op.key, e)
+            continue
+        if on_op is not None:
+            on_op(op, None)
+        if on_result is not None and last[op.key] is op:
+            on_result(op.key, None)
+    return results
@@ -0,0 +1,183 @@
+"""
+在本地模拟站点上跑完整流程的基准测试
+
+    python tests/benchmark.py --sizes 1 10 100 --latency 0.05 --output bench_output.txt
+
+每个规模生成一批课程，登录后按执行计划跑完全部操作，
+输出每分钟处理课程数、各步骤耗时和浏览器内存，便于不同提交之间对比
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from builders import make_courses, make_roster
+from mock_site import MockSite
+
+SRC = Path(__file__).parents[1] / 'src'
+
+CONFIG = """
+[site]
+base_url = "{base_url}"
+
+[credentials]
+username = "bench"
+password = "bench"
+
+[browser]
+headless = true
+viewport = {{ width = 1280, height = 720 }}
+locale = "zh-CN"
+
+[captcha]
+# 模拟站点不校验验证码，不必为低置信度反复刷新
+min_confidence = 0
+"""
+
+
+def heap_usage(page) -> dict[str, float]:
+    """通过 CDP 读取页面的 JS 堆与 DOM 规模"""
+    cdp = page.context.new_cdp_session(page)
+    cdp.send('Performance.enable')
+    metrics = {
+        m['name']: m['value'] for m in cdp.send('Performance.getMetrics')['metrics']
+    }
+    cdp.detach()
+    return {
+        'js_heap_used_mb': metrics['JSHeapUsedSize'] / 2**20,
+        'js_heap_total_mb': metrics['JSHeapTotalSize'] / 2**20,
+        'nodes': metrics['Nodes'],
+    }
+
+
+def bench(site: MockSite, size: int, args: argparse.Namespace) -> dict:
+    from playwright.sync_api import sync_playwright
+
+    from config import USER_NAME, USER_PASSWORD
+    from pages import CourseManagement, Router
+    from planner import build_plan
+    from pool import browser_manager, run_pool
+    from session import open_logged_in_context
+    from utils import tracer
+    from workflow import run_plan
+
+    launch_options = {'headless': not args.headed, 'slow_mo': args.slow_mo}
+    context_options = {'viewport': {'width': 1280, 'height': 720}, 'locale': 'zh-CN'}
+
+    rosters = make_roster(size)
+    site.reset(rosters)
+    Router.routes.clear()
+    plan = build_plan(make_courses(rosters))
+    tracer.enable()
+    memory = None
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(**launch_options)
+        context = open_logged_in_context(
+            browser, context_options, USER_NAME, USER_PASSWORD
+        )
+        start = time.perf_counter()
+        if args.concurrency > 1:
+            storage_state = context.storage_state()
+        else:
+            page = context.new_page()
+            results = run_plan(CourseManagement(page), plan)
+            elapsed = time.perf_counter() - start
+            memory = heap_usage(page)
+        browser.close()
+
+    if args.concurrency > 1:
+        # 每个 worker 线程自己启动浏览器
+        results = run_pool(
+            plan,
+            args.concurrency,
+            lambda: browser_manager(storage_state, launch_options, context_options),
+        )
+        elapsed = time.perf_counter() - start
+
+    steps, _ = tracer.stats()
+    tracer.enabled = False
+    failed = [key for key, err in results.items() if err is not None]
+    return {
+        'courses': size,
+        'concurrency': args.concurrency,
+        'latency': args.latency,
+        'seconds': elapsed,
+        'courses_per_minute': (size - len(failed)) / elapsed * 60,
+        'failed': failed,
+        'memory': memory,
+        'steps': steps,
+    }
+
+
+def show(reports: list[dict]) -> None:
+    console = Console()
+    table = Table('课程数', '耗时', '课程/分钟', '失败', 'JS 堆', title='基准测试')
+    for r in reports:
+        memory = r['memory']
+        table.add_row(
+            str(r['courses']),
+            f'{r["seconds"]:.1f}s',
+            f'{r["courses_per_minute"]:.2f}',
+            str(len(r['failed'])),
+            f'{memory["js_heap_used_mb"]:.1f}MB' if memory else '-',
+        )
+    console.print(table)
+
+    names = sorted({name for r in reports for name in r['steps']})
+    steps = Table(
+        '步骤', *(f'{r["courses"]} 课 p50' for r in reports), title='步骤耗时'
+    )
+    for name in names:
+        steps.add_row(
+            name,
+            *(
+                f'{r["steps"][name]["p50"]:.2f}s' if name in r['steps'] else '-'
+                for r in reports
+            ),
+        )
+    console.print(steps)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='本地模拟站点基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--latency', type=float, default=0.05, help='接口延迟（秒）')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    parser.add_argument('--slow-mo', type=int, default=0)
+    parser.add_argument('--output', help='把结果以 JSON 写入该文件')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    output = Path(args.output).resolve() if args.output else None
+    workdir = Path(tempfile.mkdtemp(prefix='bench-'))
+
+    with MockSite(latency=args.latency) as site:
+        # config 在导入时读取，必须先写好配置再导入项目模块
+        (workdir / 'config.toml').write_text(
+            CONFIG.format(base_url=site.url), encoding='utf-8'
+        )
+        os.environ['EVALUATION_CONFIG'] = str(workdir / 'config.toml')
+        os.chdir(workdir)
+        sys.path.insert(0, str(SRC))
+        reports = [bench(site, size, args) for size in args.sizes]
+
+    show(reports)
+    if output:
+        output.write_text(
+            json.dumps(reports, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""测试和基准测试共用的课程数据"""
+
+# 生成的每节课学生数，其中最后 LEAVES 个请假
+STUDENTS = 12
+LEAVES = 2
+
+
+def make_roster(size: int) -> dict[str, list[str]]:
+    """生成 size 节课程，每节课 STUDENTS 个学生"""
+    return {
+        f'BENCH-{i:03d}': [f'学生{i:03d}{j:02d}' for j in range(STUDENTS)]
+        for i in range(1, size + 1)
+    }
+
+
+def make_courses(roster: dict[str, list[str]]) -> list:
+    """按名单生成每节课的 CourseModel；config 在导入时读取，model 用到时才导入"""
+    from model import CourseModel
+
+    courses = []
+    for code, students in roster.items():
+        over, leave = students[:-LEAVES], students[-LEAVES:]
+        courses.append(
+            CourseModel(
+                code=code,
+                progress='第1课',
+                content='基准测试',
+                time=(9, 10),
+                users_over=over,
+                users_leave=leave,
+                discuss_content=[f'{name} 表现良好' for name in over],
+            )
+        )
+    return courses
@@ -0,0 +1,7 @@
+import os
+from pathlib import Path
+
+# 测试环境没有 config.toml，使用示例配置
+os.environ.setdefault(
+    'EVALUATION_CONFIG', str(Path(__file__).parents[1] / 'config.example.toml')
+)
@@ -0,0 +1,182 @@
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from playwright.sync_api import TimeoutError as PWTimeout
+
+ROW = '.ant-table-tbody tr[data-row-key]'
+NEXT_PAGE = 'li.ant-pagination-next'
+
+
+class FakeLocator:
+    """只记录动作的 Locator，链式调用都返回新的 FakeLocator"""
+
+    def __init__(self, page: 'FakePage', selector: str) -> None:
+        self.page = page
+        self.selector = selector
+
+    def _child(self, selector: str) -> 'FakeLocator':
+        return FakeLocator(self.page, f'{self.selector} >> {selector}')
+
+    def locator(self, selector: str, **kwargs) -> 'FakeLocator':
+        return self._child(selector)
+
+    def get_by_role(self, role: str, name: str = '', **kwargs) -> 'FakeLocator':
+        return self._child(f'role={role}[{name}]')
+
+    def get_by_text(self, text: str, **kwargs) -> 'FakeLocator':
+        return self._child(f'text={text}')
+
+    def get_by_label(self, text: str, **kwargs) -> 'FakeLocator':
+        return self._child(f'label={text}')
+
+    def get_by_placeholder(self, text: str, **kwargs) -> 'FakeLocator':
+        return self._child(f'placeholder={text}')
+
+    def get_by_title(self, text: str, **kwargs) -> 'FakeLocator':
+        return self._child(f'title={text}')
+
+    def filter(self, has: 'FakeLocator | None' = None, **kwargs) -> 'FakeLocator':
+        return self._child(f'filter({has.selector})' if has else 'filter')
+
+    def or_(self, other: 'FakeLocator') -> 'FakeLocator':
+        return self._child('or')
+
+    def nth(self, index: int) -> 'FakeLocator':
+        return self._child(f'nth={index}')
+
+    @property
+    def first(self) -> 'FakeLocator':
+        return self.nth(0)
+
+    @property
+    def last(self) -> 'FakeLocator':
+        return self.nth(-1)
+
+    def click(self, **kwargs) -> None:
+        self.page.record('click', self.selector)
+        # 点菜单里的模块链接时跳到该模块
+        if self.selector.startswith('role=link['):
+            self.page.url = f'{self.page.origin}/{self.selector[10:-1]}'
+        if self.selector == NEXT_PAGE and self.page.rows is not None:
+            self.page.page_no += 1
+
+    def fill(self, value: str, **kwargs) -> None:
+        self.page.record('fill', self.selector)
+        self.page.filled.append((self.selector, value))
+
+    def press(self, key: str, **kwargs) -> None:
+        self.page.record('press', self.selector)
+
+    def wait_for(self, **kwargs) -> None:
+        self.page.record('wait', self.selector)
+        if self.selector.split(' >> ')[0] in self.page.stuck:
+            raise PWTimeout(f'{self.selector} 等待超时')
+
+    def screenshot(self, **kwargs) -> bytes:
+        self.page.record('screenshot', self.selector)
+        return b''
+
+    def count(self) -> int:
+        root = self.selector.split(' >> ')[0]
+        if self.page.rows is not None and root == ROW:
+            names = self.page.rows[self.page.page_no]
+            return int(any(f'role=cell[{name}]' in self.selector for name in names))
+        if self.page.rows is not None and root == NEXT_PAGE:
+            return 1
+        return self.page.counts.get(root, 1)
+
+    def all(self) -> list['FakeLocator']:
+        return [self] * self.count()
+
+    def get_attribute(self, name: str) -> str:
+        if name == 'data-row-key':
+            return 'row'
+        if (
+            name == 'class'
+            and self.selector == NEXT_PAGE
+            and self.page.rows is not None
+            and self.page.page_no == len(self.page.rows) - 1
+        ):
+            return 'ant-pagination-next ant-pagination-disabled'
+        return ''
+
+
+class FakePage:
+    """
+    不开浏览器的 Page，按动作类型记录 goto、click、fill、wait 等次数
+    counts 指定 locator(选择器).count() 的返回值，未指定时为 1
+    stuck 中的选择器 wait_for 时超时
+    rows 指定列表每一页的学生，设置后按页查找行、翻页
+    """
+
+    origin = 'http://fake'
+
+    def __init__(
+        self, counts: dict[str, int] | None = None, list_json: dict | None = None
+    ) -> None:
+        self.url = 'about:blank'
+        self.counts = counts or {}
+        self.stuck: set[str] = set()
+        # 列表接口的返回，课程进度选择框查询时交给 resolver
+        self.list_json = list_json or {'result': {'records': []}}
+        # 保存接口的返回
+        self.save_body = b'{"success": true}'
+        self.rows: list[list[str]] | None = None
+        # 当前列表页，从 0 开始
+        self.page_no = 0
+        self.actions: Counter[str] = Counter()
+        self.log: list[tuple[str, str]] = []
+        self.filled: list[tuple[str, str]] = []
+
+    def record(self, action: str, target: str = '') -> None:
+        self.actions[action] += 1
+        self.log.append((action, target))
+
+    def measure(self, call, *args, **kwargs) -> Counter[str]:
+        """执行一次调用，返回这次调用里各类动作的次数"""
+        before = self.actions.copy()
+        call(*args, **kwargs)
+        return self.actions - before
+
+    def locator(self, selector: str, **kwargs) -> FakeLocator:
+        return FakeLocator(self, selector)
+
+    def get_by_role(self, role: str, name: str = '', **kwargs) -> FakeLocator:
+        return FakeLocator(self, f'role={role}[{name}]')
+
+    def get_by_text(self, text: str, **kwargs) -> FakeLocator:
+        return FakeLocator(self, f'text={text}')
+
+    def get_by_label(self, text: str, **kwargs) -> FakeLocator:
+        return FakeLocator(self, f'label={text}')
+
+    def get_by_placeholder(self, text: str, **kwargs) -> FakeLocator:
+        return FakeLocator(self, f'placeholder={text}')
+
+    def get_by_title(self, text: str, **kwargs) -> FakeLocator:
+        return FakeLocator(self, f'title={text}')
+
+    def goto(self, url: str, **kwargs) -> None:
+        self.record('goto', url)
+        self.url = url
+
+    def reload(self, **kwargs) -> None:
+        self.record('reload', self.url)
+
+    def wait_for_url(self, url, **kwargs) -> None:
+        self.record('wait', 'url')
+
+    def route(self, url, handler) -> None:
+        self.record('route')
+
+    def unroute(self, url, handler=None) -> None:
+        self.record('route')
+
+    @contextmanager
+    def expect_response(self, predicate, **kwargs):
+        self.record('wait', 'response')
+        response = SimpleNamespace(
+            json=lambda: self.list_json, body=lambda: self.save_body
+        )
+        yield SimpleNamespace(value=response)
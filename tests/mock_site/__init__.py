@@ -0,0 +1 @@
+from .server import MockSite, chromium_available
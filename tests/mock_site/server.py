@@ -0,0 +1,249 @@
+import base64
+import io
+import json
+import random
+import string
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+PREFIX = '/jeecg-boot'
+APP_HTML = (Path(__file__).parent / 'app.html').read_bytes()
+PAGE_SIZE = 10
+
+
+def chromium_available() -> bool:
+    """本机能否启动 chromium，不能时跳过需要浏览器的测试"""
+    from playwright.sync_api import Error, sync_playwright
+
+    try:
+        with sync_playwright() as p:
+            p.chromium.launch().close()
+    except Error:
+        return False
+    return True
+
+
+def _captcha_image(text: str) -> str:
+    """生成验证码图片的 data URL"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (105, 35), 'white')
+    ImageDraw.Draw(image).text((20, 10), text, fill='black')
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+class MockData:
+    """模拟站点的内存数据"""
+
+    def __init__(self, courses: dict[str, list[str]]) -> None:
+        # 课程编号 -> 学生名单
+        self.courses = [
+            {'id': f'c{i}', 'courseCode': code, 'students': students}
+            for i, (code, students) in enumerate(courses.items(), 1)
+        ]
+        self.progresses: list[dict] = []
+        self.members: list[dict] = []
+        self.discusses: list[dict] = []
+        self.tokens: set[str] = set()
+        self.lock = threading.Lock()
+
+    def table(self, path: str) -> list[dict]:
+        return {
+            '/course/course/list': self.courses,
+            '/course/courseProgress/list': self.progresses,
+            '/course/courseProgressUser/list': self.members,
+            '/course/courseFeedback/list': self.discusses,
+        }[path]
+
+    def query(self, path: str, params: dict) -> dict:
+        page_no = int(params.pop('pageNo', 1))
+        page_size = int(params.pop('pageSize', PAGE_SIZE))
+        # JeecgBoot 的 字段_MultiString 按逗号分隔取 IN
+        multi = {
+            k.removesuffix('_MultiString'): set(v.split(','))
+            for k, v in params.items()
+            if k.endswith('_MultiString')
+        }
+        params = {k: v for k, v in params.items() if not k.endswith('_MultiString')}
+        rows = [
+            {k: v for k, v in row.items() if k != 'students'}
+            for row in self.table(path)
+            if all(str(row.get(k)) == v for k, v in params.items() if v != '')
+            and all(str(row.get(k)) in v for k, v in multi.items())
+        ]
+        start = (page_no - 1) * page_size
+        return {
+            'records': rows[start : start + page_size],
+            'total': len(rows),
+            'current': page_no,
+            'size': page_size,
+        }
+
+    def save(self, path: str, body: dict) -> None:
+        with self.lock:
+            if path == '/course/courseProgress/add':
+                course = next(c for c in self.courses if c['id'] == body['courseId'])
+                self.progresses.append(
+                    {
+                        **body,
+                        'id': f'p{len(self.progresses) + 1}',
+                        'courseCode': course['courseCode'],
+                    }
+                )
+            elif path in (
+                '/course/courseProgressUser/addBatch',
+                '/course/courseFeedback/addBatch',
+            ):
+                progress = next(
+                    p for p in self.progresses if p['id'] == body['progressId']
+                )
+                course = next(
+                    c for c in self.courses if c['id'] == progress['courseId']
+                )
+                rows = self.members if 'User' in path else self.discusses
+                for name in course['students']:
+                    rows.append(
+                        {
+                            'id': f'{"m" if rows is self.members else "d"}{len(rows) + 1}',
+                            'progressId': progress['id'],
+                            'userName': name,
+                            'state': '',
+                            'content': '',
+                            'title': '',
+                        }
+                    )
+            elif path == '/course/courseProgressUser/edit':
+                next(m for m in self.members if m['id'] == body['id']).update(body)
+            elif path == '/course/courseFeedback/edit':
+                next(d for d in self.discusses if d['id'] == body['id']).update(body)
+            else:
+                raise KeyError(path)
+
+
+class MockSite:
+    """
+    本地模拟的 JeecgBoot 站点
+    提供登录页（含验证码图片）、课程管理菜单和 CourseManagement 用到的各模块页面，
+    latency 为每个接口请求额外的服务端延迟（秒）
+    """
+
+    def __init__(
+        self,
+        courses: dict[str, list[str]] | None = None,
+        latency: float = 0.0,
+        check_captcha: bool = False,
+    ) -> None:
+        self.data = MockData(courses or {})
+        self.latency = latency
+        self.check_captcha = check_captcha
+        self.captchas: dict[str, str] = {}
+        self.requests = 0
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def reset(self, courses: dict[str, list[str]]) -> None:
+        tokens = self.data.tokens
+        self.data = MockData(courses)
+        self.data.tokens = tokens
+
+    def start(self) -> 'MockSite':
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                site._dispatch(self)
+
+            do_POST = do_PUT = do_GET
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> 'MockSite':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _reply(self, handler, status: int, payload: bytes, content_type: str) -> None:
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _json(self, handler, result=None, success: bool = True, message: str = ''):
+        payload = {'success': success, 'message': message, 'result': result}
+        self._reply(
+            handler,
+            200,
+            json.dumps(payload, ensure_ascii=False).encode(),
+            'application/json;charset=UTF-8',
+        )
+
+    def _dispatch(self, handler) -> None:
+        self.requests += 1
+        url = urlsplit(handler.path)
+        if not url.path.startswith(PREFIX):
+            # 页面由前端脚本按路径渲染
+            self._reply(handler, 200, APP_HTML, 'text/html;charset=UTF-8')
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+        path = url.path.removeprefix(PREFIX)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = json.loads(handler.rfile.read(length)) if length else {}
+
+        if path.startswith('/sys/randomImage/'):
+            text = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
+            key = path.rsplit('/', 1)[1]
+            self.captchas[key] = text
+            self._json(handler, _captcha_image(text))
+            return
+        if path == '/sys/login':
+            if self.check_captcha and body.get('captcha') != self.captchas.get(
+                body.get('checkKey')
+            ):
+                self._json(handler, success=False, message='验证码错误')
+                return
+            token = uuid.uuid4().hex
+            self.data.tokens.add(token)
+            self._json(handler, {'token': token})
+            return
+
+        if handler.headers.get('X-Access-Token') not in self.data.tokens:
+            self._reply(handler, 401, b'{"success": false}', 'application/json')
+            return
+        if path == '/sys/permission/getUserPermissionByToken':
+            self._json(handler, {'menu': []})
+            return
+        try:
+            if handler.command == 'GET':
+                self._json(handler, self.data.query(path, params))
+            else:
+                self.data.save(path, body)
+                self._json(handler, message='操作成功')
+        except (KeyError, StopIteration) as e:
+            self._json(handler, success=False, message=f'无效请求: {e}')
@@ -0,0 +1,199 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from api import ApiClient, ApiCourseManagement
+from err import BizError, LoginExpired
+from resolver import ProgressResolver
+
+TOKEN = 'test-token'
+PREFIX = '/jeecg-boot'
+
+
+class StandIn:
+    """模拟 JeecgBoot 课程模块接口的内存数据"""
+
+    def __init__(self) -> None:
+        self.courses = [{'id': 'c1', 'courseCode': 'PY101'}]
+        self.progresses: list[dict] = []
+        self.members: list[dict] = []
+        self.discusses: list[dict] = []
+        self.roster = ['张三', '李四']
+        self.connections: set[int] = set()
+        self.requests: list[tuple[str, str]] = []
+
+    def list(self, rows: list[dict], params: dict) -> dict:
+        filters = {k: v for k, v in params.items() if k not in ('pageNo', 'pageSize')}
+        records = [r for r in rows if all(r.get(k) == v for k, v in filters.items())]
+        return {'records': records, 'total': len(records)}
+
+    def handle(self, method: str, path: str, params: dict, body: dict | None):
+        self.requests.append((method, path))
+        if method == 'GET':
+            rows = {
+                '/course/course/list': self.courses,
+                '/course/courseProgress/list': self.progresses,
+                '/course/courseProgressUser/list': self.members,
+                '/course/courseFeedback/list': self.discusses,
+            }[path]
+            return self.list(rows, params)
+        if path == '/course/courseProgress/add':
+            course = next(c for c in self.courses if c['id'] == body['courseId'])
+            self.progresses.append(
+                {
+                    **body,
+                    'id': f'p{len(self.progresses) + 1}',
+                    'courseCode': course['courseCode'],
+                }
+            )
+        elif path == '/course/courseProgressUser/addBatch':
+            for name in self.roster:
+                self.members.append(
+                    {
+                        'id': f'm{len(self.members) + 1}',
+                        'progressId': body['progressId'],
+                        'userName': name,
+                        'state': None,
+                    }
+                )
+        elif path == '/course/courseFeedback/addBatch':
+            for name in self.roster:
+                self.discusses.append(
+                    {
+                        'id': f'd{len(self.discusses) + 1}',
+                        'progressId': body['progressId'],
+                        'userName': name,
+                    }
+                )
+        elif path == '/course/courseProgressUser/edit':
+            next(m for m in self.members if m['id'] == body['id']).update(body)
+        elif path == '/course/courseFeedback/edit':
+            next(d for d in self.discusses if d['id'] == body['id']).update(body)
+        else:
+            raise KeyError(path)
+        return None
+
+
+@pytest.fixture
+def stand_in():
+    data = StandIn()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _serve(self) -> None:
+            data.connections.add(id(self.connection))
+            if self.headers.get('X-Access-Token') != TOKEN:
+                self._reply(401, {'success': False, 'message': 'token失效'})
+                return
+            url = urlsplit(self.path)
+            if url.path.startswith(PREFIX + '/nginx/'):
+                self._send(404, b'<html><body>404 Not Found</body></html>', 'text/html')
+                return
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            result = data.handle(
+                self.command, url.path.removeprefix(PREFIX), params, body
+            )
+            self._reply(200, {'success': True, 'message': '', 'result': result})
+
+        def _reply(self, status: int, payload: dict) -> None:
+            raw = json.dumps(payload, ensure_ascii=False).encode()
+            self._send(status, raw, 'application/json')
+
+        def _send(self, status: int, raw: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        do_GET = do_POST = do_PUT = _serve
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    data.base_url = f'http://127.0.0.1:{server.server_port}{PREFIX}'
+    yield data
+    server.shutdown()
+    server.server_close()
+
+
+def test_full_course_flow(stand_in):
+    client = ApiClient(stand_in.base_url, TOKEN, pool_size=1)
+    manager = ApiCourseManagement(client, resolver=ProgressResolver())
+
+    manager.add_schedule('PY101', '第1课', 9, 11, '已结束', '变量')
+    manager.set_users_over('PY101', '第1课', ['张三'])
+    manager.set_users_leave('PY101', '第1课', ['李四'])
+    manager.add_discuss('PY101', '第1课')
+    manager.set_user_state_discusses(
+        'PY101', '第1课', '变量', ['很好'], ['张三'], '无效'
+    )
+    client.close()
+
+    assert stand_in.progresses[0]['state'] == '3'
+    assert [m['state'] for m in stand_in.members] == ['1', '2']
+    assert stand_in.discusses[0]['content'] == '很好'
+    assert stand_in.discusses[0]['title'] == '变量'
+    # 所有请求复用同一个连接
+    assert len(stand_in.connections) == 1
+
+
+def test_bulk_state_queries_roster_once(stand_in):
+    manager = ApiCourseManagement(
+        ApiClient(stand_in.base_url, TOKEN), resolver=ProgressResolver()
+    )
+    manager.add_schedule('PY101', '第1课', 9, 11, '已结束', '变量')
+    stand_in.requests.clear()
+
+    manager.set_users_over('PY101', '第1课', ['张三', '李四'])
+
+    assert stand_in.requests.count(('GET', '/course/courseProgressUser/list')) == 1
+    assert stand_in.requests.count(('PUT', '/course/courseProgressUser/edit')) == 2
+    # 课程进度 id 在 add_members 时已记下
+    assert ('GET', '/course/courseProgress/list') not in stand_in.requests
+
+
+def test_progress_ids_persist(stand_in, tmp_path):
+    path = tmp_path / 'progress_ids.json'
+    manager = ApiCourseManagement(
+        ApiClient(stand_in.base_url, TOKEN), resolver=ProgressResolver(path)
+    )
+    manager.add_schedule('PY101', '第1课', 9, 11, '已结束', '变量')
+
+    resolver = ProgressResolver(path)
+    assert resolver.get('PY101', '第1课') == stand_in.progresses[0]['id']
+    resolver.capture(
+        'PY101', '第2课', {'result': {'records': [{'id': 'a'}, {'id': 'b'}]}}
+    )
+    assert resolver.get('PY101', '第2课') is None
+
+
+def test_unknown_progress(stand_in):
+    manager = ApiCourseManagement(
+        ApiClient(stand_in.base_url, TOKEN), resolver=ProgressResolver()
+    )
+    with pytest.raises(BizError):
+        manager.add_members('PY101', '不存在')
+
+
+def test_expired_token(stand_in):
+    manager = ApiCourseManagement(
+        ApiClient(stand_in.base_url, 'bad'), resolver=ProgressResolver()
+    )
+    with pytest.raises(LoginExpired):
+        manager.add_members('PY101', '第1课')
+
+
+def test_non_json_error_page(stand_in):
+    client = ApiClient(stand_in.base_url, TOKEN)
+    with pytest.raises(BizError, match='404.*404 Not Found'):
+        client.get('/nginx/missing')
@@ -0,0 +1,82 @@
+import os
+
+from assets import AssetCache, AssetRouter
+
+
+class FakeResponse:
+    def __init__(self, status: int, headers: dict, body: bytes) -> None:
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    def body(self) -> bytes:
+        return self._body
+
+
+class FakeRequest:
+    def __init__(self, url: str, resource_type: str) -> None:
+        self.url = url
+        self.resource_type = resource_type
+        self.headers = {}
+
+
+class FakeRoute:
+    """记录 handle 对请求做了什么，fetch 返回预设的响应"""
+
+    def __init__(self, url: str, resource_type: str, response: FakeResponse) -> None:
+        self.request = FakeRequest(url, resource_type)
+        self.response = response
+        self.actions: list = []
+
+    def abort(self) -> None:
+        self.actions.append('abort')
+
+    def fallback(self) -> None:
+        self.actions.append('fallback')
+
+    def fetch(self, headers: dict) -> FakeResponse:
+        self.actions.append(('fetch', headers.get('if-none-match')))
+        return self.response
+
+    def fulfill(self, **kwargs) -> None:
+        self.actions.append(('fulfill', kwargs.get('body')))
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = AssetCache(tmp_path, max_bytes=10)
+    cache.put('http://x/a.js', '"a"', {}, b'aaaa')
+    cache.put('http://x/b.js', '"b"', {}, b'bbbb')
+    for url in ('http://x/a.js', 'http://x/b.js'):
+        os.utime(cache._paths(url)[0], (0, 0))
+    cache.get('http://x/a.js')
+    cache.put('http://x/c.js', '"c"', {}, b'cccc')
+
+    assert cache.get('http://x/a.js') is not None
+    assert cache.get('http://x/b.js') is None
+    assert cache.get('http://x/c.js')[1] == b'cccc'
+
+
+def test_router_blocks_and_revalidates_once_per_run(tmp_path):
+    js = 'http://site/js/app.123.js'
+    AssetCache(tmp_path, 2**20).put(js, '"v1"', {'etag': '"v1"'}, b'bundle')
+    router = AssetRouter(['image'], ['*hm.baidu.com*'], AssetCache(tmp_path, 2**20))
+
+    for url, kind in [
+        ('http://site/logo.png', 'image'),
+        ('https://hm.baidu.com/h.js', 'script'),
+    ]:
+        route = FakeRoute(url, kind, FakeResponse(200, {}, b''))
+        router.handle(route)
+        assert route.actions == ['abort']
+
+    api = FakeRoute('http://site/jeecg-boot/sys/randomImage/1', 'image', None)
+    router.handle(api)
+    assert api.actions == ['fallback']
+
+    first = FakeRoute(js, 'script', FakeResponse(304, {}, b''))
+    router.handle(first)
+    assert first.actions == [('fetch', '"v1"'), ('fulfill', b'bundle')]
+
+    second = FakeRoute(js, 'script', None)
+    router.handle(second)
+    assert second.actions == [('fulfill', b'bundle')]
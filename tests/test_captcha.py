@@ -0,0 +1,81 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from utils import captcha
+
+
+class FakeOcr:
+    """按顺序返回 results 的假 ddddocr 模型，记录加载次数"""
+
+    loaded = 0
+
+    def __init__(self, show_ad: bool = True) -> None:
+        FakeOcr.loaded += 1
+        self.results: list[dict] = []
+
+    def classification(self, img_bytes: bytes, probability: bool = False) -> dict:
+        return self.results.pop(0)
+
+
+class InlineExecutor:
+    """在当前进程里直接执行的 ProcessPoolExecutor，记录提交的函数"""
+
+    def __init__(self, max_workers: int, initializer) -> None:
+        self.submitted: list = []
+        initializer()
+
+    def submit(self, fn, *args):
+        self.submitted.append(fn)
+        return SimpleNamespace(result=lambda: fn(*args))
+
+
+@pytest.fixture
+def ocr(monkeypatch):
+    FakeOcr.loaded = 0
+    monkeypatch.setitem(sys.modules, 'ddddocr', SimpleNamespace(DdddOcr=FakeOcr))
+    monkeypatch.setattr(captcha, '_ocr', None)
+    monkeypatch.setattr(captcha, '_executor', None)
+    return FakeOcr
+
+
+def test_model_loads_once_on_first_use(ocr):
+    assert ocr.loaded == 0
+    captcha._engine().results += [
+        {'text': 'ab12', 'confidence': 0.9},
+        {'text': 'cd34', 'confidence': 0.4},
+    ]
+
+    assert captcha.recognize_captcha(b'') == captcha.CaptchaResult('ab12', 0.9)
+    assert captcha.recognize_captcha(b'') == captcha.CaptchaResult('cd34', 0.4)
+    assert ocr.loaded == 1
+
+
+def test_decodes_probability_rows(ocr):
+    # 空白、a、a、空白、b：重复合并、空白去掉
+    charsets = ['', 'a', 'b']
+    rows = [
+        [0.9, 0.05, 0.05],
+        [0.1, 0.8, 0.1],
+        [0.2, 0.7, 0.1],
+        [0.6, 0.2, 0.2],
+        [0.1, 0.1, 0.8],
+    ]
+    captcha._engine().results.append({'charsets': charsets, 'probability': rows})
+
+    result = captcha.recognize_captcha(b'')
+    assert result.text == 'ab'
+    assert result.confidence == pytest.approx((0.9 + 0.8 + 0.7 + 0.6 + 0.8) / 5)
+
+
+def test_process_mode_sends_recognition_to_executor(ocr, monkeypatch):
+    monkeypatch.setattr(captcha, 'ProcessPoolExecutor', InlineExecutor)
+    captcha.prewarm_captcha('process')
+    captcha.prewarm_captcha('process')
+    executor = captcha._executor
+    assert ocr.loaded == 1
+
+    captcha._engine().results.append({'text': 'xy', 'confidence': 1.0})
+    assert captcha.recognize_captcha(b'').text == 'xy'
+    assert executor.submitted[-1] is captcha._classify
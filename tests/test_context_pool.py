@@ -0,0 +1,149 @@
+from context_pool import ContextPool
+from fake_page import FakePage
+from model import CourseModel
+from pages import Router
+from planner import build_plan
+from workflow import run_plan
+
+
+class FakeCDP:
+    def __init__(self, heap: list[float]) -> None:
+        self.heap = heap
+
+    def send(self, method: str, params: dict | None = None) -> dict:
+        if self.heap[0] < 0:
+            raise RuntimeError('Target crashed')
+        return {'metrics': [{'name': 'JSHeapUsedSize', 'value': self.heap[0] * 2**20}]}
+
+
+class PoolPage(FakePage):
+    """补上 ContextPool 用到的事件监听和无等待跳转，redirect 为跳转后实际到达的地址"""
+
+    redirect: str | None = None
+
+    def on(self, event: str, handler) -> None:
+        pass
+
+    def evaluate(self, script: str, url: str) -> None:
+        self.url = self.redirect or url
+
+    def wait_for_url(self, url, **kwargs) -> None:
+        assert url(self.url)
+        super().wait_for_url(url, **kwargs)
+
+    def wait_for_load_state(self, state: str = 'load', **kwargs) -> None:
+        self.record('wait', 'load')
+
+
+class FakeContext:
+    def __init__(self, heap: list[float]) -> None:
+        self.heap = heap
+        self.closed = False
+
+    def new_page(self) -> PoolPage:
+        return PoolPage(counts={'li.ant-pagination-next': 0})
+
+    def new_cdp_session(self, page: PoolPage) -> FakeCDP:
+        return FakeCDP(self.heap)
+
+    def storage_state(self) -> dict:
+        return {}
+
+    def set_default_timeout(self, timeout: float) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeBrowser:
+    """记录新建的 context，所有 context 共用同一个 JS 堆读数"""
+
+    def __init__(self) -> None:
+        self.heap = [10.0]
+        self.contexts: list[FakeContext] = []
+
+    def new_context(self, storage_state=None, **options) -> FakeContext:
+        context = FakeContext(self.heap)
+        self.contexts.append(context)
+        return context
+
+
+def course(code: str) -> CourseModel:
+    return CourseModel(
+        code=code,
+        progress='第1课',
+        content='变量',
+        time=(9, 11),
+        users_over=['张三'],
+        discuss_content=['好'],
+    )
+
+
+def test_recycles_mid_plan_across_modules(monkeypatch):
+    monkeypatch.setattr(
+        Router,
+        'routes',
+        {
+            m: f'{FakePage.origin}/{m}'
+            for m in ('课程进度', '课程进度人员', '课后反馈中心')
+        },
+    )
+    browser = FakeBrowser()
+    first = browser.new_context()
+    pool = ContextPool(browser, {}, first, max_courses=3, max_heap_mb=0)
+    plan = build_plan([course(f'PY{i}') for i in range(4)])
+    assert len({op.module for op in plan}) == 3
+
+    # 每节课完成时已经换过的次数
+    finished: list[int] = []
+    recycled = ContextPool.recycled
+    prefetched = ContextPool.prefetched
+    results = run_plan(
+        pool,
+        plan,
+        on_result=lambda key, error: finished.append(ContextPool.recycled),
+        on_op=pool.op_done,
+    )
+
+    assert all(error is None for error in results.values())
+    # 按模块合并后课程到最后才完成，但在此之前就已经换过 context
+    assert finished[0] - recycled >= 2
+    assert ContextPool.prefetched > prefetched
+    assert first.closed
+    assert browser.contexts.index(pool.context) > 1
+
+
+def test_recycles_when_heap_grows():
+    browser = FakeBrowser()
+    pool = ContextPool(
+        browser, {}, browser.new_context(), max_courses=0, max_heap_mb=100
+    )
+    op = build_plan([course('PY101')])[0]
+    pool.op_done(op)
+    assert len(browser.contexts) == 1
+
+    browser.heap[0] = 150
+    pool.op_done(op)
+    old = pool.context
+    pool.current()
+    assert old.closed and pool.context is not old
+    assert pool.page.url.endswith('/dashboard/analysis')
+
+
+def test_crashed_page_recycles_instead_of_raising(monkeypatch):
+    browser = FakeBrowser()
+    pool = ContextPool(
+        browser, {}, browser.new_context(), max_courses=0, max_heap_mb=100
+    )
+    op = build_plan([course('PY101')])[0]
+    browser.heap[0] = -1
+    pool.op_done(op, RuntimeError('Target crashed'))
+
+    # 跳到了登录页等其它地址时不记为已在模块中
+    monkeypatch.setattr(PoolPage, 'redirect', f'{FakePage.origin}/user/login')
+    browser.heap[0] = 10
+    old = pool.context
+    pool.current()
+    assert old.closed and pool.context is not old
+    assert pool.manager.router.location is None
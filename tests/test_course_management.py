@@ -0,0 +1,227 @@
+from types import SimpleNamespace
+
+import pytest
+
+import pages.login
+from fake_page import FakePage
+from err import BizError, StepTimeout
+from pages import CourseManagement, LoginPage, Router
+from pages.waits import OPEN_MODAL
+from resolver import ProgressResolver
+
+MODULES = ['课程进度', '课程进度人员', '课后反馈中心']
+STUDENTS = ['张三', '李四', '王五']
+
+# 每次调用各类动作次数的上限，改动页面对象让次数变多时测试失败；
+# 确实需要更多动作时先确认原因，再调整这里
+BUDGETS: dict[str, dict[str, int]] = {
+    'to_management': {'goto': 1, 'click': 2, 'wait': 1},
+    'add_progress': {'goto': 1, 'click': 10, 'fill': 5, 'press': 2, 'wait': 2},
+    'add_members': {'goto': 1, 'click': 8, 'fill': 2, 'wait': 4},
+    'add_discuss': {'goto': 1, 'click': 8, 'fill': 2, 'wait': 4},
+    'set_user_state': {'goto': 1, 'click': 20, 'fill': 3, 'wait': 6},
+    'set_user_state_discuss': {'goto': 1, 'click': 20, 'fill': 5, 'wait': 5},
+    # 不知道课程进度 id 时走高级查询
+    'set_users_state': {'goto': 1, 'click': 21, 'fill': 2, 'wait': 12},
+    # 已知课程进度 id 时不打开选择框，请求直接带上 progressId
+    'add_members_by_id': {'goto': 1, 'route': 2, 'click': 2, 'wait': 2},
+    'add_discuss_by_id': {'goto': 1, 'route': 2, 'click': 2, 'wait': 2},
+    'set_user_state_by_id': {'goto': 1, 'route': 2, 'click': 5, 'wait': 4},
+    'set_user_state_discuss_by_id': {
+        'goto': 1,
+        'route': 2,
+        'click': 5,
+        'fill': 2,
+        'wait': 3,
+    },
+    'set_users_state_by_id': {'goto': 1, 'route': 2, 'click': 13, 'wait': 10},
+    'set_user_state_discusses_by_id': {
+        'goto': 1,
+        'route': 2,
+        'click': 13,
+        'fill': 6,
+        'wait': 7,
+    },
+    'is_session_valid': {'goto': 1, 'wait': 1},
+    'login': {'goto': 1, 'screenshot': 1, 'click': 1, 'fill': 3, 'wait': 1},
+}
+
+# 批量方法里每多一个学生增加的动作，导航、刷新不应随人数增加
+PER_STUDENT = {
+    'set_users_state': {'click': 4, 'wait': 3},
+    'set_user_state_discusses': {'click': 4, 'fill': 2, 'wait': 2},
+}
+
+
+def check(counts, budget: str) -> None:
+    over = {
+        action: (count, BUDGETS[budget].get(action, 0))
+        for action, count in counts.items()
+        if count > BUDGETS[budget].get(action, 0)
+    }
+    assert not over, f'{budget} 动作超出预算 (实际, 上限): {over}'
+
+
+@pytest.fixture
+def page(monkeypatch) -> FakePage:
+    monkeypatch.setattr(
+        Router, 'routes', {name: f'{FakePage.origin}/{name}' for name in MODULES}
+    )
+    return FakePage(counts={'li.ant-pagination-next': 0})
+
+
+def manager(page: FakePage, progress_id: str | None = None) -> CourseManagement:
+    resolver = ProgressResolver()
+    if progress_id is not None:
+        resolver.put('PY101', '第1课', progress_id)
+    return CourseManagement(page, resolver)
+
+
+def test_navigation_uses_menu_once_then_skips(page, monkeypatch):
+    monkeypatch.setattr(Router, 'routes', {})
+    m = manager(page)
+
+    check(page.measure(m.to_management, '课程进度'), 'to_management')
+    assert not page.measure(m.to_management, '课程进度')
+    # 记下直达地址后，别的页面直接 goto，不再点菜单
+    assert page.measure(manager(page).to_management, '课程进度') == {'goto': 1}
+
+
+STEPS = [
+    ('add_progress', (9, 11, '已结束', '变量')),
+    ('add_members', ()),
+    ('add_discuss', ()),
+    ('set_user_state', ('张三', '完成课程')),
+    ('set_user_state_discuss', ('变量', '很好', '张三', '审核中（未发送）')),
+    ('set_users_state', (STUDENTS, '完成课程')),
+]
+
+
+@pytest.mark.parametrize('method, args', STEPS)
+def test_step_within_budget(page, method, args):
+    m = manager(page)
+    check(page.measure(getattr(m, method), 'PY101', '第1课', *args), method)
+
+
+@pytest.mark.parametrize('method, args', STEPS[1:])
+def test_step_by_progress_id_skips_picker(page, method, args):
+    m = manager(page, 'p1')
+    check(page.measure(getattr(m, method), 'PY101', '第1课', *args), f'{method}_by_id')
+    # 不打开课程进度选择框，也不刷新整个页面
+    assert not any('label=课程进度' in target for _, target in page.log)
+    assert not page.actions['reload']
+
+
+def test_modal_left_open_is_a_retryable_timeout(page):
+    page.stuck.add(OPEN_MODAL)
+    m = manager(page)
+    m.to_management('课程进度人员')
+
+    with pytest.raises(StepTimeout):
+        m.add_members('PY101', '第1课')
+    # 下次操作重新进入模块
+    assert m.router.location is None
+
+
+def test_rejected_save_leaves_module(page):
+    page.save_body = '{"success": false, "message": "重复数据"}'.encode()
+    m = manager(page)
+    m.to_management('课程进度人员')
+
+    with pytest.raises(BizError):
+        m.add_members('PY101', '第1课')
+    # 弹窗还开着，下次操作重新进入模块
+    assert m.router.location is None
+
+
+def test_batch_by_progress_id_within_budget(page):
+    m = manager(page, 'p1')
+    counts = page.measure(m.set_users_state, 'PY101', '第1课', STUDENTS, '完成课程')
+    check(counts, 'set_users_state_by_id')
+    counts = page.measure(
+        m.set_user_state_discusses,
+        'PY101',
+        '第1课',
+        '变量',
+        ['好', '很好', '不错'],
+        STUDENTS,
+        '审核中（未发送）',
+    )
+    check(counts, 'set_user_state_discusses_by_id')
+
+
+def test_batch_update_pages_through_list(page):
+    page.rows = [['张三', '李四'], ['王五'], ['赵六']]
+    m = manager(page, 'p1')
+    done = []
+    m.set_users_state(
+        'PY101',
+        '第1课',
+        ['赵六', '张三', '王五'],
+        '请假',
+        lambda user: done.append((user, page.page_no)),
+    )
+    # 每页只查找本页有的学生，找齐后不再翻页
+    assert done == [('张三', 0), ('王五', 1), ('赵六', 2)]
+    assert page.log.count(('click', 'li.ant-pagination-next')) == 2
+
+
+def test_batch_discusses_fill_each_student_and_report_missing(page):
+    page.rows = [['张三'], ['李四']]
+    m = manager(page, 'p1')
+    done = []
+    with pytest.raises(BizError, match='王五'):
+        m.set_user_state_discusses(
+            'PY101',
+            '第1课',
+            '变量',
+            ['张三很好', '王五不错', '李四认真'],
+            ['张三', '王五', '李四'],
+            '审核中（未发送）',
+            done.append,
+        )
+    assert done == ['张三', '李四']
+    contents = [
+        value for selector, value in page.filled if '请输入课后评价' in selector
+    ]
+    assert contents == ['张三很好', '李四认真']
+    # 翻到最后一页仍没找到才报错
+    assert page.page_no == 1
+
+
+def test_batch_cost_grows_only_per_student(page):
+    def cost(count: int) -> dict:
+        m = manager(page, 'p1')
+        users = [f'学生{i}' for i in range(count)]
+        return {
+            'set_users_state': page.measure(
+                m.set_users_state, 'PY101', '第1课', users, '完成课程'
+            ),
+            'set_user_state_discusses': page.measure(
+                m.set_user_state_discusses,
+                'PY101',
+                '第1课',
+                '变量',
+                ['好'] * count,
+                users,
+                '审核中（未发送）',
+            ),
+        }
+
+    few, many = cost(2), cost(7)
+    for method, per_student in PER_STUDENT.items():
+        extra = many[method] - few[method]
+        assert dict(extra) == {k: v * 5 for k, v in per_student.items()}, method
+
+
+def test_login_within_budget(page, monkeypatch):
+    monkeypatch.setattr(
+        pages.login,
+        'recognize_captcha',
+        lambda image: SimpleNamespace(text='1234', confidence=1.0),
+    )
+    page.counts['role=link[logoJeecg Boot]'] = 0
+    login = LoginPage(page)
+
+    check(page.measure(login.is_session_valid), 'is_session_valid')
+    check(page.measure(login.login, 'admin', 'secret'), 'login')
@@ -0,0 +1,102 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import daemon
+from builders import make_courses, make_roster
+from daemon import Daemon, Job, JobServer, submit
+from err import BizError
+from journal import Journal
+from profiles import load_profile
+
+
+@pytest.fixture
+def server():
+    server = JobServer('127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_submit_streams_course_status(server):
+    courses = make_courses(make_roster(2))
+    port = server.server_address[1]
+    events: list[dict] = []
+    client = threading.Thread(
+        target=lambda: events.extend(submit(courses, '127.0.0.1', port))
+    )
+    client.start()
+
+    # 代替浏览器主线程处理任务
+    job = server.queue.get(timeout=5)
+    job.start()
+    job.update('BENCH-001-第1课', 'done')
+    job.update('BENCH-002-第1课', 'failed', '班级中没有找到: 学生00200')
+    job.finish()
+    client.join(timeout=5)
+
+    assert [(e.get('key'), e['status']) for e in events] == [
+        ('BENCH-001-第1课', 'queued'),
+        ('BENCH-002-第1课', 'queued'),
+        (None, 'started'),
+        ('BENCH-001-第1课', 'done'),
+        ('BENCH-002-第1课', 'failed'),
+        (None, 'finished'),
+    ]
+    assert events[-1] == {'job': job.id, 'status': 'finished', 'done': 1, 'failed': 1}
+
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/jobs/{job.id}') as response:
+        assert json.loads(response.read())['finished'] is True
+
+
+def test_rejects_invalid_courses(server):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{server.server_address[1]}/jobs',
+        data=b'[{"code": "X"}]',
+        method='POST',
+    )
+    with pytest.raises(urllib.error.HTTPError) as info:
+        urllib.request.urlopen(request)
+    assert info.value.code == 400
+    assert server.queue.empty()
+
+
+def test_login_failure_fails_job_and_keeps_serving(monkeypatch):
+    def login(*args):
+        raise BizError('验证码识别失败')
+
+    monkeypatch.setattr(daemon, 'open_logged_in_context', login)
+    worker = Daemon(load_profile('fast'), use_journal=False)
+    jobs = [Job(make_courses(make_roster(1))), Job(make_courses(make_roster(1)))]
+    for job in jobs:
+        worker.run_job(None, job, None)
+
+    for job in jobs:
+        assert job.finished
+        assert job.events[-1]['failed'] == 1
+        assert job.status['BENCH-001-第1课']['error'] == 'BizError: 验证码识别失败'
+
+
+def test_forced_resubmit_clears_journal(server, tmp_path, monkeypatch):
+    courses = make_courses(make_roster(1))
+    port = server.server_address[1]
+    client = threading.Thread(
+        target=lambda: list(submit(courses, '127.0.0.1', port, force=True))
+    )
+    client.start()
+    job = server.queue.get(timeout=5)
+    assert job.force
+
+    journal = Journal(str(tmp_path / 'journal.db'))
+    journal.record('BENCH-001', '第1课', 'add_progress')
+    journal.record('BENCH-002', '第1课', 'add_progress')
+    monkeypatch.setattr(daemon, 'open_logged_in_context', lambda *args: 1 / 0)
+    Daemon(load_profile('fast')).run_job(None, job, journal)
+    client.join(timeout=5)
+
+    # 只清除这次提交的课程
+    assert [row[0] for row in journal.entries()] == ['BENCH-002']
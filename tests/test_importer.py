@@ -0,0 +1,92 @@
+import io
+import re
+import zipfile
+from types import SimpleNamespace
+
+from builders import make_courses, make_roster
+from importer import ImportAdapter, xlsx
+from planner import build_graph
+
+
+def test_xlsx_cells():
+    data = xlsx(['课程编号', '学生'], [['A&B', '<张三>']])
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        sheet = z.read('xl/worksheets/sheet1.xml').decode()
+        assert 'xl/workbook.xml' in z.namelist()
+    assert re.findall(r'<t>(.*?)</t>', sheet) == [
+        '课程编号',
+        '学生',
+        'A&amp;B',
+        '&lt;张三&gt;',
+    ]
+
+
+class FakeImport(ImportAdapter):
+    """
+    不打开页面的导入：failed 按模块列出导入失败的学生（课程进度为课程），
+    每出现一次失败一次；成功的行记在 stored 中
+    """
+
+    def __init__(self, failed: dict[str, list[str]]) -> None:
+        super().__init__(SimpleNamespace(page=None))
+        self.failed = failed
+        self.uploaded: list[str] = []
+        self.stored: dict[str, list[list[str]]] = {}
+
+    def upload(self, module, kind, rows):
+        if not rows:
+            return []
+        self.uploaded.append(kind)
+        failed = []
+        for row in rows:
+            key, _, user, values = row
+            if (user or key) in self.failed.get(kind, []):
+                self.failed[kind].remove(user or key)
+                failed.append(row)
+            else:
+                self.stored.setdefault(kind, []).append(values)
+        return failed
+
+
+def test_failed_rows_fall_back():
+    courses = make_courses(make_roster(2))
+    first = courses[0]
+
+    adapter = FakeImport(
+        {
+            'progress': ['BENCH-002-第1课'],
+            # 第一节课的人员全部失败，课评只失败一行，重新导入后成功
+            'member': first.users_over + first.users_leave,
+            'discuss': [first.users_over[0]],
+        }
+    )
+    changes = adapter.import_courses(courses)
+    assert adapter.uploaded == ['progress', 'member', 'discuss', 'discuss']
+    assert adapter.failures == {}
+
+    assert all(users is None for users in changes['BENCH-002-第1课'].values())
+    assert changes['BENCH-001-第1课'] == {
+        'add_members': None,
+        'set_users_over': first.users_over,
+        'set_users_leave': first.users_leave,
+    }
+    steps = [(op.key, op.step) for op in build_graph(courses, changes)]
+    assert ('BENCH-001-第1课', 'add_progress') not in steps
+    assert ('BENCH-002-第1课', 'add_progress') in steps
+
+
+def test_partly_failed_roster_is_not_added_twice():
+    (course,) = make_courses(make_roster(1))
+    student = course.users_over[1]
+    # 这个学生的人员行重新导入后仍失败，其它学生不受影响
+    adapter = FakeImport({'member': [student, student]})
+    changes = adapter.import_courses([course])
+
+    assert changes == {}
+    assert str(adapter.failures['BENCH-001-第1课']).endswith(student)
+    members = [tuple(row) for row in adapter.stored['member']]
+    assert (
+        len(members)
+        == len(set(members))
+        == len(course.users_over) + len(course.users_leave) - 1
+    )
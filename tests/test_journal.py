@@ -0,0 +1,56 @@
+from journal import Journal
+from model import CourseModel
+from workflow import run_course
+
+
+class RecordingManager:
+    """只记录调用的假 CourseManagement"""
+
+    def __init__(self, fail_on: str | None = None) -> None:
+        self.calls: list[tuple] = []
+        self.fail_on = fail_on
+
+    def __getattr__(self, name):
+        def method(*args):
+            if name == self.fail_on:
+                raise RuntimeError(name)
+            self.calls.append((name, *args))
+            on_done = args[-1]
+            if callable(on_done):
+                users = args[-3] if name == 'set_user_state_discusses' else args[2]
+                for user in users:
+                    on_done(user)
+
+        return method
+
+
+COURSE = CourseModel(
+    code='PY101',
+    progress='第1课',
+    content='变量',
+    time=(9, 11),
+    users_over=['张三', '李四'],
+    users_leave=['王五'],
+    discuss_content=['好', '很好'],
+)
+
+
+def test_rerun_resumes_after_failed_step(tmp_path):
+    journal = Journal(str(tmp_path / 'journal.db'))
+
+    first = RecordingManager(fail_on='add_discuss')
+    try:
+        run_course(first, COURSE, journal)
+    except RuntimeError:
+        pass
+
+    second = RecordingManager()
+    run_course(second, COURSE, journal)
+
+    names = [call[0] for call in second.calls]
+    assert 'add_progress' not in names and 'add_members' not in names
+    assert ('set_users_over', 'PY101', '第1课', []) == second.calls[0][:4]
+    assert names[-2:] == ['add_discuss', 'set_user_state_discusses']
+
+    assert journal.reset('PY101') == 8
+    assert journal.entries() == []
@@ -0,0 +1,49 @@
+import json
+import logging
+import threading
+
+from utils import log_context, setup_logging, stop_logging
+
+
+def test_json_lines_carry_context_fields(tmp_path):
+    path = setup_logging(tmp_path, json_lines=True)
+    logger = logging.getLogger('test_bot')
+    try:
+        with log_context(code='PY101', progress='第1课', step='set_users_over'):
+            with log_context(user='张三'):
+                logger.info('保存上课状态')
+            # 其它线程里的日志不带这里的字段
+            thread = threading.Thread(target=logger.info, args=('后台',))
+            thread.start()
+            thread.join()
+        logger.info('完成')
+    finally:
+        stop_logging()
+
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert lines[0]['message'] == '保存上课状态'
+    assert {k: lines[0][k] for k in ('code', 'progress', 'user', 'step')} == {
+        'code': 'PY101',
+        'progress': '第1课',
+        'user': '张三',
+        'step': 'set_users_over',
+    }
+    assert 'code' not in lines[1] and 'code' not in lines[2]
+
+
+def test_rotates_by_size(tmp_path):
+    path = setup_logging(tmp_path, max_bytes=500, backups=2)
+    logger = logging.getLogger('test_bot')
+    try:
+        for i in range(100):
+            logger.info(f'第 {i} 条')
+    finally:
+        stop_logging()
+
+    assert path.name == 'app.log'
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'app.log',
+        'app.log.1',
+        'app.log.2',
+    ]
+    assert '第 99 条' in path.read_text(encoding='utf-8')
@@ -0,0 +1,121 @@
+import threading
+
+from api import ApiCourseManagement
+from api.course_management import DEFAULT_ENDPOINTS
+from mirror import Mirror, MirrorSync
+
+PROGRESS = [
+    {
+        'id': 'p1',
+        'courseCode': 'PY101',
+        'progress': '第1课',
+        'beginTime': '2026-09-01 09:00:00',
+        'state': '3',
+        'createTime': '2026-09-01 08:00:00',
+    },
+]
+MEMBERS = [
+    {
+        'id': f'm{i}',
+        'progressId': 'p1',
+        'userName': f'学生{i}',
+        'state': '2' if i == 0 else '1',
+        'createTime': f'2026-09-01 10:00:{i:02d}',
+    }
+    for i in range(5)
+]
+FEEDBACK = [
+    {
+        'id': 'f1',
+        'progressId': 'p1',
+        'userName': '学生1',
+        'content': '很好',
+        'state': '1',
+        'createTime': '2026-09-01 12:00:00',
+    },
+]
+
+
+class FakeClient:
+    """按 pageNo/pageSize 切分记录的假列表接口，记录请求参数和线程"""
+
+    def __init__(self) -> None:
+        self.data = {
+            DEFAULT_ENDPOINTS['progress_list']: PROGRESS,
+            DEFAULT_ENDPOINTS['member_list']: MEMBERS,
+            DEFAULT_ENDPOINTS['discuss_list']: FEEDBACK,
+            DEFAULT_ENDPOINTS['course_list']: [
+                {'id': 'c1', 'courseCode': 'PY101', 'createTime': ''}
+            ],
+        }
+        self.calls: list[tuple[str, dict]] = []
+        self.threads: set[int] = set()
+
+    def get(self, path: str, params: dict) -> dict:
+        self.calls.append((path, params))
+        self.threads.add(threading.get_ident())
+        records = [
+            r
+            for r in self.data[path]
+            if (r.get('updateTime') or '') >= params.get('updateTime_begin', '')
+            and r['createTime'] >= params.get('createTime_begin', '')
+        ]
+        start = (params['pageNo'] - 1) * params['pageSize']
+        return {
+            'records': records[start : start + params['pageSize']],
+            'total': len(records),
+        }
+
+
+def test_sync_pages_in_parallel_and_refreshes_incrementally(tmp_path):
+    client = FakeClient()
+    mirror = Mirror(str(tmp_path / 'mirror.db'))
+    sync = MirrorSync(ApiCourseManagement(client), mirror, page_size=2, workers=3)
+
+    assert sync.refresh() == {'progress': 1, 'members': 5, 'feedback': 1}
+    member_pages = [p for path, p in client.calls if path.endswith('User/list')]
+    assert sorted(p['pageNo'] for p in member_pages) == [1, 2, 3]
+    assert len(client.threads) > 1
+
+    assert mirror.attendance('PY101') == [('PY101', '第1课', 5, 4, 1, 80.0)]
+    assert mirror.pending() == [('PY101', '第1课', 1)]
+    assert mirror.history('学生1') == [
+        (
+            'PY101',
+            '第1课',
+            '2026-09-01 09:00:00',
+            '完成课程',
+            '审核中（未发送）',
+            '很好',
+        )
+    ]
+
+    # 增量同步只带上次的水位查询，修改过的记录覆盖旧值
+    members = client.data[DEFAULT_ENDPOINTS['member_list']] = list(MEMBERS)
+    members[1] = {**members[1], 'state': '0', 'updateTime': '2026-09-02 09:00:00'}
+    client.calls.clear()
+    counts = sync.refresh()
+    assert counts['members'] == 2
+    assert all(
+        'createTime_begin' in p or 'updateTime_begin' in p for _, p in client.calls
+    )
+    assert mirror.attendance() == [('PY101', '第1课', 4, 3, 1, 75.0)]
+    assert mirror.watermark('members') == '2026-09-02 09:00:00'
+    mirror.close()
+
+
+def test_progress_without_code_resolves_course_or_stays_null(tmp_path):
+    client = FakeClient()
+    base = {k: v for k, v in PROGRESS[0].items() if k != 'courseCode'}
+    client.data[DEFAULT_ENDPOINTS['progress_list']] = [
+        {**base, 'courseId': 'c1'},
+        {**base, 'id': 'p2', 'courseId': 'c9'},
+    ]
+    mirror = Mirror(str(tmp_path / 'mirror.db'))
+    MirrorSync(ApiCourseManagement(client), mirror).sync_table('progress')
+
+    assert mirror._query('SELECT id, code FROM progress ORDER BY id') == [
+        ('p1', 'PY101'),
+        ('p2', None),
+    ]
+    mirror.close()
@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from api import ApiClient, ApiCourseManagement
+from builders import make_courses, make_roster
+from mock_site import MockSite, chromium_available
+from planner import build_plan
+from resolver import ProgressResolver
+from workflow import run_plan
+
+PREFIX = '/jeecg-boot'
+
+
+def test_api_backend_runs_plan_against_mock_site():
+    rosters = make_roster(2)
+    with MockSite(rosters) as site:
+        token = ApiClient(site.url + PREFIX, '').post(
+            '/sys/login', {'username': 'bench', 'password': 'bench'}
+        )['token']
+        client = ApiClient(site.url + PREFIX, token)
+        results = run_plan(
+            ApiCourseManagement(client, resolver=ProgressResolver()),
+            build_plan(make_courses(rosters)),
+        )
+        client.close()
+
+        assert results == {'BENCH-001-第1课': None, 'BENCH-002-第1课': None}
+        states = [m['state'] for m in site.data.members]
+        assert states.count('1') == 20 and states.count('2') == 4
+        assert all(d['content'] for d in site.data.discusses if d['state'] == '0')
+
+
+@pytest.mark.skipif(not chromium_available(), reason='没有安装 chromium')
+def test_benchmark_single_course(tmp_path):
+    output = tmp_path / 'bench.json'
+    subprocess.run(
+        [
+            sys.executable,
+            str(Path(__file__).parent / 'benchmark.py'),
+            '--sizes',
+            '1',
+            '--latency',
+            '0',
+            '--output',
+            str(output),
+        ],
+        check=True,
+        timeout=300,
+    )
+    (report,) = json.loads(output.read_text(encoding='utf-8'))
+    assert report['failed'] == []
+    assert report['courses_per_minute'] > 0
+    assert report['steps']['add_progress']['count'] == 1
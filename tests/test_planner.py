@@ -0,0 +1,57 @@
+from datetime import date, datetime
+
+from model import CourseModel
+from planner import (
+    backfill_courses,
+    build_plan,
+    count_navigations,
+    count_navigations_per_course,
+)
+
+
+def course(code: str, **kwargs) -> CourseModel:
+    return CourseModel(
+        code=code, progress='第1课', content='变量', time=(9, 11), **kwargs
+    )
+
+
+def test_plan_groups_by_module_and_respects_dependencies():
+    courses = [
+        course('A', users_over=['张三'], discuss_content=['好']),
+        course('B', users_leave=['李四']),
+    ]
+    plan = build_plan(courses)
+
+    modules = [op.module for op in plan]
+    assert modules == sorted(modules, key=modules.index)
+    for index, op in enumerate(plan):
+        assert all(plan.index(dep) < index for dep in op.deps)
+    # B 没有正常上课的学生，不安排 set_users_over
+    assert [op.step for op in plan if op.course.code == 'B'] == [
+        'add_progress',
+        'add_members',
+        'set_users_leave',
+        'add_discuss',
+    ]
+    assert count_navigations(plan) < count_navigations_per_course(plan)
+
+
+def test_backfill_selects_days_and_merges_modules():
+    courses = [
+        course('A', day=date(2026, 9, 2)),
+        CourseModel(
+            code='B',
+            progress='第1课',
+            content='变量',
+            time=(datetime(2026, 9, 1, 14), datetime(2026, 9, 1, 16)),
+        ),
+        course('C', day=date(2026, 9, 5)),
+        course('D'),
+    ]
+    selected = backfill_courses(courses, date(2026, 9, 1), date(2026, 9, 3))
+    assert [c.code for c in selected] == ['B', 'A']
+    assert selected[1].span()[0] == datetime(2026, 9, 2, 9)
+
+    # 两天的课程在同一份计划里，每个模块只进入一次
+    plan = build_plan(selected)
+    assert count_navigations(plan) == len(set(op.module for op in plan))
@@ -0,0 +1,83 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from builders import make_courses, make_roster
+from err import LoginExpired
+from planner import build_plan
+from pool import run_pool
+
+
+class ThreadManager:
+    """记录调用和所在线程的假 CourseManagement，fail_on 中的 (课程编号, 步骤) 抛出 error"""
+
+    def __init__(self, calls: list, fail_on: dict) -> None:
+        self.calls = calls
+        self.fail_on = fail_on
+
+    def reset(self) -> None:
+        pass
+
+    def op_done(self, op, error=None) -> None:
+        self.calls.append((op.course.code, 'op_done', threading.current_thread().name))
+
+    def __getattr__(self, name):
+        def method(code, progress, *args):
+            self.calls.append((code, name, threading.current_thread().name))
+            # 让出时间片，操作分散到各个线程
+            time.sleep(0.01)
+            if (code, name) in self.fail_on:
+                raise self.fail_on[code, name]
+
+        return method
+
+
+def managers(calls: list, fail_on: dict | None = None):
+    @contextmanager
+    def open_manager():
+        yield ThreadManager(calls, fail_on or {})
+
+    return open_manager
+
+
+def test_runs_plan_across_threads_in_dependency_order():
+    courses = make_courses(make_roster(4))
+    plan = build_plan(courses)
+    calls: list[tuple[str, str, str]] = []
+    results = run_pool(
+        plan,
+        3,
+        managers(calls, {('BENCH-002', 'add_members'): RuntimeError('保存失败')}),
+    )
+
+    assert results == {
+        'BENCH-001-第1课': None,
+        'BENCH-002-第1课': results['BENCH-002-第1课'],
+        'BENCH-003-第1课': None,
+        'BENCH-004-第1课': None,
+    }
+    assert str(results['BENCH-002-第1课']) == '保存失败'
+    assert len({thread for *_, thread in calls}) > 1
+    # 每个执行过的操作之后都检查是否回收 context
+    assert sum(step == 'op_done' for _, step, _ in calls) == len(plan) - 4
+    # 每节课的步骤按依赖顺序执行，失败的课程不再继续
+    for course in courses:
+        steps = [
+            step for code, step, _ in calls if code == course.code and step != 'op_done'
+        ]
+        if course.code == 'BENCH-002':
+            assert steps == ['add_progress', 'add_members']
+        else:
+            assert steps == [op.step for op in plan if op.course is course]
+
+
+def test_login_expired_stops_all_threads():
+    plan = build_plan(make_courses(make_roster(3)))
+    calls: list[tuple[str, str, str]] = []
+    with pytest.raises(LoginExpired):
+        run_pool(
+            plan, 2, managers(calls, {('BENCH-001', 'add_members'): LoginExpired()})
+        )
+    assert len(calls) < len(plan)
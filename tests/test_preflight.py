@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from preflight import PreflightError, iter_courses, load_courses, preflight
+
+
+def course(**kwargs) -> dict:
+    return {
+        'code': 'PY101',
+        'progress': '第1课',
+        'content': '变量',
+        'time': [9, 11],
+        'users_over': ['张三'],
+        'discuss_content': ['好'],
+        **kwargs,
+    }
+
+
+ROWS = [
+    course(),
+    course(progress='第2课', time=[9, 24]),
+    course(progress='第3课', time=[11, 9], state='已完成'),
+    course(progress='第4课', discuss_content=[]),
+    course(),
+]
+
+
+def test_reports_every_error_at_once(tmp_path):
+    path = tmp_path / 'courses.json'
+    path.write_text(json.dumps(ROWS, ensure_ascii=False), encoding='utf-8')
+
+    with pytest.raises(PreflightError) as info:
+        load_courses(path)
+    errors = info.value.errors
+    assert any(e.startswith('第 2 条 time.hours.1') for e in errors)
+    # 字段错误和状态错误在同一条里一起报出
+    assert any(e.startswith('第 3 条 state') for e in errors)
+    assert any(e.startswith('第 4 条') and '对不上' in e for e in errors)
+    assert len(errors) == 3
+
+
+def test_jsonl_streams_and_checks_duplicates(tmp_path):
+    path = tmp_path / 'courses.jsonl'
+    lines = [json.dumps(row, ensure_ascii=False) for row in ROWS]
+    path.write_text('\n'.join(lines) + '\n\n', encoding='utf-8')
+
+    errors = preflight(path)
+    assert [e.split(' ', 3)[1] for e in errors] == ['2', '3', '4', '5']
+    assert '第 5 行: PY101-第1课 与第 1 行重复' in errors
+
+    path.write_text('\n'.join(lines[:1] + lines[3:4]), encoding='utf-8')
+    courses = iter_courses(path)
+    assert next(courses).progress == '第1课'
+    with pytest.raises(PreflightError):
+        next(courses)
@@ -0,0 +1,33 @@
+import pytest
+
+from err import BizError
+from pacing import Pacer
+from profiles import load_profile
+
+
+def test_profiles():
+    fast = load_profile('fast')
+    assert fast.launch_options() == {'headless': True, 'slow_mo': 0}
+    assert not fast.pause and fast.pacing
+    assert load_profile('debug').slow_mo == 300
+    with pytest.raises(BizError):
+        load_profile('turbo')
+
+
+def test_pacer_slows_down_only_when_needed():
+    pacer = Pacer(enabled=True, slow_factor=2, max_delay=3, error_delay=1)
+    for _ in range(10):
+        pacer.observe(0.2)
+    assert pacer.delay == 0
+
+    for _ in range(10):
+        pacer.observe(2.0)
+    assert 0 < pacer.delay <= 3
+
+    for _ in range(30):
+        pacer.observe(0.2)
+    assert pacer.delay == 0
+
+    pacer.error()
+    pacer.error()
+    assert pacer.delay == 2
@@ -0,0 +1,66 @@
+from api import ApiClient, ApiCourseManagement
+from builders import make_courses, make_roster
+from mock_site import MockSite
+from model import ProgressState
+from planner import build_plan
+from reconcile import diff_course, reconcile_plan
+from resolver import ProgressResolver
+from workflow import run_plan
+
+PREFIX = '/jeecg-boot'
+
+
+def test_diff_course():
+    (course,) = make_courses(make_roster(1))
+    assert list(diff_course(course, None)) == [
+        'add_progress',
+        'add_members',
+        'set_users_over',
+        'set_users_leave',
+        'add_discuss',
+        'set_user_state_discusses',
+    ]
+
+    done = ProgressState(
+        members={u: '完成课程' for u in course.users_over}
+        | {u: '请假' for u in course.users_leave},
+        discusses={
+            u: {'content': c, 'state': course.discuss_state, 'title': course.content}
+            for u, c in zip(course.users_over, course.discuss_content)
+        },
+    )
+    assert diff_course(course, done) == {}
+
+    done.members[course.users_leave[0]] = '完成课程'
+    done.discusses[course.users_over[1]]['content'] = '旧课评'
+    assert diff_course(course, done) == {
+        'set_users_leave': [course.users_leave[0]],
+        'set_user_state_discusses': [course.users_over[1]],
+    }
+
+
+def test_sync_replays_only_changed_students():
+    rosters = make_roster(2)
+    with MockSite(rosters) as site:
+        token = ApiClient(site.url + PREFIX, '').post(
+            '/sys/login', {'username': 'bench', 'password': 'bench'}
+        )['token']
+        client = ApiClient(site.url + PREFIX, token)
+        manager = ApiCourseManagement(client, resolver=ProgressResolver())
+        courses = make_courses(rosters)
+        run_plan(manager, build_plan(courses))
+
+        courses[1].discuss_content[0] = '改过的课评'
+        before = site.requests
+        plan = reconcile_plan(courses, manager.read_progresses)
+        client.close()
+        # 课程进度、人员、课评各查一次，不随课程数增加
+        assert site.requests - before == 3
+
+    assert [(op.step, op.key, op.users) for op in plan] == [
+        (
+            'set_user_state_discusses',
+            'BENCH-002-第1课',
+            [courses[1].users_over[0]],
+        )
+    ]
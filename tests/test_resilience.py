@@ -0,0 +1,83 @@
+import pytest
+
+import workflow
+from builders import make_courses, make_roster
+from err import StepTimeout
+from planner import Operation
+from resilience import CircuitBreaker, RetryPolicy
+
+
+def test_delay_is_jittered_and_capped():
+    policy = RetryPolicy(max_times=5, backoff=2, max_backoff=5)
+    assert all(1 <= policy.delay(1) <= 2 for _ in range(20))
+    assert all(2.5 <= policy.delay(4) <= 5 for _ in range(20))
+
+
+def test_breaker_opens_on_errors_and_slow_responses():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        threshold=3, slow_seconds=1, cooldown=10, clock=lambda: now[0]
+    )
+    breaker.record(False)
+    breaker.record(True, 5)
+    breaker.record(True, 0.1)
+    assert breaker.failures == 0
+
+    opened = CircuitBreaker.opened
+    for _ in range(3):
+        breaker.record(False)
+    assert CircuitBreaker.opened == opened + 1
+    assert breaker.remaining() == 10
+    now[0] = 10
+    assert breaker.remaining() == 0
+
+
+class FlakyManager:
+    """前 failures 次调用超时，记录复位次数"""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.resets = 0
+
+    def add_members(self, code: str, progress: str) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise StepTimeout(f'{code}-{progress} 超时')
+
+    def set_users_over(self, code, progress, users, on_done) -> None:
+        self.add_members(code, progress)
+
+    def reset(self) -> None:
+        self.resets += 1
+
+
+def test_run_op_retries_from_safe_point(monkeypatch):
+    monkeypatch.setattr(workflow.time, 'sleep', lambda seconds: None)
+    (course,) = make_courses(make_roster(1))
+
+    manager = FlakyManager(failures=2)
+    retries = RetryPolicy.retries
+    workflow.run_op(manager, Operation(0, 'set_users_over', course))
+    assert manager.resets == 2
+    assert RetryPolicy.retries == retries + 2
+
+    # 新增类步骤默认不重试，避免重复新增
+    manager = FlakyManager(failures=1)
+    with pytest.raises(StepTimeout):
+        workflow.run_op(manager, Operation(1, 'add_members', course))
+    assert manager.resets == 0
+
+
+def test_scattered_errors_do_not_open_breaker(monkeypatch):
+    monkeypatch.setattr(workflow.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(workflow, 'breaker', CircuitBreaker(threshold=3, cooldown=60))
+    (course,) = make_courses(make_roster(1))
+
+    # 每个操作先超时一次再成功，出错次数累计超过阈值但从不连续
+    opened = CircuitBreaker.opened
+    for i in range(5):
+        workflow.run_op(
+            FlakyManager(failures=1), Operation(i, 'set_users_over', course)
+        )
+    assert CircuitBreaker.opened == opened
+    assert workflow.breaker.failures == 0
@@ -0,0 +1,15 @@
+from pages.router import Router
+
+
+def test_router_learns_route_and_skips_when_clean(monkeypatch):
+    monkeypatch.setattr(Router, 'routes', {})
+    router = Router()
+
+    assert router.resolve('课程进度', 'about:blank') is None
+    router.arrive('课程进度', 'http://x/progress')
+
+    assert router.resolve('课程进度', 'http://x/progress') == ''
+    assert Router().resolve('课程进度', 'about:blank') == 'http://x/progress'
+
+    router.leave()
+    assert router.resolve('课程进度', 'http://x/progress') == 'http://x/progress'
@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import pages.login
+from mock_site import MockSite, chromium_available
+from session import open_logged_in_context
+
+pytestmark = pytest.mark.skipif(not chromium_available(), reason='没有安装 chromium')
+
+
+@pytest.fixture
+def site(monkeypatch):
+    with MockSite() as site:
+        monkeypatch.setattr(pages.login, 'BASE_URL', site.url)
+        monkeypatch.setattr(
+            pages.login, 'MANAGER_URL', f'{site.url}/dashboard/analysis'
+        )
+        monkeypatch.setattr(
+            pages.login,
+            'recognize_captcha',
+            lambda image: SimpleNamespace(text='1234', confidence=1.0),
+        )
+        yield site
+
+
+@pytest.fixture
+def browser():
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        yield browser
+        browser.close()
+
+
+def saved_token(storage) -> str:
+    (origin,) = json.loads(storage.read_text(encoding='utf-8'))['origins']
+    (item,) = [i for i in origin['localStorage'] if i['name'] == 'pro__Access-Token']
+    return json.loads(item['value'])['value']
+
+
+def test_reuses_saved_storage_state(site, browser, tmp_path):
+    storage = tmp_path / 'storage.json'
+    open_logged_in_context(browser, {}, 'bench', 'bench', storage).close()
+    token = saved_token(storage)
+
+    open_logged_in_context(browser, {}, 'bench', 'bench', storage).close()
+    # 第二次直接复用，没有再登录
+    assert site.data.tokens == {token}
+    assert saved_token(storage) == token
+
+
+def test_expired_session_logs_in_again(site, browser, tmp_path):
+    storage = tmp_path / 'storage.json'
+    open_logged_in_context(browser, {}, 'bench', 'bench', storage).close()
+    expired = saved_token(storage)
+    # 服务端让登录态失效
+    site.data.tokens.clear()
+
+    context = open_logged_in_context(browser, {}, 'bench', 'bench', storage)
+    page = context.new_page()
+    assert pages.LoginPage(page).is_session_valid()
+    context.close()
+    assert saved_token(storage) not in (expired, None)
+    assert site.data.tokens == {saved_token(storage)}
@@ -0,0 +1,23 @@
+from builders import make_courses, make_roster
+from shard import WorkQueue
+
+
+def test_expired_lease_goes_back_to_queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'))
+    queue.fill(make_courses(make_roster(3)))
+
+    assert queue.lease('worker-0', seconds=-1).code == 'BENCH-001'
+    # worker-0 的租约已过期，课程被 worker-1 接手，worker-0 之后的汇报无效
+    assert queue.lease('worker-1').code == 'BENCH-001'
+    assert queue.lease('worker-1').code == 'BENCH-002'
+    queue.finish('BENCH-001-第1课', 'worker-0')
+    queue.finish('BENCH-001-第1课', 'worker-1')
+    queue.finish('BENCH-002-第1课', 'worker-1', '保存失败')
+
+    assert queue.counts() == {'done': 1, 'failed': 1, 'pending': 1}
+    assert queue.failures() == [
+        ('BENCH-002-第1课', '保存失败'),
+        ('BENCH-003-第1课', '未处理'),
+    ]
+    assert queue.by_worker() == [('worker-1', 'done', 1), ('worker-1', 'failed', 1)]
+    queue.close()
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from utils.trace import Tracer, traced, tracer
+
+
+class Manager:
+    @traced()
+    def add_members(self, course_code: str, the_progress_of_the_curriculum: str):
+        with tracer.span('progress_query'):
+            pass
+
+    @traced()
+    async def add_discuss(self, course_code: str, the_progress_of_the_curriculum: str):
+        return course_code
+
+
+def test_disabled_tracer_records_nothing():
+    Manager().add_members('A', '1')
+    assert Tracer().span('x').__class__.__name__ == 'nullcontext'
+    assert tracer.spans == []
+
+
+def test_spans_inherit_course_and_report(tmp_path):
+    tracer.enable()
+    try:
+        Manager().add_members('A', '第1课')
+        assert asyncio.run(Manager().add_discuss('B', '第2课')) == 'B'
+    finally:
+        tracer.enabled = False
+
+    names = [(s['name'], s['course']) for s in tracer.spans]
+    assert names == [
+        ('add_members', 'A-第1课'),
+        ('progress_query', 'A-第1课'),
+        ('add_discuss', 'B-第2课'),
+    ]
+    steps, courses = tracer.summary()
+    assert steps.row_count == 3 and courses.row_count == 2
+
+    path = tracer.write(tmp_path)
+    assert len(json.loads(path.read_text(encoding='utf-8'))) == 3